@@ -1,4 +1,5 @@
 # conundrum/__init__.py
+import os
 from flask import Flask
 from flask_socketio import SocketIO
 
@@ -11,6 +12,77 @@ def create_app():
         static_folder="static"
     )
     app.config["SECRET_KEY"] = "super-secret-key"
+    # Token for the /admin routes (profiling, traces); unset = admin routes are off
+    app.config["ADMIN_TOKEN"] = os.environ.get("CONUNDRUM_ADMIN_TOKEN")
+    # Fixed seed = deterministic mode: lobby codes, shuffles and prompt draws replay identically
+    app.config["RNG_SEED"] = os.environ.get("CONUNDRUM_SEED")
+
+    from .utils.rng import lobby_rng
+    lobby_rng.configure(app.config["RNG_SEED"])
+
+    # Seconds a closed lobby's code is held back before it can be issued again
+    app.config["CODE_QUARANTINE_SECONDS"] = float(os.environ.get("CONUNDRUM_CODE_QUARANTINE", 300))
+
+    from .utils.lobby_codes import code_allocator
+    code_allocator.configure(lobby_rng.codes, app.config["CODE_QUARANTINE_SECONDS"])
+
+    # Room updates (votes, scores, chat) are coalesced per lobby over this window; 0 = send at once
+    app.config["BROADCAST_WINDOW_MS"] = int(os.environ.get("CONUNDRUM_BROADCAST_WINDOW_MS", 50))
+
+    # Seconds a disconnected player keeps their seat before the reaper removes them
+    app.config["RECONNECT_GRACE_SECONDS"] = float(os.environ.get("CONUNDRUM_RECONNECT_GRACE", 15))
+
+    from .utils.presence import presence
+    presence.configure(app.config["RECONNECT_GRACE_SECONDS"])
+
+    # Seconds players get to submit / to vote before the server moves the round on (0 = wait forever)
+    app.config["PHASE_SECONDS"] = {
+        "submit": float(os.environ.get("CONUNDRUM_SUBMIT_SECONDS", 90)),
+        "vote": float(os.environ.get("CONUNDRUM_VOTE_SECONDS", 60)),
+    }
+
+    # Where lobby state lives: unset = this process only; redis://... = shared by every
+    # worker (and used as the Socket.IO message queue so room emits reach all of them)
+    app.config["STATE_STORE_URL"] = os.environ.get("CONUNDRUM_STATE_URL")
+    # Secret every worker shares to sign what they store there (required for redis://)
+    app.config["STATE_STORE_KEY"] = os.environ.get("CONUNDRUM_STATE_KEY")
+
+    from .utils.state_store import state_store
+    state_store.configure(app.config["STATE_STORE_URL"], key=app.config["STATE_STORE_KEY"])
+
+    # Socket events remembered per lobby for /admin/trace/<code>; 0 = tracing off
+    app.config["TRACE_EVENTS"] = int(os.environ.get("CONUNDRUM_TRACE_EVENTS", 64))
+
+    from .utils.trace import lobby_traces
+    lobby_traces.configure(app.config["TRACE_EVENTS"])
+
+    # Directory of prebuilt question packs (python -m conundrum.utils.question_pack build ...)
+    from .utils.question_pack import PACK_DIR, PACK_FILES
+    app.config["PACK_DIR"] = os.environ.get("CONUNDRUM_PACK_DIR", PACK_DIR)
+
+    # Hub lag (ms without a heartbeat) at which the watchdog logs what is blocking it; 0 = off
+    app.config["LAG_THRESHOLD_MS"] = float(os.environ.get("CONUNDRUM_LAG_THRESHOLD_MS", 250))
+
+    # Sharding: this worker's URL plus the worker list (comma separated, or a ring file
+    # re-read while running). Unset = one worker serving every lobby
+    app.config["WORKER_URL"] = os.environ.get("CONUNDRUM_WORKER_URL")
+    app.config["WORKERS"] = [w for w in os.environ.get("CONUNDRUM_WORKERS", "").split(",") if w]
+    app.config["RING_FILE"] = os.environ.get("CONUNDRUM_RING_FILE")
+
+    from .utils.sharding import shard
+    shard.configure(app.config["WORKER_URL"], app.config["WORKERS"], app.config["RING_FILE"])
+    code_allocator.set_share(shard.code_share())
+
+    # Snapshots: where to keep the latest one (unset = off) and how often to take it
+    app.config["SNAPSHOT_PATH"] = os.environ.get("CONUNDRUM_SNAPSHOT_PATH")
+    app.config["SNAPSHOT_INTERVAL_SECONDS"] = float(os.environ.get("CONUNDRUM_SNAPSHOT_INTERVAL", 30))
+
+    # Write-ahead log of lobby changes replayed over the snapshot (unset = off), fsynced in groups
+    app.config["EVENT_LOG_PATH"] = os.environ.get("CONUNDRUM_EVENT_LOG")
+    app.config["EVENT_LOG_COMMIT_MS"] = float(os.environ.get("CONUNDRUM_EVENT_LOG_COMMIT_MS", 5))
+
+    from .utils.event_log import event_log
+    event_log.configure(app.config["EVENT_LOG_PATH"], app.config["EVENT_LOG_COMMIT_MS"])
 
     # --- Register blueprints ---
     from .routes import routes        # main site routes (homepage, etc.)
@@ -22,5 +94,33 @@ def create_app():
     # --- Import socket events so they register ---
     from . import socket  
 
-    socketio.init_app(app)
+    socket.prompt_bank.load_packs(PACK_FILES, app.config["PACK_DIR"])
+
+    # sharded workers only ever emit to their own lobbies' sockets, so they skip the queue
+    socketio.init_app(app, message_queue=None if shard.enabled else state_store.message_queue)
+
+    from .utils.broadcast import room_batcher
+    room_batcher.configure(socketio, app.config["BROADCAST_WINDOW_MS"])
+
+    from .utils.timer_wheel import timer_wheel
+    timer_wheel.configure(socketio, phase_seconds=app.config["PHASE_SECONDS"])
+
+    from .utils.watchdog import lag_watchdog
+    lag_watchdog.configure(socketio, app.config["LAG_THRESHOLD_MS"])
+    if lag_watchdog.enabled:
+        socketio.start_background_task(lag_watchdog.run)
+
+    if app.config["RING_FILE"]:
+        socketio.start_background_task(socket.watch_ring)
+
+    from .utils.snapshot import snapshotter
+    snapshotter.configure(socketio, app.config["SNAPSHOT_PATH"], app.config["SNAPSHOT_INTERVAL_SECONDS"])
+    # warm restart: players get the reconnection grace window to rejoin their games,
+    # and rounds in flight get their phase deadlines back
+    if snapshotter.recover():
+        socket.start_reaper()
+        socket.rearm_phases()
+    if snapshotter.enabled:
+        socketio.start_background_task(snapshotter.run)
+        snapshotter.snapshot_on_shutdown()
     return app
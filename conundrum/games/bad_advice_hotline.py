@@ -1,33 +1,46 @@
+from conundrum.utils.duplicates import DuplicateDetector
+
+
 class BadAdviceHotlineGame:
     def __init__(self):
         # Store game states keyed by lobby_code
         self.games = {}
+        # Near-duplicate lookup for submitted advice, per lobby
+        self.duplicates = DuplicateDetector()
 
     def start_round(self, lobby_code, question, players, host=None):
         # Exclude host from players eligible for scoring
-        eligible_players = set(players) - {host} if host else set(players)
+        # (kept in join order so score payloads serialize identically on replay)
+        eligible_players = [p for p in dict.fromkeys(players) if p != host]
         self.games[lobby_code] = {
             "question": question,
             "players": set(players),
             "bad_advice_answers": {},  
             "finished_submitting": set(),
             "votes": {},  
-            "answer_to_player": {},  
+            "answer_to_player": {},  # answer -> players who submitted it
             "scores": {player: 0 for player in eligible_players},  # only non-host players score
             "host": host,
         }
+        self.duplicates.reset(lobby_code)
 
     def submit_bad_advice(self, lobby_code, player, bad_advice):
         game = self.games.get(lobby_code)
         if not game:
             return False
         if player in game["players"] and player not in game["bad_advice_answers"]:
+            duplicate_of = self.duplicates.find(lobby_code, bad_advice)
+            if duplicate_of is not None:
+                # Merge into the earlier advice; its owners share the credit
+                bad_advice = duplicate_of
+            else:
+                self.duplicates.add(lobby_code, bad_advice)
             game["bad_advice_answers"][player] = bad_advice
             game["finished_submitting"].add(player)
             if bad_advice not in game["votes"]:
                 game["votes"][bad_advice] = set()
-            # Track which player submitted which answer
-            game["answer_to_player"][bad_advice] = player
+            # Track which players submitted which answer
+            game["answer_to_player"].setdefault(bad_advice, set()).add(player)
             return True
         return False
 
@@ -35,7 +48,7 @@ class BadAdviceHotlineGame:
         game = self.games.get(lobby_code)
         if not game:
             return False
-        return game["finished_submitting"] == game["players"]
+        return game["players"] <= game["finished_submitting"]
 
     def get_all_bad_advice_answers(self, lobby_code):
         game = self.games.get(lobby_code)
@@ -45,7 +58,7 @@ class BadAdviceHotlineGame:
             if ans not in game["votes"]:
                 game["votes"][ans] = set()
         # Only show player's bad advice answers, no "correct" answer
-        return sorted(game["bad_advice_answers"].values())
+        return sorted(set(game["bad_advice_answers"].values()))
 
     def get_votes_for_answer(self, lobby_code, answer):
         game = self.games.get(lobby_code)
@@ -70,16 +83,17 @@ class BadAdviceHotlineGame:
         if answer not in game["votes"]:
             return False
         # Prevent voting on one's own bad advice answer
-        answer_owner = game["answer_to_player"].get(answer)
-        if answer_owner == player:
+        answer_owners = game["answer_to_player"].get(answer, set())
+        if player in answer_owners:
             return False
         # Cast the vote
         game["votes"][answer].add(player)
 
         # Update scores:
-        # If voted for a bad advice answer, owner of that answer gets a point (excluding host)
-        if answer_owner is not None and answer_owner != game.get("host"):
-            game["scores"][answer_owner] += 5
+        # If voted for a bad advice answer, every owner of that answer gets points (excluding host)
+        for owner in answer_owners:
+            if owner != game.get("host"):
+                game["scores"][owner] += 5
 
         return True
 
@@ -126,3 +140,16 @@ class BadAdviceHotlineGame:
             "votes": {},
             "answer_to_player": {},
         })
+        self.duplicates.reset(lobby_code)
+
+    def remove_players(self, lobby_code, players):
+        """Players who left stop counting towards this round; their answers, votes and scores stay."""
+        game = self.games.get(lobby_code)
+        if not game:
+            return
+        game["players"].difference_update(players)
+
+    def release(self, lobby_code):
+        """Forget a lobby that has closed."""
+        self.games.pop(lobby_code, None)
+        self.duplicates.reset(lobby_code)
@@ -1,34 +1,57 @@
 # conundrum/games/emoji_translation.py
+from conundrum.utils.duplicates import DuplicateDetector
+from conundrum.utils.emoji_index import emoji_index
+
+# Points for a guess that matches every emoji in the prompt; partial matches get a share
+AUTO_SCORE_POINTS = 3
+
 
 class EmojiTranslationGame:
-    def __init__(self):
+    def __init__(self, index=None):
         # Stores game state keyed by lobby_code
         self.games = {}
+        # Shared keyword <-> emoji index built once at startup
+        self.emoji_index = index or emoji_index
+        # Near-duplicate lookup for submitted guesses, per lobby
+        self.duplicates = DuplicateDetector()
+
+    def prepare_prompt(self, emoji_prompt):
+        """Turn leftover keywords into emoji and canonicalize; None unless the result is all emoji."""
+        return self.emoji_index.canonicalize_prompt(self.emoji_index.translate(emoji_prompt))
 
     def start_round(self, lobby_code, emoji_prompt, players, host=None):
         # Exclude host from players eligible for scoring
-        eligible_players = set(players) - {host} if host else set(players)
+        # (kept in join order so score payloads serialize identically on replay)
+        eligible_players = [p for p in dict.fromkeys(players) if p != host]
         self.games[lobby_code] = {
             "emoji_prompt": emoji_prompt,          # The emoji string input by host
             "players": set(players),
             "guesses": {},                         
             "finished_submitting": set(),
             "votes": {},                          
-            "guess_to_player": {},                 
+            "guess_to_player": {},                 # guess -> players who submitted it
             "scores": {player: 0 for player in eligible_players},  
+            "similarity": {},                      # player -> auto-score similarity (0.0 - 1.0)
             "host": host,
         }
+        self.duplicates.reset(lobby_code)
 
     def submit_guess(self, lobby_code, player, guess):
         game = self.games.get(lobby_code)
         if not game:
             return False
         if player in game["players"] and player not in game["guesses"]:
+            duplicate_of = self.duplicates.find(lobby_code, guess)
+            if duplicate_of is not None:
+                # Merge into the earlier guess; its owners share the credit
+                guess = duplicate_of
+            else:
+                self.duplicates.add(lobby_code, guess)
             game["guesses"][player] = guess
             game["finished_submitting"].add(player)
             if guess not in game["votes"]:
                 game["votes"][guess] = set()
-            game["guess_to_player"][guess] = player
+            game["guess_to_player"].setdefault(guess, set()).add(player)
             return True
         return False
 
@@ -38,14 +61,31 @@ class EmojiTranslationGame:
             return False
         # All players except the host must submit guess
         players_to_submit = game["players"] - {game["host"]} if game["host"] else game["players"]
-        return game["finished_submitting"] == players_to_submit
+        return players_to_submit <= game["finished_submitting"]
 
     def get_all_guesses(self, lobby_code):
         game = self.games.get(lobby_code)
         if not game:
             return []
         # Return all guesses submitted sorted alphabetically
-        return sorted(game["guesses"].values())
+        return sorted(set(game["guesses"].values()))
+
+    def auto_score_round(self, lobby_code):
+        """
+        Score every guess against the prompt's emoji keywords in one batch and award
+        partial credit. Runs once per round; later calls return the stored similarities.
+        """
+        game = self.games.get(lobby_code)
+        if not game:
+            return {}
+        if game["similarity"]:
+            return game["similarity"]
+        similarity = self.emoji_index.score_guesses(game["emoji_prompt"], game["guesses"])
+        for player, value in similarity.items():
+            if player in game["scores"]:
+                game["scores"][player] += round(value * AUTO_SCORE_POINTS)
+        game["similarity"] = similarity
+        return similarity
 
     def get_votes_for_guess(self, lobby_code, guess):
         game = self.games.get(lobby_code)
@@ -69,15 +109,16 @@ class EmojiTranslationGame:
         if guess not in game["votes"]:
             return False
         # Prevent voting on one's own guess
-        guess_owner = game["guess_to_player"].get(guess)
-        if guess_owner == player:
+        guess_owners = game["guess_to_player"].get(guess, set())
+        if player in guess_owners:
             return False
         # Cast vote
         game["votes"][guess].add(player)
 
-        # Owner of the guess gets a point when their guess is voted
-        if guess_owner and guess_owner != game.get("host"):
-            game["scores"][guess_owner] += 5
+        # Every owner of the guess gets points when it is voted
+        for owner in guess_owners:
+            if owner != game.get("host"):
+                game["scores"][owner] += 5
 
         return True
 
@@ -113,6 +154,7 @@ class EmojiTranslationGame:
             "details": {
                 "emoji_prompt": game["emoji_prompt"],
                 "guesses": game["guesses"].copy(),
+                "similarity": game["similarity"].copy(),
                 "votes": {guess: list(voters) for guess, voters in game["votes"].items()},
             },
         }
@@ -128,4 +170,18 @@ class EmojiTranslationGame:
             "finished_submitting": set(),
             "votes": {},
             "guess_to_player": {},
+            "similarity": {},
         })
+        self.duplicates.reset(lobby_code)
+
+    def remove_players(self, lobby_code, players):
+        """Players who left stop counting towards this round; their answers, votes and scores stay."""
+        game = self.games.get(lobby_code)
+        if not game:
+            return
+        game["players"].difference_update(players)
+
+    def release(self, lobby_code):
+        """Forget a lobby that has closed."""
+        self.games.pop(lobby_code, None)
+        self.duplicates.reset(lobby_code)
@@ -1,14 +1,18 @@
 # conundrum/games/obviously_lies.py
+from conundrum.utils.duplicates import DuplicateDetector
 
 
 class ObviouslyLiesGame:
     def __init__(self):
         # Stores game state keyed by lobby_code
         self.games = {}
+        # Near-duplicate lookup for submitted answers, per lobby
+        self.duplicates = DuplicateDetector()
 
     def start_round(self, lobby_code, question, correct_answer, players, host=None):
         # Exclude host from players eligible for scoring
-        eligible_players = set(players) - {host} if host else set(players)
+        # (kept in join order so score payloads serialize identically on replay)
+        eligible_players = [p for p in dict.fromkeys(players) if p != host]
         self.games[lobby_code] = {
             "question": question,
             "correct_answer": correct_answer,
@@ -16,22 +20,33 @@ class ObviouslyLiesGame:
             "false_answers": {},  # player -> false answer
             "finished_submitting": set(),
             "votes": {correct_answer: set()},  # answer -> set of players who voted for it
-            "answer_to_player": {correct_answer: None},  # answer -> player who submitted (None for correct answer)
+            "answer_to_player": {correct_answer: set()},  # answer -> players who submitted it (empty for correct answer)
             "scores": {player: 0 for player in eligible_players},  # only non-host players score
             "host": host,  # remember the host
         }
+        self.duplicates.reset(lobby_code)
+        self.duplicates.add(lobby_code, correct_answer)
 
     def submit_false_answer(self, lobby_code, player, false_answer):
         game = self.games.get(lobby_code)
         if not game:
             return False
         if player in game["players"] and player not in game["false_answers"]:
+            duplicate_of = self.duplicates.find(lobby_code, false_answer)
+            # A copy of the truth would let its owner farm points off correct votes
+            if duplicate_of == game["correct_answer"]:
+                return False
+            if duplicate_of is not None:
+                # Merge into the earlier lie; its owners share the credit
+                false_answer = duplicate_of
+            else:
+                self.duplicates.add(lobby_code, false_answer)
             game["false_answers"][player] = false_answer
             game["finished_submitting"].add(player)
             if false_answer not in game["votes"]:
                 game["votes"][false_answer] = set()
-            # Track which player submitted which answer
-            game["answer_to_player"][false_answer] = player
+            # Track which players submitted which answer
+            game["answer_to_player"].setdefault(false_answer, set()).add(player)
             return True
         return False
 
@@ -39,7 +54,7 @@ class ObviouslyLiesGame:
         game = self.games.get(lobby_code)
         if not game:
             return False
-        return game["finished_submitting"] == game["players"]
+        return game["players"] <= game["finished_submitting"]
 
     def get_all_answers(self, lobby_code):
         game = self.games.get(lobby_code)
@@ -48,8 +63,8 @@ class ObviouslyLiesGame:
         for ans in game["false_answers"].values():
             if ans not in game["votes"]:
                 game["votes"][ans] = set()
-        result = list(game["false_answers"].values())
-        result.append(game["correct_answer"])
+        result = set(game["false_answers"].values())
+        result.add(game["correct_answer"])
         return sorted(result)
 
     def get_votes_for_answer(self, lobby_code, answer):
@@ -75,16 +90,17 @@ class ObviouslyLiesGame:
         if answer not in game["votes"]:
             return False
         # Prevent voting on one's own false answer
-        answer_owner = game["answer_to_player"].get(answer)
-        if answer_owner == player:
+        answer_owners = game["answer_to_player"].get(answer, set())
+        if player in answer_owners:
             return False
         # Cast the vote
         game["votes"][answer].add(player)
 
         # Update scores:
-        # If voted a false answer, owner of false answer gets a point (if not host)
-        if answer_owner is not None and answer_owner != game.get("host"):
-            game["scores"][answer_owner] += 4
+        # If voted a false answer, every owner of that false answer gets points (if not host)
+        for owner in answer_owners:
+            if owner != game.get("host"):
+                game["scores"][owner] += 4
         # If voted the correct answer, voter gets a point (if not host)
         if answer == game["correct_answer"] and player != game.get("host"):
             game["scores"][player] += 5
@@ -139,5 +155,19 @@ class ObviouslyLiesGame:
             "false_answers": {},
             "finished_submitting": set(),
             "votes": {game["correct_answer"]: set()},
-            "answer_to_player": {game["correct_answer"]: None},
+            "answer_to_player": {game["correct_answer"]: set()},
         })
+        self.duplicates.reset(lobby_code)
+        self.duplicates.add(lobby_code, game["correct_answer"])
+
+    def remove_players(self, lobby_code, players):
+        """Players who left stop counting towards this round; their answers, votes and scores stay."""
+        game = self.games.get(lobby_code)
+        if not game:
+            return
+        game["players"].difference_update(players)
+
+    def release(self, lobby_code):
+        """Forget a lobby that has closed."""
+        self.games.pop(lobby_code, None)
+        self.duplicates.reset(lobby_code)
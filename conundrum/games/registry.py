@@ -0,0 +1,175 @@
+# conundrum/games/registry.py
+"""
+Game mode registry.
+
+Each mode is described by a GameMode: where its manager class lives, the
+socket events it answers to, the payload keys it uses and which manager
+methods do the work. socket.py registers one generic handler per event from
+this table, so a new mode is a new entry here plus its manager module.
+
+Manager modules are imported on first use, so modes nobody plays cost nothing
+at startup.
+"""
+import importlib
+from typing import Dict, Optional, Tuple
+
+
+class GameMode:
+    def __init__(
+        self,
+        name: str,
+        manager_path: str,
+        start_fields: Tuple[str, ...],
+        start_error: str,
+        prompt_key: str,
+        submit_event: str,
+        submit_field: str,
+        submit_method: str,
+        submit_error: str,
+        submitted_event: str,
+        submitted_method: str,
+        all_submitted_method: str,
+        all_options_method: str,
+        reveal_event: str,
+        reveal_key: str,
+        truth_key: Optional[str] = None,
+        prepare_method: Optional[str] = None,
+        prepare_error: Optional[str] = None,
+        auto_score_method: Optional[str] = None,
+        uses_prompt_bank: bool = False,
+    ):
+        self.name = name
+        # "package.module:ClassName", imported the first time the mode is played
+        self.manager_path = manager_path
+
+        # start round: data keys passed (in order) to manager.start_round
+        self.start_event = f"{name}_start_round"
+        self.start_fields = start_fields
+        self.start_error = start_error
+        self.round_started_event = f"{name}_round_started"
+        self.prompt_key = prompt_key
+        # optional manager method that validates/normalizes the first start field (None = reject)
+        self.prepare_method = prepare_method
+        self.prepare_error = prepare_error
+        # games state key holding the real answer, shown alongside the fakes
+        self.truth_key = truth_key
+        # empty start fields are filled from the shared prompt bank / question pack
+        self.uses_prompt_bank = uses_prompt_bank
+
+        # submissions
+        self.submit_event = submit_event
+        self.submit_field = submit_field
+        self.submit_method = submit_method
+        self.submit_error = submit_error
+        self.submitted_event = submitted_event
+        self.submitted_method = submitted_method
+        self.all_submitted_method = all_submitted_method
+        self.all_options_method = all_options_method
+        self.own_event = f"player_own_{reveal_key}"
+        # optional manager method scoring the round as soon as every submission is in
+        self.auto_score_method = auto_score_method
+
+        # reveal + voting
+        self.reveal_event = reveal_event
+        self.reveal_key = reveal_key
+        self.vote_event = f"{name}_vote"
+
+        self._manager = None
+
+    def is_loaded(self) -> bool:
+        return self._manager is not None
+
+    @property
+    def manager(self):
+        """The mode's single manager instance, importing its module on first access."""
+        if self._manager is None:
+            module_name, class_name = self.manager_path.split(":")
+            self._manager = getattr(importlib.import_module(module_name), class_name)()
+        return self._manager
+
+
+MODES: Dict[str, GameMode] = {
+    mode.name: mode
+    for mode in (
+        GameMode(
+            name="bad_advice_hotline",
+            manager_path="conundrum.games.bad_advice_hotline:BadAdviceHotlineGame",
+            start_fields=("question",),
+            start_error="Question is required.",
+            prompt_key="question",
+            submit_event="bad_advice_hotline_submit_bad_advice",
+            submit_field="badAdvice",
+            submit_method="submit_bad_advice",
+            submit_error="Failed to submit bad advice.",
+            submitted_event="bad_advice_hotline_bad_advice_submitted",
+            submitted_method="get_submitted_bad_advice",
+            all_submitted_method="all_bad_advice_submitted",
+            all_options_method="get_all_bad_advice_answers",
+            reveal_event="bad_advice_hotline_all_answers",
+            reveal_key="answers",
+            uses_prompt_bank=True,
+        ),
+        GameMode(
+            name="obviously_lies",
+            manager_path="conundrum.games.obviously_lies:ObviouslyLiesGame",
+            start_fields=("question", "correctAnswer"),
+            start_error="Question and answer required.",
+            prompt_key="question",
+            submit_event="obviously_lies_submit_false_answer",
+            submit_field="falseAnswer",
+            submit_method="submit_false_answer",
+            submit_error="Failed to submit false answer. It may be too close to the real answer.",
+            submitted_event="obviously_lies_false_answer_submitted",
+            submitted_method="get_submitted_false_answers",
+            all_submitted_method="all_false_submitted",
+            all_options_method="get_all_answers",
+            reveal_event="obviously_lies_all_answers",
+            reveal_key="answers",
+            truth_key="correct_answer",
+            uses_prompt_bank=True,
+        ),
+        GameMode(
+            name="reverse_guessing",
+            manager_path="conundrum.games.reverse_guessing:ReverseGuessingGame",
+            start_fields=("answer", "correctQuestion"),
+            start_error="Answer and correct question required.",
+            prompt_key="answer",
+            submit_event="reverse_guessing_submit_question",
+            submit_field="guessedQuestion",
+            submit_method="submit_question",
+            submit_error="Failed to submit question. It may be too close to the real question.",
+            submitted_event="reverse_guessing_question_submitted",
+            submitted_method="get_submitted_questions",
+            all_submitted_method="all_questions_submitted",
+            all_options_method="get_all_questions",
+            reveal_event="reverse_guessing_all_questions",
+            reveal_key="questions",
+            truth_key="correct_question",
+            uses_prompt_bank=True,
+        ),
+        GameMode(
+            name="emoji_translation",
+            manager_path="conundrum.games.emoji_translation:EmojiTranslationGame",
+            start_fields=("emojiPrompt",),
+            start_error="Emoji prompt is required.",
+            prompt_key="emoji_prompt",
+            prepare_method="prepare_prompt",
+            prepare_error="Emoji prompt must contain only emoji.",
+            submit_event="emoji_translation_submit_guess",
+            submit_field="guess",
+            submit_method="submit_guess",
+            submit_error="Failed to submit guess.",
+            submitted_event="emoji_translation_guess_submitted",
+            submitted_method="get_submitted_guesses",
+            all_submitted_method="all_guesses_submitted",
+            all_options_method="get_all_guesses",
+            reveal_event="emoji_translation_all_guesses",
+            reveal_key="guesses",
+            auto_score_method="auto_score_round",
+        ),
+    )
+}
+
+
+def get_mode(name) -> Optional[GameMode]:
+    return MODES.get(name)
@@ -1,13 +1,18 @@
 # conundrum/games/reverse_guessing.py
+from conundrum.utils.duplicates import DuplicateDetector
+
 
 class ReverseGuessingGame:
     def __init__(self):
         # Store game state keyed by lobby_code
         self.games = {}
+        # Near-duplicate lookup for submitted questions, per lobby
+        self.duplicates = DuplicateDetector()
 
     def start_round(self, lobby_code, answer, correct_question, players, host=None):
         # Exclude host from players eligible for scoring
-        eligible_players = set(players) - {host} if host else set(players)
+        # (kept in join order so score payloads serialize identically on replay)
+        eligible_players = [p for p in dict.fromkeys(players) if p != host]
         self.games[lobby_code] = {
             "answer": answer,  # host-provided answer
             "correct_question": correct_question,  # host-provided correct question
@@ -15,22 +20,33 @@ class ReverseGuessingGame:
             "submitted_questions": {},  
             "finished_submitting": set(),
             "votes": {correct_question: set()},  
-            "question_to_player": {correct_question: None},  
+            "question_to_player": {correct_question: set()},  # question -> players who submitted it
             "scores": {player: 0 for player in eligible_players},
             "host": host,
         }
+        self.duplicates.reset(lobby_code)
+        self.duplicates.add(lobby_code, correct_question)
 
     def submit_question(self, lobby_code, player, guessed_question):
         game = self.games.get(lobby_code)
         if not game:
             return False
         if player in game["players"] and player not in game["submitted_questions"]:
+            duplicate_of = self.duplicates.find(lobby_code, guessed_question)
+            # A copy of the correct question would collide with it in the vote
+            if duplicate_of == game["correct_question"]:
+                return False
+            if duplicate_of is not None:
+                # Merge into the earlier question; its owners share the credit
+                guessed_question = duplicate_of
+            else:
+                self.duplicates.add(lobby_code, guessed_question)
             game["submitted_questions"][player] = guessed_question
             game["finished_submitting"].add(player)
             if guessed_question not in game["votes"]:
                 game["votes"][guessed_question] = set()
-            # Track player who submitted question
-            game["question_to_player"][guessed_question] = player
+            # Track players who submitted question
+            game["question_to_player"].setdefault(guessed_question, set()).add(player)
             return True
         return False
 
@@ -38,7 +54,7 @@ class ReverseGuessingGame:
         game = self.games.get(lobby_code)
         if not game:
             return False
-        return game["finished_submitting"] == game["players"]
+        return game["players"] <= game["finished_submitting"]
 
     def get_all_questions(self, lobby_code):
         game = self.games.get(lobby_code)
@@ -47,8 +63,8 @@ class ReverseGuessingGame:
         for ques in game["submitted_questions"].values():
             if ques not in game["votes"]:
                 game["votes"][ques] = set()
-        result = list(game["submitted_questions"].values())
-        result.append(game["correct_question"])
+        result = set(game["submitted_questions"].values())
+        result.add(game["correct_question"])
         return sorted(result)
 
     def get_votes_for_question(self, lobby_code, question):
@@ -69,16 +85,17 @@ class ReverseGuessingGame:
         if question not in game["votes"]:
             return False
         # Cannot vote for own submitted question
-        question_owner = game["question_to_player"].get(question)
-        if question_owner == player:
+        question_owners = game["question_to_player"].get(question, set())
+        if player in question_owners:
             return False
         # Vote
         game["votes"][question].add(player)
 
         # Score updates:
-        # If voted on a submitted question, the submitter gains a point (if not host)
-        if question_owner is not None and question_owner != game.get("host"):
-            game["scores"][question_owner] += 4
+        # If voted on a submitted question, every submitter gains points (if not host)
+        for owner in question_owners:
+            if owner != game.get("host"):
+                game["scores"][owner] += 4
         # If voted on the correct question, the voter gains a point (if not host)
         if question == game["correct_question"] and player != game.get("host"):
             game["scores"][player] += 5
@@ -126,5 +143,19 @@ class ReverseGuessingGame:
             "submitted_questions": {},
             "finished_submitting": set(),
             "votes": {game["correct_question"]: set()},
-            "question_to_player": {game["correct_question"]: None},
+            "question_to_player": {game["correct_question"]: set()},
         })
+        self.duplicates.reset(lobby_code)
+        self.duplicates.add(lobby_code, game["correct_question"])
+
+    def remove_players(self, lobby_code, players):
+        """Players who left stop counting towards this round; their answers, votes and scores stay."""
+        game = self.games.get(lobby_code)
+        if not game:
+            return
+        game["players"].difference_update(players)
+
+    def release(self, lobby_code):
+        """Forget a lobby that has closed."""
+        self.games.pop(lobby_code, None)
+        self.duplicates.reset(lobby_code)
@@ -1,22 +1,22 @@
 # conundrum/games/routes.py
-from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify
-from conundrum import socket as socket_module  
+from flask import Blueprint, Response, render_template, session, redirect, url_for, request, jsonify
 
-# Import game classes
-from conundrum.games.obviously_lies import ObviouslyLiesGame
 from conundrum.utils.profanity_filter import ProfanityFilter
+from conundrum.utils.emoji_index import emoji_index
 
 # Import main routes blueprint for redirects
 from conundrum.routes import routes  
-from conundrum.utils.rounds import round_manager
-from engine import lobbies
+from conundrum.utils.event_log import event_log
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.lobby_codes import code_allocator
+from conundrum.utils.lobby_sync import pull_lobby, push_lobby
+from conundrum.utils.state_store import state_store
+from conundrum.utils.round_manager import round_manager
+from conundrum.utils.sharding import shard
 
 # Blueprint
 games_bp = Blueprint("games", __name__, url_prefix="/games")
 
-# Game Instances
-lies_game = ObviouslyLiesGame()
-
 # Profanity Filter Instance
 pf = ProfanityFilter()
 
@@ -30,6 +30,10 @@ def lobby():
     if not username or not lobby_code:
         return redirect(url_for("routes.home"))  # routes.home is in main routes.py
 
+    owner = shard.owner_url(lobby_code, lobby_code in lobby_registry)
+    if owner:
+        return redirect(owner + request.full_path)
+
     session["username"] = username
     session["lobby"] = lobby_code
 
@@ -38,15 +42,18 @@ def lobby():
     game_mode = None
     lobby_data = {}
 
-    if lobby_code in socket_module.lobbies:
-        lobby = socket_module.lobbies[lobby_code]
-        if lobby.get("host") == username:
+    pull_lobby(lobby_code)
+    lobby = lobby_registry.get(lobby_code)
+    if lobby:
+        if lobby.host == username:
             is_host = True
-        game_mode = lobby.get("game_mode")  # may be None until host selects
+        game_mode = lobby.game_mode  # may be None until host selects
+        rounds = round_manager.get_state(lobby_code) or {}
         lobby_data = {
-            "max_rounds": lobby.get("max_rounds"),
-            "current_round": lobby.get("current_round"),
-            "game_active": lobby.get("game_active"),
+            "players_count": len(lobby.players),
+            "max_rounds": rounds.get("max_rounds"),
+            "current_round": rounds.get("current_round"),
+            "game_active": bool(rounds.get("current_round")) and not rounds.get("finished"),
         }
 
     return render_template(
@@ -71,6 +78,10 @@ def play():
     if not username or not lobby_code or not game_mode:
         return redirect(url_for("routes.home"))
 
+    owner = shard.owner_url(lobby_code, lobby_code in lobby_registry)
+    if owner:
+        return redirect(owner + request.full_path)
+
     # Save session info
     session["username"] = username
     session["lobby"] = lobby_code
@@ -85,10 +96,50 @@ def play():
     }
 
     if game_mode in valid_modes:
-        return render_template(valid_modes[game_mode], username=username, lobby_code=lobby_code)
+        return render_template(
+            valid_modes[game_mode],
+            username=username,
+            lobby_code=lobby_code,
+            emoji_data_url=url_for("games.emoji_data", fingerprint=emoji_index.fingerprint),
+        )
     else:
         return redirect(url_for("games.lobby", username=username, lobby=lobby_code))
 
+# --------------------------
+# Emoji Data Asset
+# --------------------------
+@games_bp.route("/emoji/data.<fingerprint>.json")
+def emoji_data(fingerprint):
+    """Serve the emoji index as an immutable asset; the URL changes whenever the data does."""
+    if fingerprint != emoji_index.fingerprint:
+        return redirect(url_for("games.emoji_data", fingerprint=emoji_index.fingerprint))
+
+    resp = Response(emoji_index.payload, mimetype="application/json")
+    resp.set_etag(emoji_index.fingerprint)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 31536000
+    resp.cache_control.immutable = True
+    return resp.make_conditional(request)
+
+# --------------------------
+# Emoji Translate API
+# --------------------------
+@games_bp.route("/emoji/translate", methods=["POST"])
+def emoji_translate():
+    """Translate keyword phrases to emoji and report whether the result is a valid prompt."""
+    data = request.get_json(silent=True) or {}
+    text = data.get("text", "") if isinstance(data, dict) else None
+    if not isinstance(text, str):
+        return jsonify({"success": False, "error": "text must be a string"}), 400
+
+    translated = emoji_index.translate(text)
+
+    return jsonify({
+        "original": text,
+        "translated": translated,
+        "prompt": emoji_index.canonicalize_prompt(translated),
+    })
+
 # --------------------------
 # Profanity Check API
 # --------------------------
@@ -115,19 +166,23 @@ def create_lobby():
     max_players = data.get("max_players", 4)
     total_rounds = data.get("total_rounds", 5)  # 👈 new field
 
-    # Create the lobby
-    lobbies[lobby_id] = {
-        "host": host,
-        "players": [host],
-        "max_players": max_players,
-        "game_mode": None,
-        "current_round": 1,
-        "total_rounds": total_rounds,
-        "game_active": False,
-    }
+    if not lobby_id or not host:
+        return jsonify({"success": False, "error": "lobby_id and username required"}), 400
+    owner = shard.owner_url(lobby_id, lobby_id in lobby_registry)
+    if owner:
+        # 307 keeps the POST body
+        return redirect(owner + request.full_path, code=307)
+    if lobby_id in lobby_registry or state_store.exists(lobby_id):
+        return jsonify({"success": False, "error": "Lobby already exists"}), 409
+
+    # Create the lobby (same registry + round manager the socket handlers use)
+    lobby_registry.create(lobby_id, host, max_players)
+    code_allocator.claim(lobby_id)
 
     # Setup round manager 👇
-    round_manager.setup_lobby(lobby_id, total_rounds=total_rounds)
+    round_manager.register_lobby(lobby_id, max_rounds=total_rounds)
+    push_lobby(lobby_id)
+    event_log.record(lobby_id)
 
     return jsonify({"success": True, "lobby_id": lobby_id})
 
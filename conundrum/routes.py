@@ -1,5 +1,15 @@
 # conundrum/routes.py
-from flask import Blueprint, render_template
+import hmac
+import time
+from functools import wraps
+
+from flask import Blueprint, Response, abort, current_app, jsonify, redirect, render_template, request
+
+from conundrum import socketio
+from conundrum.utils.metrics import metrics, CONTENT_TYPE
+from conundrum.utils.profiler import profiler
+from conundrum.utils.sharding import shard
+from conundrum.utils.trace import lobby_traces
 
 routes = Blueprint("routes", __name__)
 
@@ -7,3 +17,64 @@ routes = Blueprint("routes", __name__)
 def home():
     """Render the homepage."""
     return render_template("home.html")
+
+@routes.route("/metrics")
+def metrics_page():
+    """Prometheus scrape endpoint (this worker's numbers only)."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+# --------------------------
+# Admin
+# --------------------------
+def admin_only(view):
+    """Require the X-Admin-Token header; without a token configured, admin routes don't exist."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get("ADMIN_TOKEN")
+        if not expected:
+            abort(404)
+        given = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(given.encode(), expected.encode()):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+@routes.route("/admin/profile")
+@admin_only
+def profile():
+    """
+    Sample this worker for ?seconds=N (default 10) and return the stacks.
+    ?events=a,b keeps only samples inside those socket handlers; ?format=pstats
+    returns a pstats file instead of collapsed stacks.
+    """
+    try:
+        seconds = float(request.args.get("seconds", 10))
+    except ValueError:
+        abort(400)
+    events = [e for e in request.args.get("events", "").split(",") if e]
+    result = profiler.profile(seconds, events, sleep=socketio.sleep)
+    if result is None:
+        return Response("A profile is already running on this worker.\n", status=409, mimetype="text/plain")
+
+    headers = {
+        "X-Profile-Samples": str(result.total),
+        "X-Profile-Skipped": str(result.skipped),
+        "X-Profile-Seconds": f"{result.duration:.2f}",
+    }
+    if request.args.get("format") == "pstats":
+        name = time.strftime("conundrum-%Y%m%d-%H%M%S.pstats", time.localtime(result.started))
+        headers["Content-Disposition"] = f'attachment; filename="{name}"'
+        return Response(result.pstats(), mimetype="application/octet-stream", headers=headers)
+    return Response(result.collapsed(), mimetype="text/plain", headers=headers)
+
+@routes.route("/admin/trace/<lobby_code>")
+@admin_only
+def trace(lobby_code):
+    """The lobby's last socket events, oldest first (kept for a while after it closes)."""
+    owner = shard.owner_url(lobby_code, lobby_code in lobby_traces)
+    if owner:
+        return redirect(owner + request.full_path)
+    dump = lobby_traces.dump(lobby_code)
+    if dump is None:
+        abort(404)
+    return jsonify(dump)
@@ -1,63 +1,202 @@
 # conundrum/socket.py
 from flask_socketio import emit, join_room
-from flask import request
+from flask import g, has_app_context, request
 from . import socketio
-import random
-import string
-from conundrum.games.obviously_lies import ObviouslyLiesGame
-from conundrum.games.reverse_guessing import ReverseGuessingGame
-from conundrum.games.bad_advice_hotline import BadAdviceHotlineGame
-from conundrum.games.emoji_translation import EmojiTranslationGame
+from functools import wraps
+import time
+from conundrum.games.registry import MODES, get_mode
 from conundrum.utils.profanity_filter import ProfanityFilter
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.lobby_codes import code_allocator
+from conundrum.utils.lobby_sync import install_round_handler, lobby_locked, pull_lobby, push_lobby, forget_lobby, shares_lobbies
+from conundrum.utils.presence import presence, REAP_INTERVAL
+from conundrum.utils.rate_limit import rate_limiter, MODE_COSTS
 from conundrum.utils.round_manager import round_manager
+from conundrum.utils.rng import lobby_rng
+from conundrum.utils.prompt_bank import prompt_bank, PROMPT_FILES
+from conundrum.utils.broadcast import room_batcher
+from conundrum.utils.event_log import event_log
+from conundrum.utils.metrics import metrics
+from conundrum.utils.sharding import shard, RING_POLL_INTERVAL
+from conundrum.utils.state_store import state_store, LobbyBusy
+from conundrum.utils.timer_wheel import timer_wheel
+from conundrum.utils.trace import lobby_traces
+from conundrum.utils.watchdog import lag_watchdog
+from conundrum.utils.subsample import assign_subsets, LARGE_PARTY_MIN_VOTERS, LARGE_PARTY_SAMPLE_SIZE
 
 
-# Lobby state: lobby_code -> lobby data
-lobbies = {}
+# Global profanity filter (load from JSON if exists)
+pf = ProfanityFilter.from_json("data/profanity.json")
 
 
-# Game manager instances
-obviously_lies_game_manager = ObviouslyLiesGame()
-reverse_guessing_game_manager = ReverseGuessingGame()
-bad_advice_hotline_game_manager = BadAdviceHotlineGame()
-emoji_translation_game_manager = EmojiTranslationGame()
+# Shared read-only prompt bank (loaded once, drawn from per lobby); question
+# packs are attached from the configured pack directory in create_app
+prompt_bank.load_files(PROMPT_FILES)
 
 
-# Track votes per lobby: { lobby_code: { player: choice, ... }, ... }
-lobby_votes = {}
+# --- Metrics ---
+# Handlers are wrapped by metrics.instrumented (outermost, so throttled and bounced
+# events are counted too); these gauges are read from the live state on each scrape.
 
 
-# Global profanity filter (load from JSON if exists)
-pf = ProfanityFilter.from_json("data/profanity.json")
+def _players_by_state():
+    counts = {"connected": 0, "away": 0}
+    for lobby in lobby_registry.lobbies.values():
+        for player in lobby.players:
+            counts["away" if presence.is_away(lobby.code, player) else "connected"] += 1
+    return counts
+
+
+def _active_rounds_by_mode():
+    counts = {name: 0 for name in MODES}
+    for lobby_code, state in round_manager.state.items():
+        lobby = lobby_registry.get(lobby_code)
+        if lobby and lobby.game_mode in counts and state["round_active"]:
+            counts[lobby.game_mode] += 1
+    return counts
+
+
+def _rate_limited_events():
+    return {
+        (event, outcome): count
+        for event, counter in rate_limiter.stats()["events"].items()
+        for outcome, count in counter.items()
+    }
+
+
+metrics.count_emits(socketio)
+metrics.gauge("conundrum_lobbies", "Lobbies held by this worker.", lambda: len(lobby_registry))
+metrics.gauge("conundrum_players", "Lobby members, by connection state.", _players_by_state, labels=("state",))
+metrics.gauge("conundrum_active_rounds", "Rounds in progress, by game mode.", _active_rounds_by_mode, labels=("mode",))
+metrics.gauge(
+    "conundrum_rate_limited_events_total", "Rate-limited events, by outcome.",
+    _rate_limited_events, labels=("event", "outcome"), kind="counter",
+)
+metrics.gauge("conundrum_lobby_codes_in_use", "Lobby codes issued and not yet released.", lambda: code_allocator.stats()["in_use"])
+metrics.gauge("conundrum_lobby_codes_quarantined", "Released lobby codes waiting out quarantine.", lambda: code_allocator.stats()["quarantined"])
+metrics.gauge("conundrum_phase_timers_armed", "Phase deadlines waiting to fire.", lambda: len(timer_wheel.timers))
+metrics.gauge("conundrum_phase_timer_lag_seconds", "Worst lateness of a fired phase deadline.", lambda: timer_wheel.lag_max)
+metrics.gauge("conundrum_event_loop_lag_max_seconds", "Worst hub scheduling lag seen by the heartbeat.", lambda: lag_watchdog.lag_max)
+metrics.gauge(
+    "conundrum_event_loop_stalls_total", "Times the hub was blocked past the lag threshold, by socket event in flight.",
+    lambda: dict(lag_watchdog.stalls), labels=("event",), kind="counter",
+)
+
+
+def _code_available(lobby_code):
+    # the allocator only offers this worker's share of the codes (see watch_ring)
+    return lobby_code not in lobby_registry and not state_store.exists(lobby_code)
 
 
 def generate_lobby_code():
-    return "".join(random.choices(string.ascii_uppercase + string.digits, k=4))
+    """A fresh lobby code in O(1); RuntimeError if none is left."""
+    return code_allocator.allocate(_code_available)
 
 
-def _get_expected_voter_count(lobby_code):
+def _get_expected_voter_count(lobby):
     """
     Compute number of expected voters for a lobby.
     Current logic: host cannot vote, so expected = number of players - 1.
     If you later allow host to vote, adjust this function.
     """
-    players = lobbies.get(lobby_code, {}).get("players", [])
-    return max(0, len(players) - 1)
+    return max(0, len(lobby.players) - 1)
+
+
+def _voting_complete(lobby):
+    """True once every current voter has voted (votes from players who left still count for scoring)."""
+    return _get_expected_voter_count(lobby) > 0 and all(p in lobby.votes for p in lobby.voters())
+
+
+def _reveal_options(lobby, options):
+    """
+    Number the answers being revealed (ID = list position) and return them for the reveal.
+    Votes already cast against an earlier reveal are carried over to the new IDs.
+
+    lobby.options = {"options": [text, ...], "tallies": [int, ...]}; an answer's ID is its
+    position in "options", and votes and tallies only carry IDs. In a large party it also
+    holds "offered": { player: set of answer IDs that player was shown }.
+    """
+    index = {text: i for i, text in enumerate(options)}
+    tallies = [0] * len(options)
+    previous = lobby.options
+    votes = lobby.votes
+    for player, old_id in list(votes.items()):
+        new_id = index.get(previous["options"][old_id]) if previous else None
+        if new_id is None:
+            del votes[player]
+            continue
+        votes[player] = new_id
+        tallies[new_id] += 1
+    lobby.options = {"options": options, "tallies": tallies}
+    return options
+
+
+def _resolve_vote(lobby, answer_id, player=None):
+    """Map a voted answer ID back to its text; None if the ID is not on offer to this player."""
+    revealed = lobby.options
+    if not revealed or type(answer_id) is not int or not 0 <= answer_id < len(revealed["options"]):
+        return None
+    offered = revealed.get("offered")
+    if offered is not None and answer_id not in offered.get(player, ()):
+        return None
+    return revealed["options"][answer_id]
+
+
+def _not_a_member():
+    """Reject an event from a socket that has not joined the lobby it names."""
+    emit("error_message", {"message": "You are not in this lobby."}, room=request.sid)
+
+
+def _is_large_party(lobby):
+    return len(lobby.voters()) >= LARGE_PARTY_MIN_VOTERS
+
+
+def _submission_room(lobby):
+    """Where to echo a submission: the whole lobby, or just the submitter in a large party."""
+    return request.sid if _is_large_party(lobby) else lobby.code
+
+
+def _emit_reveal(lobby, event, key, options, submissions, truth=None):
+    """
+    Reveal the answers for voting. Normally the whole list goes to the room; in a large
+    party each voter gets a balanced subset of LARGE_PARTY_SAMPLE_SIZE answers (never
+    their own, always the truth) and only the host sees everything.
+    submissions maps player -> the answer text they submitted.
+    """
+    _reveal_options(lobby, options)
+    if not _is_large_party(lobby):
+        socketio.emit(event, {key: options}, to=lobby.code)
+        return
 
+    index = {text: i for i, text in enumerate(options)}
+    own_ids = {p: {index[text]} for p, text in submissions.items() if text in index}
+    subsets = assign_subsets(len(options), lobby.voters(), own_ids, LARGE_PARTY_SAMPLE_SIZE, index.get(truth))
+    lobby.options["offered"] = {p: set(ids) for p, ids in subsets.items()}
 
-def _process_end_round_for_manager(lobby_code, manager):
+    for player, ids in subsets.items():
+        if player in lobby.sids:
+            socketio.emit(event, {key: [options[i] for i in ids], "answerIds": ids}, to=lobby.sids[player])
+    if lobby.host in lobby.sids:
+        socketio.emit(event, {key: options}, to=lobby.sids[lobby.host])
+
+
+def _process_end_round_for_manager(lobby, manager):
     """
     Centralized end-of-round flow:
       - calls round_manager.end_round (which will invoke handler.on_round_end and handler.reset_round)
-      - emits game_over or round_ended and cleans up lobby_votes
+      - emits game_over or round_ended and clears the lobby's votes
       - unregisters the lobby from round_manager when game finishes
       - resets per-round state in the game manager
     """
+    lobby_code = lobby.code
+    timer_wheel.cancel(lobby_code)
+    # votes/scores still waiting in the batch window go out before the phase change
+    room_batcher.flush(lobby_code)
     try:
         res = round_manager.end_round(lobby_code)
     except KeyError:
         # not registered — report and stop
-        emit("error_message", {"message": "Round manager not registered for lobby."}, room=lobby_code)
+        socketio.emit("error_message", {"message": "Round manager not registered for lobby."}, to=lobby_code)
         return
 
     if res.get("game_over"):
@@ -67,10 +206,11 @@ def _process_end_round_for_manager(lobby_code, manager):
         except Exception:
             scores = {}
 
-        emit("game_over", {"scores": scores}, room=lobby_code)
+        socketio.emit("game_over", {"scores": scores}, to=lobby_code)
 
         # cleanup: remove votes and unregister from round manager
-        lobby_votes.pop(lobby_code, None)
+        lobby.reset_votes()
+        room_batcher.release(lobby_code)
         try:
             round_manager.unregister_lobby(lobby_code)
         except Exception:
@@ -89,9 +229,9 @@ def _process_end_round_for_manager(lobby_code, manager):
         except Exception:
             pass
 
-        lobby_votes[lobby_code] = {}
+        lobby.reset_votes()
         next_round = res.get("next_round")
-        emit("round_ended", {"next_round": next_round}, room=lobby_code)
+        socketio.emit("round_ended", {"next_round": next_round}, to=lobby_code)
 
         # start next round (caller may rely on client to call start_round, but your current flow calls it)
         try:
@@ -100,10 +240,337 @@ def _process_end_round_for_manager(lobby_code, manager):
             pass
 
 
+# --- Phase deadlines ---
+# Each lobby has at most one deadline armed on the shared timer wheel: for
+# submissions once the round starts, for votes once answers are revealed.
+# A missed submission deadline reveals what came in (or ends the round if
+# nothing did); a missed voting deadline ends the round. The round state keeps
+# (phase, round, unix time due) so a restarted server can re-arm it.
+
+
+def _arm_phase(lobby_code, phase):
+    seconds = timer_wheel.phase_seconds.get(phase)
+    state = round_manager.get_state(lobby_code)
+    if state:
+        state.pop("deadline", None)
+    if not seconds or not state:
+        timer_wheel.cancel(lobby_code)
+        return
+    state["deadline"] = (phase, state["current_round"], time.time() + seconds)
+    timer_wheel.arm(lobby_code, seconds, _phase_expired, lobby_code, state["current_round"], phase)
+
+
+def _rearm(lobby_code, state, now) -> bool:
+    """Put a round's stored deadline on this worker's wheel (unless it is already there); True if armed."""
+    deadline = state.get("deadline")
+    if not deadline or not state["round_active"]:
+        return False
+    phase, round_no, due = deadline
+    if round_no != state["current_round"]:
+        # that round is over; the next one has not been started yet
+        return False
+    timer = timer_wheel.timers.get(lobby_code)
+    if timer is not None and timer.args == (lobby_code, round_no, phase):
+        return False
+    timer_wheel.arm(lobby_code, max(0.0, due - now), _phase_expired, lobby_code, round_no, phase)
+    return True
+
+
+def rearm_phases():
+    """After a warm restart: put the deadlines of rounds in flight back on the wheel with the time they had left."""
+    now = time.time()
+    return sum(_rearm(lobby_code, state, now) for lobby_code, state in round_manager.state.items())
+
+
+def _phase_expired(lobby_code, round_no, phase):
+    try:
+        with lobby_locked(lobby_code):
+            _end_phase(lobby_code, round_no, phase)
+    except LobbyBusy:
+        print(f"[Deadline] lobby {lobby_code} is busy; retrying its {phase} deadline")
+        timer_wheel.arm(lobby_code, 1.0, _phase_expired, lobby_code, round_no, phase)
+
+
+def _end_phase(lobby_code, round_no, phase):
+    pull_lobby(lobby_code)
+    lobby = lobby_registry.get(lobby_code)
+    state = round_manager.get_state(lobby_code)
+    game_mode = get_mode(lobby.game_mode) if lobby else None
+    if not game_mode or not state or not state["round_active"] or state["current_round"] != round_no:
+        return
+    if state.get("deadline", (phase, round_no))[:2] != (phase, round_no):
+        # the lobby moved on to another phase (possibly on another worker) since this was armed
+        return
+    manager = game_mode.manager
+    if not manager.games.get(lobby_code):
+        return
+    lobby_traces.record(lobby_code, f"{phase}_deadline")
+    if phase == "submit" and getattr(manager, game_mode.submitted_method)(lobby_code):
+        _reveal_submissions(lobby, game_mode, manager)
+    else:
+        _process_end_round_for_manager(lobby, manager)
+    push_lobby(lobby_code)
+    event_log.record(lobby_code)
+
+
+# --- Presence ---
+# A player whose socket closes keeps their seat for the reconnection grace window
+# (navigating from the lobby page to the game page is a reconnect). The reaper
+# then removes everyone whose window ran out, lobby by lobby, in one pass.
+
+_reaper_running = False
+
+
+@socketio.on("disconnect")
+@metrics.instrumented("disconnect")
+def handle_disconnect(*args):
+    sid = request.sid
+    rate_limiter.forget_sid(sid)
+    lobby_code = lobby_registry.by_sid.get(sid, (None, None))[0]
+    try:
+        with lobby_locked(lobby_code):
+            pull_lobby(lobby_code)
+            lobby, player = lobby_registry.unbind(sid)
+            if not lobby:
+                return
+            lobby_traces.record(lobby_code, "disconnect", player)
+            presence.disconnected(lobby_code, player)
+            push_lobby(lobby_code)
+    except LobbyBusy:
+        print(f"[Presence] lobby {lobby_code} stayed busy; dropped the disconnect of {sid}")
+        return
+    start_reaper()
+
+
+def start_reaper():
+    global _reaper_running
+    if not _reaper_running:
+        _reaper_running = True
+        socketio.start_background_task(_reap_forever)
+
+
+def _reap_forever():
+    while True:
+        socketio.sleep(REAP_INTERVAL)
+        try:
+            reap_departed()
+        except Exception as e:
+            print(f"[Reaper] failed: {e}")
+
+
+def reap_departed():
+    """Remove players whose grace window ran out and move their lobbies along."""
+    for lobby_code, players in presence.due().items():
+        try:
+            with lobby_locked(lobby_code):
+                pull_lobby(lobby_code)
+                # the pulled lobby still lists them as away
+                presence.forget(lobby_code, players)
+                lobby = lobby_registry.get(lobby_code)
+                if lobby:
+                    _remove_players(lobby, players)
+                    push_lobby(lobby_code)
+                    event_log.record(lobby_code)
+        except LobbyBusy:
+            # try again on a later pass
+            for player in players:
+                presence.disconnected(lobby_code, player)
+
+
+def _remove_players(lobby, players):
+    lobby_code = lobby.code
+    gone = [p for p in players if p in lobby and p not in lobby.sids]
+    if not gone:
+        return
+    for player in gone:
+        lobby_registry.remove_player(lobby, player)
+        lobby_traces.record(lobby_code, "grace_expired", player)
+
+    if not lobby.players:
+        _close_lobby(lobby)
+        return
+
+    if lobby.host not in lobby:
+        # host migration: the longest-standing player takes over
+        lobby.set_host(lobby.players[0])
+    socketio.emit("lobby_update", lobby.lobby_update(), to=lobby_code)
+
+    game_mode = get_mode(lobby.game_mode)
+    if not game_mode or not game_mode.manager.games.get(lobby_code):
+        return
+    manager = game_mode.manager
+    all_submitted = getattr(manager, game_mode.all_submitted_method)
+    was_waiting = not all_submitted(lobby_code)
+    manager.remove_players(lobby_code, gone)
+    if was_waiting and all_submitted(lobby_code):
+        # the last missing submissions belonged to players who left
+        _reveal_submissions(lobby, game_mode, manager)
+    elif lobby.votes and _voting_complete(lobby):
+        _process_end_round_for_manager(lobby, manager)
+
+
+def _close_lobby(lobby):
+    """Forget everything kept for a lobby nobody is left in."""
+    lobby_code = lobby.code
+    lobby_registry.remove(lobby_code)
+    for game_mode in MODES.values():
+        if game_mode.is_loaded():
+            game_mode.manager.release(lobby_code)
+    try:
+        round_manager.unregister_lobby(lobby_code)
+    except Exception:
+        pass
+    room_batcher.release(lobby_code)
+    rate_limiter.forget_lobby(lobby_code)
+    presence.forget_lobby(lobby_code)
+    prompt_bank.release(lobby_code)
+    lobby_rng.release(lobby_code)
+    code_allocator.release(lobby_code)
+    timer_wheel.cancel(lobby_code)
+    lobby_traces.close(lobby_code)
+
+
+# --- Shared state ---
+# With a shared state store (several workers), a handler works on a fresh copy
+# of its lobby and writes back what it changed. In-process, both are no-ops.
+# A phase deadline armed by another worker is armed here too once pulled (the
+# first worker to take the lobby's lock when it falls due ends the phase), and
+# the lobby's rate-limit bucket is charged only once it has been pulled.
+# With sharding, events for a lobby another worker owns are bounced there.
+# With the event log on, whatever a handler changed is logged once it returns.
+
+
+def synced(handler):
+    """Pull the event's lobby from the state store before the handler and push it after, holding its lock."""
+    @wraps(handler)
+    def wrapper(data):
+        lobby_code = data.get("lobbyCode") if isinstance(data, dict) else None
+        if not lobby_code:
+            return handler(data)
+        owner = shard.owner_url(lobby_code, lobby_code in lobby_registry)
+        if owner:
+            emit("lobby_moved", {"lobbyCode": lobby_code, "owner": owner}, room=request.sid)
+            return
+        if not state_store.shared and not event_log.enabled:
+            return handler(data)
+        try:
+            with lobby_locked(lobby_code):
+                pull_lobby(lobby_code)
+                try:
+                    if shares_lobbies():
+                        state = round_manager.get_state(lobby_code)
+                        if state:
+                            _rearm(lobby_code, state, time.time())
+                        if _lobby_throttled(lobby_code):
+                            return
+                    return handler(data)
+                finally:
+                    push_lobby(lobby_code)
+                    event_log.record(lobby_code)
+        except LobbyBusy:
+            emit("error_message", {"message": "The lobby is busy. Try again."}, room=request.sid)
+    return wrapper
+
+
+# --- Sharding ---
+# Workers re-read the ring file every RING_POLL_INTERVAL seconds and from then on
+# only issue codes from their new share. Lobbies whose owner changed are handed off through the state store: written out, their
+# clients told to reconnect to the new owner, and forgotten here. Without a
+# shared store they stay on this worker until they close.
+
+
+def watch_ring():
+    while True:
+        socketio.sleep(RING_POLL_INTERVAL)
+        try:
+            if shard.reload():
+                code_allocator.set_share(shard.code_share())
+                rebalance()
+        except Exception as e:
+            print(f"[Shard] rebalance failed: {e}")
+
+
+def rebalance():
+    """Hand off every lobby held here that the ring now gives to another worker."""
+    if not state_store.shared:
+        return
+    moved = [code for code in list(lobby_registry.lobbies) if not shard.owns(code)]
+    for lobby_code in moved:
+        _hand_off(lobby_registry.get(lobby_code))
+    if moved:
+        print(f"[Shard] handed off {len(moved)} lobbies")
+
+
+def _hand_off(lobby):
+    lobby_code = lobby.code
+    room_batcher.flush(lobby_code)
+    push_lobby(lobby_code, handoff=True)
+    forget_lobby(lobby_code)
+    socketio.emit("lobby_moved", {"lobbyCode": lobby_code, "owner": shard.owner_url(lobby_code)}, to=lobby_code)
+    _close_lobby(lobby)
+    event_log.record(lobby_code)
+
+
+# --- Rate limiting ---
+
+
+def _throttled(wait):
+    emit(
+        "error_message",
+        {"message": "You're doing that too fast. Slow down.", "throttled": True, "retryAfter": round(wait, 2)},
+        room=request.sid,
+    )
+
+
+def rate_limited(event):
+    """
+    Charge the event to the sender's token bucket, and to its lobby's if the sender
+    is a member of the lobby it names (so no socket can drain another lobby's
+    bucket); throttled events are dropped. When workers share lobbies, the lobby's
+    bucket lives in the store, so synced charges it after pulling the lobby.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(data):
+            lobby_code = data.get("lobbyCode") if isinstance(data, dict) else None
+            lobby, _ = lobby_registry.resolve(request.sid)
+            if lobby is None or lobby.code != lobby_code:
+                lobby = None
+            deferred = lobby is not None and shares_lobbies()
+            wait = rate_limiter.check(
+                request.sid,
+                lobby.code if lobby and not deferred else None,
+                event,
+                len(lobby.players) if lobby else 0,
+            )
+            if wait:
+                _throttled(wait)
+                return
+            if deferred:
+                g.lobby_charge = event
+            return handler(data)
+        return wrapper
+    return decorator
+
+
+def _lobby_throttled(lobby_code) -> bool:
+    """Charge the lobby's pulled bucket for an event rate_limited deferred; True if it was throttled."""
+    event = g.pop("lobby_charge", None) if has_app_context() else None
+    lobby = lobby_registry.get(lobby_code)
+    if not event or not lobby or lobby_registry.player_for(lobby, request.sid) is None:
+        return False
+    wait = rate_limiter.check_lobby(request.sid, lobby_code, event, len(lobby.players))
+    if wait:
+        _throttled(wait)
+    return bool(wait)
+
+
 # --- Lobby management ---
 
 
 @socketio.on("create_lobby")
+@metrics.instrumented("create_lobby")
+@rate_limited("create_lobby")
 def handle_create_lobby(data):
     username = data.get("username")
     try:
@@ -115,42 +582,48 @@ def handle_create_lobby(data):
         emit("error_message", {"message": "Username required."}, room=request.sid)
         return
 
-    lobby_code = generate_lobby_code()
-    while lobby_code in lobbies:
+    try:
         lobby_code = generate_lobby_code()
+    except RuntimeError:
+        emit("error_message", {"message": "No lobby codes available. Try again later."}, room=request.sid)
+        return
 
-    lobbies[lobby_code] = {
-        "host": username,
-        "players": [username],
-        "max_players": max_players,
-        "game_mode": None,
-    }
+    lobby = lobby_registry.create(lobby_code, username, max_players)
+    lobby_registry.bind(lobby, username, request.sid)
 
     max_rounds = int(data.get("maxRounds", 3))  # default 3 rounds
 
     round_manager.register_lobby(lobby_code, max_rounds=max_rounds)
+    # the request named no lobby, so metrics.instrumented cannot trace it
+    lobby_traces.record(lobby_code, "create_lobby", username)
+    push_lobby(lobby_code)
+    event_log.record(lobby_code)
 
     join_room(lobby_code)
 
     emit("lobby_created", {"lobbyCode": lobby_code, "username": username, "maxPlayers": max_players}, room=request.sid)
-    emit("lobby_update", {"host": username, "players": lobbies[lobby_code]["players"]}, room=lobby_code)
+    emit("lobby_update", lobby.lobby_update(), room=lobby_code)
 
 
 @socketio.on("join_lobby")
+@metrics.instrumented("join_lobby")
+@rate_limited("join_lobby")
+@synced
 def handle_join_lobby(data):
     username = data.get("username")
     lobby_code = data.get("lobbyCode")
 
-    if not username or not lobby_code or lobby_code not in lobbies:
+    lobby = lobby_registry.get(lobby_code)
+    if not username or not lobby:
         emit("error_message", {"message": "Invalid join request."}, room=request.sid)
         return
 
-    lobby = lobbies[lobby_code]
-    if username not in lobby["players"]:
-        if len(lobby["players"]) >= lobby["max_players"]:
-            emit("error_message", {"message": "Lobby is full."}, room=request.sid)
-            return
-        lobby["players"].append(username)
+    if not lobby.add(username):
+        emit("error_message", {"message": "Lobby is full."}, room=request.sid)
+        return
+    lobby_registry.bind(lobby, username, request.sid)
+    # back within the grace window: nothing to reap
+    presence.reconnected(lobby_code, username)
 
     join_room(lobby_code)
 
@@ -159,42 +632,56 @@ def handle_join_lobby(data):
         {
             "lobbyCode": lobby_code,
             "username": username,
-            "gameMode": lobby["game_mode"],
-            "players": lobby["players"],
+            "gameMode": lobby.game_mode,
+            "players": lobby.lobby_update()["players"],
         },
         room=request.sid,
     )
 
-    emit("lobby_update", {"host": lobby["host"], "players": lobby["players"]}, room=lobby_code)
+    emit("lobby_update", lobby.lobby_update(), room=lobby_code)
 
 
 @socketio.on("send_message")
+@metrics.instrumented("send_message")
+@rate_limited("send_message")
+@synced
 def handle_send_message(data):
     lobby_code = data.get("lobbyCode")
-    username = data.get("username")
     message = data.get("message")
 
-    if not lobby_code or lobby_code not in lobbies or not message:
+    lobby = lobby_registry.get(lobby_code)
+    if not lobby or not message:
         emit("error_message", {"message": "Invalid message."}, room=request.sid)
         return
+    username = lobby_registry.player_for(lobby, request.sid)
+    if username is None:
+        _not_a_member()
+        return
 
-    censored, violations = pf.clean(message)
+    with metrics.timed("moderation", "chat"):
+        censored, violations = pf.clean(message)
 
-    emit("receive_message", {"username": username, "message": censored, "violations": violations}, room=lobby_code)
+    room_batcher.append(lobby_code, "messages", {"username": username, "message": censored, "violations": violations})
 
 
 @socketio.on("start_game")
+@metrics.instrumented("start_game")
+@rate_limited("start_game")
+@synced
 def handle_start_game(data):
     lobby_code = data.get("lobbyCode")
-    username = data.get("username")
     mode = data.get("mode")
 
-    if not lobby_code or lobby_code not in lobbies:
+    lobby = lobby_registry.get(lobby_code)
+    if not lobby:
         emit("error_message", {"message": "Lobby not found."}, room=request.sid)
         return
 
-    lobby = lobbies[lobby_code]
-    if lobby["host"] != username:
+    username = lobby_registry.player_for(lobby, request.sid)
+    if username is None:
+        _not_a_member()
+        return
+    if lobby.host != username:
         emit("error_message", {"message": "Only the host can start."}, room=request.sid)
         return
 
@@ -202,7 +689,12 @@ def handle_start_game(data):
         emit("error_message", {"message": "Game mode required to start."}, room=request.sid)
         return
 
-    lobby["game_mode"] = mode
+    game_mode = get_mode(mode)
+    if not game_mode:
+        emit("error_message", {"message": f"Unknown game mode {mode}."}, room=request.sid)
+        return
+
+    lobby.game_mode = mode
 
     # Start whole game in round_manager (initialises current_round and marks active)
     # We keep this as your canonical entry point for the rounds system
@@ -223,468 +715,215 @@ def handle_start_game(data):
     except Exception:
         pass
 
-    lobby_votes[lobby_code] = {}
+    lobby.reset_votes()
 
-    # Setup round handler callbacks based on mode
-    if mode == "obviously_lies":
-        # clear any lingering per-round state (do not call end_round here)
-        try:
-            obviously_lies_game_manager.reset_round_state(lobby_code)
-        except Exception:
-            pass
-        round_manager.set_handler(
-            lobby_code,
-            {
-                "on_round_end": lambda lc, rn: obviously_lies_game_manager.end_round(lc),
-                "reset_round": lambda lc: obviously_lies_game_manager.reset_round_state(lc),
-            },
-        )
-
-    elif mode == "reverse_guessing":
-        # clear lingering per-round state instead of calling end_round
-        try:
-            reverse_guessing_game_manager.reset_round_state(lobby_code)
-        except Exception:
-            pass
-        round_manager.set_handler(
-            lobby_code,
-            {
-                "on_round_end": lambda lc, rn: reverse_guessing_game_manager.end_round(lc),
-                "reset_round": lambda lc: reverse_guessing_game_manager.reset_round_state(lc),
-            },
-        )
-
-    elif mode == "bad_advice_hotline":
-        try:
-            bad_advice_hotline_game_manager.reset_round_state(lobby_code)
-        except Exception:
-            pass
-        round_manager.set_handler(
-            lobby_code,
-            {
-                "on_round_end": lambda lc, rn: bad_advice_hotline_game_manager.end_round(lc),
-                "reset_round": lambda lc: bad_advice_hotline_game_manager.reset_round_state(lc),
-            },
-        )
-
-    elif mode == "emoji_translation":
-        try:
-            emoji_translation_game_manager.reset_round_state(lobby_code)
-        except Exception:
-            pass
-        round_manager.set_handler(
-            lobby_code,
-            {
-                "on_round_end": lambda lc, rn: emoji_translation_game_manager.end_round(lc),
-                "reset_round": lambda lc: emoji_translation_game_manager.reset_round_state(lc),
-            },
-        )
+    # Setup round handler callbacks for the mode's manager
+    manager = game_mode.manager
+    # clear any lingering per-round state (do not call end_round here)
+    try:
+        manager.reset_round_state(lobby_code)
+    except Exception:
+        pass
+    install_round_handler(lobby_code, manager)
 
     emit("game_started", {"lobbyCode": lobby_code, "mode": mode}, room=lobby_code)
 
 
-# --- Bad Advice Hotline Handlers ---
+# --- Game mode handlers ---
+# One generic handler per kind of event; the registry says which manager
+# methods, payload keys and event names each mode uses.
 
 
-@socketio.on("bad_advice_hotline_start_round")
-def bad_advice_hotline_start_round(data):
+def _start_round(game_mode, data):
     lobby_code = data.get("lobbyCode")
-    question = data.get("question")
-    username = data.get("username")
+    fields = [data.get(key) for key in game_mode.start_fields]
 
-    if not lobby_code or lobby_code not in lobbies:
+    lobby = lobby_registry.get(lobby_code)
+    if not lobby:
         emit("error_message", {"message": "Lobby not found."}, room=request.sid)
         return
-    if not question:
-        emit("error_message", {"message": "Question is required."}, room=request.sid)
-        return
 
-    lobby = lobbies[lobby_code]
-    if lobby["host"] != username:
+    username = lobby_registry.player_for(lobby, request.sid)
+    if username is None:
+        _not_a_member()
+        return
+    if lobby.host != username:
         emit("error_message", {"message": "Only the host can start the round."}, room=request.sid)
         return
 
-    players = set(lobby["players"])
-    host = lobby["host"]
-
-    bad_advice_hotline_game_manager.start_round(lobby_code, question, players, host)
-
-    lobby_votes[lobby_code] = {}
-
-    emit("bad_advice_hotline_round_started", {"question": question}, room=lobby_code)
-    emit("bad_advice_hotline_all_answers", {"answers": []}, room=lobby_code)
-
-
-@socketio.on("bad_advice_hotline_submit_bad_advice")
-def bad_advice_hotline_submit_bad_advice(data):
-    lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    bad_advice = data.get("badAdvice")
-
-    if not lobby_code or bad_advice is None or not bad_advice_hotline_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not found or bad advice missing."}, room=request.sid)
+    # nothing typed: serve a prompt from the bank / question pack (prefetched while the last round was voted on)
+    if game_mode.uses_prompt_bank and not any(fields):
+        drawn = prompt_bank.draw(lobby_code, game_mode.name, data.get("tag"))
+        if drawn:
+            fields = list(drawn) if isinstance(drawn, tuple) else [drawn]
+    if not all(fields):
+        emit("error_message", {"message": game_mode.start_error}, room=request.sid)
         return
 
-    censored, violations = pf.clean(bad_advice)
-
-    success = bad_advice_hotline_game_manager.submit_bad_advice(lobby_code, player, censored)
-    if not success:
-        emit("error_message", {"message": "Failed to submit bad advice."}, room=request.sid)
-        return
+    manager = game_mode.manager
+    if game_mode.prepare_method:
+        fields[0] = getattr(manager, game_mode.prepare_method)(fields[0])
+        if not fields[0]:
+            emit("error_message", {"message": game_mode.prepare_error}, room=request.sid)
+            return
 
-    emit("bad_advice_hotline_bad_advice_submitted", {"badAdvice": censored, "violations": violations}, room=lobby_code)
+    manager.start_round(lobby_code, *fields, lobby.players, lobby.host)
 
-    player_answers = bad_advice_hotline_game_manager.get_submitted_bad_advice(lobby_code)
-    emit("player_own_answers", {"answers": [ans for p, ans in player_answers.items() if p == player]}, room=request.sid)
+    lobby.reset_votes()
+    _arm_phase(lobby_code, "submit")
 
-    if bad_advice_hotline_game_manager.all_bad_advice_submitted(lobby_code):
-        all_answers = bad_advice_hotline_game_manager.get_all_bad_advice_answers(lobby_code)
-        random.shuffle(all_answers)
-        emit("bad_advice_hotline_all_answers", {"answers": all_answers}, room=lobby_code)
+    truth = manager.games[lobby_code][game_mode.truth_key] if game_mode.truth_key else None
+    emit(game_mode.round_started_event, {game_mode.prompt_key: fields[0]}, room=lobby_code)
+    emit(
+        game_mode.reveal_event,
+        {game_mode.reveal_key: _reveal_options(lobby, [truth] if truth else [])},
+        room=lobby_code,
+    )
 
 
-@socketio.on("bad_advice_hotline_vote")
-def bad_advice_hotline_vote(data):
+def _submit(game_mode, data):
     lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    answer = data.get("answer")
+    text = data.get(game_mode.submit_field)
 
-    if not lobby_code or lobby_code not in lobbies:
-        emit("error_message", {"message": "Lobby not found."}, room=request.sid)
+    lobby = lobby_registry.get(lobby_code)
+    manager = game_mode.manager
+    if not lobby or text is None or not manager.games.get(lobby_code):
+        emit("error_message", {"message": "Round not found or answer missing."}, room=request.sid)
         return
-    if not bad_advice_hotline_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not started."}, room=request.sid)
+    player = lobby_registry.player_for(lobby, request.sid)
+    if player is None:
+        _not_a_member()
         return
 
-    current_votes = lobby_votes.setdefault(lobby_code, {})
-    if player in current_votes:
-        emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
-        return
-    if player == lobbies[lobby_code]["host"]:
-        emit("error_message", {"message": "Host cannot vote."}, room=request.sid)
-        return
-
-    success = bad_advice_hotline_game_manager.cast_vote(lobby_code, player, answer)
-    if success:
-        current_votes[player] = answer
-        emit("vote_confirmed", {"answer": answer, "player": player}, room=request.sid)
-        emit("update_votes", {"votes": current_votes}, room=lobby_code)
-        scores = bad_advice_hotline_game_manager.get_scores(lobby_code)
-        emit("update_scores", {"scores": scores}, room=lobby_code)
+    with metrics.timed("moderation", "submission"):
+        censored, violations = pf.clean(text)
 
-        # auto-end round when all non-host players have voted
-        expected = _get_expected_voter_count(lobby_code)
-        if expected > 0 and len(current_votes) >= expected:
-            _process_end_round_for_manager(lobby_code, bad_advice_hotline_game_manager)
-    else:
-        emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
-
-
-# --- Obviously Lies Handlers ---
-
-
-@socketio.on("obviously_lies_start_round")
-def obviously_lies_start_round(data):
-    lobby_code = data.get("lobbyCode")
-    question = data.get("question")
-    correct_answer = data.get("correctAnswer")
-    username = data.get("username")
-
-    if not lobby_code or lobby_code not in lobbies:
-        emit("error_message", {"message": "Lobby not found."}, room=request.sid)
-        return
-    if not question or not correct_answer:
-        emit("error_message", {"message": "Question and answer required."}, room=request.sid)
-        return
-
-    lobby = lobbies[lobby_code]
-    if lobby["host"] != username:
-        emit("error_message", {"message": "Only the host can start the round."}, room=request.sid)
+    success = getattr(manager, game_mode.submit_method)(lobby_code, player, censored)
+    if not success:
+        emit("error_message", {"message": game_mode.submit_error}, room=request.sid)
         return
 
-    players = set(lobby["players"])
-    host = lobby["host"]
-
-    obviously_lies_game_manager.start_round(lobby_code, question, correct_answer, players, host)
-
-    lobby_votes[lobby_code] = {}
-
-    emit("obviously_lies_round_started", {"question": question}, room=lobby_code)
-    emit("obviously_lies_all_answers", {"answers": [correct_answer]}, room=lobby_code)
-
-
-@socketio.on("obviously_lies_submit_false_answer")
-def obviously_lies_submit_false_answer(data):
-    lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    false_answer = data.get("falseAnswer")
-
-    if not lobby_code or not obviously_lies_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not found."}, room=request.sid)
-        return
+    # near-duplicates are merged into the earlier submission, so report what was stored
+    submissions = getattr(manager, game_mode.submitted_method)(lobby_code)
+    censored = submissions.get(player, censored)
 
-    censored, violations = pf.clean(false_answer)
+    emit(
+        game_mode.submitted_event,
+        {game_mode.submit_field: censored, "violations": violations},
+        room=_submission_room(lobby),
+    )
 
-    success = obviously_lies_game_manager.submit_false_answer(lobby_code, player, censored)
-    if not success:
-        emit("error_message", {"message": "Failed to submit false answer."}, room=request.sid)
-        return
+    emit(game_mode.own_event, {game_mode.reveal_key: [t for p, t in submissions.items() if p == player]}, room=request.sid)
 
-    emit("obviously_lies_false_answer_submitted", {"falseAnswer": censored, "violations": violations}, room=lobby_code)
+    if getattr(manager, game_mode.all_submitted_method)(lobby_code):
+        _reveal_submissions(lobby, game_mode, manager)
 
-    player_answers = obviously_lies_game_manager.get_submitted_false_answers(lobby_code)
-    emit("player_own_answers", {"answers": [ans for p, ans in player_answers.items() if p == player]}, room=request.sid)
 
-    if obviously_lies_game_manager.all_false_submitted(lobby_code):
-        all_answers = obviously_lies_game_manager.get_all_answers(lobby_code)
-        random.shuffle(all_answers)
-        emit("obviously_lies_all_answers", {"answers": all_answers}, room=lobby_code)
+def _reveal_submissions(lobby, game_mode, manager):
+    """Every submission is in: score what can be auto-scored and open voting."""
+    lobby_code = lobby.code
+    if game_mode.auto_score_method:
+        # partial credit computed for every submission in one batch
+        getattr(manager, game_mode.auto_score_method)(lobby_code)
+    submissions = getattr(manager, game_mode.submitted_method)(lobby_code)
+    options = getattr(manager, game_mode.all_options_method)(lobby_code)
+    lobby_rng.for_lobby(lobby_code).shuffle(options)
+    truth = manager.games[lobby_code][game_mode.truth_key] if game_mode.truth_key else None
+    _emit_reveal(lobby, game_mode.reveal_event, game_mode.reveal_key, options, submissions, truth=truth)
+    if game_mode.auto_score_method:
+        room_batcher.update(lobby_code, "scores", manager.get_scores(lobby_code))
+    _arm_phase(lobby_code, "vote")
+    if game_mode.uses_prompt_bank:
+        # voting has started: draw the next round's prompt now, with the tag the host used this round
+        prompt_bank.prefetch(lobby_code, game_mode.name, prompt_bank.last_tag(lobby_code, game_mode.name))
 
 
-@socketio.on("obviously_lies_vote")
-def obviously_lies_vote(data):
+def _vote(game_mode, data):
     lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    answer = data.get("answer")
+    answer_id = data.get("answerId")
 
-    if not lobby_code or lobby_code not in lobbies:
+    lobby = lobby_registry.get(lobby_code)
+    manager = game_mode.manager
+    if not lobby:
         emit("error_message", {"message": "Lobby not found."}, room=request.sid)
         return
-    if not obviously_lies_game_manager.games.get(lobby_code):
+    if not manager.games.get(lobby_code):
         emit("error_message", {"message": "Round not started."}, room=request.sid)
         return
 
-    current_votes = lobby_votes.setdefault(lobby_code, {})
+    player = lobby_registry.player_for(lobby, request.sid)
+    if player is None:
+        _not_a_member()
+        return
+    current_votes = lobby.votes
     if player in current_votes:
         emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
         return
-    if player == lobbies[lobby_code]["host"]:
+    if player == lobby.host:
         emit("error_message", {"message": "Host cannot vote."}, room=request.sid)
         return
 
-    success = obviously_lies_game_manager.cast_vote(lobby_code, player, answer)
-    if success:
-        current_votes[player] = answer
-        emit("vote_confirmed", {"answer": answer, "player": player}, room=request.sid)
-        emit("update_votes", {"votes": current_votes}, room=lobby_code)
-        scores = obviously_lies_game_manager.get_scores(lobby_code)
-        emit("update_scores", {"scores": scores}, room=lobby_code)
-
-        # --- NEW: auto-end round when all non-host players have voted ---
-        expected = _get_expected_voter_count(lobby_code)
-        if expected > 0 and len(current_votes) >= expected:
-            _process_end_round_for_manager(lobby_code, obviously_lies_game_manager)
-    else:
-        emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
-
-
-# --- Reverse Guessing Handlers ---
-
-
-@socketio.on("reverse_guessing_start_round")
-def reverse_guessing_start_round(data):
-    lobby_code = data.get("lobbyCode")
-    answer = data.get("answer")
-    correct_question = data.get("correctQuestion")
-    username = data.get("username")
-
-    if not lobby_code or lobby_code not in lobbies:
-        emit("error_message", {"message": "Lobby not found."}, room=request.sid)
-        return
-    if not answer or not correct_question:
-        emit("error_message", {"message": "Answer and correct question required."}, room=request.sid)
-        return
-
-    lobby = lobbies[lobby_code]
-    if lobby["host"] != username:
-        emit("error_message", {"message": "Only the host can start the round."}, room=request.sid)
-        return
-
-    players = set(lobby["players"])
-    host = lobby["host"]
-
-    reverse_guessing_game_manager.start_round(lobby_code, answer, correct_question, players, host)
-
-    lobby_votes[lobby_code] = {}
-
-    emit("reverse_guessing_round_started", {"answer": answer}, room=lobby_code)
-    emit("reverse_guessing_all_questions", {"questions": [correct_question]}, room=lobby_code)
-
-
-@socketio.on("reverse_guessing_submit_question")
-def reverse_guessing_submit_question(data):
-    lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    guessed_question = data.get("guessedQuestion")
-
-    if not lobby_code or not reverse_guessing_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not found."}, room=request.sid)
-        return
-
-    censored, violations = pf.clean(guessed_question)
-
-    success = reverse_guessing_game_manager.submit_question(lobby_code, player, censored)
-    if not success:
-        emit("error_message", {"message": "Failed to submit question."}, room=request.sid)
+    answer = _resolve_vote(lobby, answer_id, player)
+    if answer is None:
+        emit("error_message", {"message": "Invalid answer."}, room=request.sid)
         return
 
-    emit("reverse_guessing_question_submitted", {"guessedQuestion": censored, "violations": violations}, room=lobby_code)
-
-    player_questions = reverse_guessing_game_manager.get_submitted_questions(lobby_code)
-    emit("player_own_questions", {"questions": [q for p, q in player_questions.items() if p == player]}, room=request.sid)
-
-    if reverse_guessing_game_manager.all_questions_submitted(lobby_code):
-        all_questions = reverse_guessing_game_manager.get_all_questions(lobby_code)
-        random.shuffle(all_questions)
-        emit("reverse_guessing_all_questions", {"questions": all_questions}, room=lobby_code)
-
-
-@socketio.on("reverse_guessing_vote")
-def reverse_guessing_vote(data):
-    lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    question = data.get("question")
-
-    if not lobby_code or lobby_code not in lobbies:
-        emit("error_message", {"message": "Lobby not found."}, room=request.sid)
-        return
-    if not reverse_guessing_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not started."}, room=request.sid)
-        return
-
-    current_votes = lobby_votes.setdefault(lobby_code, {})
-    if player in current_votes:
-        emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
-        return
-    if player == lobbies[lobby_code]["host"]:
-        emit("error_message", {"message": "Host cannot vote."}, room=request.sid)
-        return
-
-    success = reverse_guessing_game_manager.cast_vote(lobby_code, player, question)
+    success = manager.cast_vote(lobby_code, player, answer)
     if success:
-        current_votes[player] = question
-        emit("vote_confirmed", {"question": question, "player": player}, room=request.sid)
-        emit("update_votes", {"votes": current_votes}, room=lobby_code)
-        scores = reverse_guessing_game_manager.get_scores(lobby_code)
-        emit("update_scores", {"scores": scores}, room=lobby_code)
-
-        # auto-end round when all non-host players have voted 
-        expected = _get_expected_voter_count(lobby_code)
-        if expected > 0 and len(current_votes) >= expected:
-            _process_end_round_for_manager(lobby_code, reverse_guessing_game_manager)
+        current_votes[player] = answer_id
+        tallies = lobby.options["tallies"]
+        tallies[answer_id] += 1
+        # the ack goes out now; the room sees votes and scores in the next batch
+        emit("vote_confirmed", {"answerId": answer_id, "player": player}, room=request.sid)
+        room_batcher.update(lobby_code, "votes", current_votes)
+        room_batcher.set(lobby_code, "tallies", list(tallies))
+        room_batcher.update(lobby_code, "scores", manager.get_scores(lobby_code))
+
+        # auto-end round when all non-host players have voted
+        if _voting_complete(lobby):
+            _process_end_round_for_manager(lobby, manager)
     else:
         emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
 
 
-# --- Emoji Translation Handlers ---
-
-
-@socketio.on("emoji_translation_start_round")
-def emoji_translation_start_round(data):
-    lobby_code = data.get("lobbyCode")
-    emoji_prompt = data.get("emojiPrompt")
-    username = data.get("username")
-
-    if not lobby_code or lobby_code not in lobbies:
-        emit("error_message", {"message": "Lobby not found."}, room=request.sid)
-        return
-    if not emoji_prompt:
-        emit("error_message", {"message": "Emoji prompt is required."}, room=request.sid)
-        return
-
-    lobby = lobbies[lobby_code]
-    if lobby["host"] != username:
-        emit("error_message", {"message": "Only the host can start the round."}, room=request.sid)
-        return
-
-    players = set(lobby["players"])
-    host = lobby["host"]
+def _bind(handler, game_mode):
+    def on_event(data):
+        return handler(game_mode, data)
+    on_event.__name__ = f"{game_mode.name}{handler.__name__}"
+    return on_event
 
-    emoji_translation_game_manager.start_round(lobby_code, emoji_prompt, players, host)
 
-    lobby_votes[lobby_code] = {}
-
-    emit("emoji_translation_round_started", {"emoji_prompt": emoji_prompt}, room=lobby_code)
-    emit("emoji_translation_all_guesses", {"guesses": []}, room=lobby_code)
-
-
-@socketio.on("emoji_translation_submit_guess")
-def emoji_translation_submit_guess(data):
-    lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    guess = data.get("guess")
-
-    if not lobby_code or not emoji_translation_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not found."}, room=request.sid)
-        return
-
-    censored, violations = pf.clean(guess)
-
-    success = emoji_translation_game_manager.submit_guess(lobby_code, player, censored)
-    if not success:
-        emit("error_message", {"message": "Failed to submit guess."}, room=request.sid)
-        return
-
-    emit("emoji_translation_guess_submitted", {"guess": censored, "violations": violations}, room=lobby_code)
-
-    player_guesses = emoji_translation_game_manager.get_submitted_guesses(lobby_code)
-    emit("player_own_guesses", {"guesses": [g for p, g in player_guesses.items() if p == player]}, room=request.sid)
-
-    if emoji_translation_game_manager.all_guesses_submitted(lobby_code):
-        all_guesses = emoji_translation_game_manager.get_all_guesses(lobby_code)
-        random.shuffle(all_guesses)
-        emit("emoji_translation_all_guesses", {"guesses": all_guesses}, room=lobby_code)
-
-
-@socketio.on("emoji_translation_vote")
-def emoji_translation_vote(data):
-    lobby_code = data.get("lobbyCode")
-    player = data.get("player")
-    guess = data.get("guess")
-
-    if not lobby_code or lobby_code not in lobbies:
-        emit("error_message", {"message": "Lobby not found."}, room=request.sid)
-        return
-    if not emoji_translation_game_manager.games.get(lobby_code):
-        emit("error_message", {"message": "Round not started."}, room=request.sid)
-        return
-
-    current_votes = lobby_votes.setdefault(lobby_code, {})
-    if player in current_votes:
-        emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
-        return
-    if player == lobbies[lobby_code]["host"]:
-        emit("error_message", {"message": "Host cannot vote."}, room=request.sid)
-        return
-
-    success = emoji_translation_game_manager.cast_vote(lobby_code, player, guess)
-    if success:
-        current_votes[player] = guess
-        emit("vote_confirmed", {"guess": guess, "player": player}, room=request.sid)
-        emit("update_votes", {"votes": current_votes}, room=lobby_code)
-        scores = emoji_translation_game_manager.get_scores(lobby_code)
-        emit("update_scores", {"scores": scores}, room=lobby_code)
-
-        # auto-end round when all non-host players have voted
-        expected = _get_expected_voter_count(lobby_code)
-        if expected > 0 and len(current_votes) >= expected:
-            _process_end_round_for_manager(lobby_code, emoji_translation_game_manager)
-    else:
-        emit("error_message", {"message": "Vote failed or already voted."}, room=request.sid)
+# event name -> handler, built once at import from the registry (no manager is imported here)
+MODE_EVENTS = {}
+for _game_mode in MODES.values():
+    MODE_EVENTS[_game_mode.start_event] = _bind(_start_round, _game_mode)
+    MODE_EVENTS[_game_mode.submit_event] = _bind(_submit, _game_mode)
+    MODE_EVENTS[_game_mode.vote_event] = _bind(_vote, _game_mode)
+    rate_limiter.set_cost(_game_mode.start_event, MODE_COSTS["start_round"])
+    rate_limiter.set_cost(_game_mode.submit_event, MODE_COSTS["submit"])
+    rate_limiter.set_cost(_game_mode.vote_event, MODE_COSTS["vote"])
+for _event, _handler in MODE_EVENTS.items():
+    socketio.on(_event)(metrics.instrumented(_event)(rate_limited(_event)(synced(_handler))))
 
 
 # --- End Round Handler ---
 
 
 @socketio.on("end_round")
+@metrics.instrumented("end_round")
+@rate_limited("end_round")
+@synced
 def handle_end_round(data):
     lobby_code = data.get("lobbyCode")
 
-    if not lobby_code or lobby_code not in lobbies:
+    lobby = lobby_registry.get(lobby_code)
+    if not lobby:
         emit("error_message", {"message": "Lobby not found."}, room=request.sid)
         return
 
-    mode = lobbies[lobby_code].get("game_mode")
+    mode = lobby.game_mode
+    timer_wheel.cancel(lobby_code)
+    room_batcher.flush(lobby_code)
     res = round_manager.end_round(lobby_code)
 
     if not res:
@@ -692,13 +931,8 @@ def handle_end_round(data):
         return
 
     # pick correct game manager
-    managers = {
-        "obviously_lies": obviously_lies_game_manager,
-        "reverse_guessing": reverse_guessing_game_manager,
-        "bad_advice_hotline": bad_advice_hotline_game_manager,
-        "emoji_translation": emoji_translation_game_manager,
-    }
-    manager = managers.get(mode)
+    game_mode = get_mode(mode)
+    manager = game_mode.manager if game_mode else None
 
     if not manager:
         emit("error_message", {"message": f"Unknown game mode {mode}."}, room=request.sid)
@@ -713,10 +947,11 @@ def handle_end_round(data):
             round_manager.unregister_lobby(lobby_code)
         except Exception:
             pass
-        lobby_votes.pop(lobby_code, None)
+        lobby.reset_votes()
+        room_batcher.release(lobby_code)
     else:
         manager.reset_round_state(lobby_code)
-        lobby_votes[lobby_code] = {}
+        lobby.reset_votes()
 
         next_round = res["next_round"]
         emit("round_ended", {"next_round": next_round}, room=lobby_code)
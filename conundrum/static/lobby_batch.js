@@ -0,0 +1,21 @@
+// conundrum/static/lobby_batch.js
+// The server coalesces room updates into one "lobby_batch" event per tick.
+// Votes and scores arrive as changes only; this keeps the full state and
+// hands it to the page's usual update_votes / update_scores / receive_message handlers.
+function listenForLobbyBatches(socket) {
+  const state = { votes: {}, scores: {} };
+  const replay = (event, data) => socket.listeners(event).forEach(handler => handler(data));
+
+  socket.on("lobby_batch", batch => {
+    (batch.reset || []).forEach(key => { state[key] = {}; });
+    (batch.messages || []).forEach(message => replay("receive_message", message));
+    if (batch.votes || batch.tallies) {
+      Object.assign(state.votes, batch.votes || {});
+      replay("update_votes", { votes: state.votes, tallies: batch.tallies });
+    }
+    if (batch.scores) {
+      Object.assign(state.scores, batch.scores);
+      replay("update_scores", { scores: state.scores });
+    }
+  });
+}
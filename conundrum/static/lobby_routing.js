@@ -0,0 +1,9 @@
+// conundrum/static/lobby_routing.js
+// With several workers each lobby lives on one of them. If this page's socket
+// reached the wrong one (or the lobby was handed off), the server sends
+// "lobby_moved" with the owner's base URL and the same page is reopened there.
+function followLobbyMoves(socket) {
+  socket.on("lobby_moved", data => {
+    window.location.href = data.owner + window.location.pathname + window.location.search;
+  });
+}
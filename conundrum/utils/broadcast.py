@@ -0,0 +1,96 @@
+# conundrum/utils/broadcast.py
+from typing import Dict, Optional
+
+# Client event carrying everything coalesced for a lobby during one window
+BATCH_EVENT = "lobby_batch"
+
+# never equal to a real value, so keys not sent before always count as changed
+_UNSENT = object()
+
+
+class RoomBatcher:
+    """
+    Coalesces room-level updates (votes, scores, chat) into one "lobby_batch"
+    event per lobby per window, so room traffic grows with ticks, not events.
+
+    - update(): a player -> value mapping (votes, scores). Only the entries that
+      changed since the last flush are sent; if entries disappeared (new round),
+      the whole mapping is sent and its key is listed in "reset".
+    - set(): a whole value (tallies), sent only if it changed.
+    - append(): list items (chat lines), all sent in order.
+
+    A window of 0 still merges everything queued before the event loop next
+    yields (i.e. one handler's updates). Acks and phase changes (reveal,
+    round end) are emitted directly by the caller, after flush() for the lobby.
+    """
+
+    def __init__(self):
+        self.socketio = None
+        self.window = 0.0
+        # pending[lobby_code] = {"update": {key: mapping}, "set": {key: value}, "append": {key: [item, ...]}}
+        self.pending: Dict[str, Dict] = {}
+        # sent[lobby_code][key] = last value flushed to the room
+        self.sent: Dict[str, Dict] = {}
+
+    def configure(self, socketio, window_ms: Optional[int] = 50):
+        self.socketio = socketio
+        self.window = max(0, int(window_ms or 0)) / 1000.0
+
+    def _queue(self, lobby_code):
+        batch = self.pending.get(lobby_code)
+        if batch is None:
+            batch = self.pending[lobby_code] = {"update": {}, "set": {}, "append": {}}
+            if self.socketio:
+                self.socketio.start_background_task(self._tick, lobby_code)
+        return batch
+
+    def _tick(self, lobby_code):
+        self.socketio.sleep(self.window)
+        self.flush(lobby_code)
+
+    def update(self, lobby_code, key, mapping):
+        self._queue(lobby_code)["update"][key] = dict(mapping)
+
+    def set(self, lobby_code, key, value):
+        self._queue(lobby_code)["set"][key] = value
+
+    def append(self, lobby_code, key, item):
+        self._queue(lobby_code)["append"].setdefault(key, []).append(item)
+
+    def flush(self, lobby_code):
+        """Send whatever is pending for a lobby now (no-op if nothing is)."""
+        batch = self.pending.pop(lobby_code, None)
+        if not batch:
+            return
+        sent = self.sent.setdefault(lobby_code, {})
+        payload = {}
+
+        for key, mapping in batch["update"].items():
+            previous = sent.get(key, {})
+            if previous.keys() - mapping.keys():
+                payload.setdefault("reset", []).append(key)
+                payload[key] = mapping
+            else:
+                changed = {k: v for k, v in mapping.items() if previous.get(k, _UNSENT) != v}
+                if changed:
+                    payload[key] = changed
+            sent[key] = mapping
+
+        for key, value in batch["set"].items():
+            if sent.get(key, _UNSENT) != value:
+                payload[key] = value
+                sent[key] = value
+
+        payload.update(batch["append"])
+
+        if payload and self.socketio:
+            self.socketio.emit(BATCH_EVENT, payload, to=lobby_code)
+
+    def release(self, lobby_code):
+        """Flush and forget a lobby."""
+        self.flush(lobby_code)
+        self.sent.pop(lobby_code, None)
+
+
+# single instance for easy import
+room_batcher = RoomBatcher()
@@ -0,0 +1,97 @@
+# conundrum/utils/duplicates.py
+import random
+import re
+import zlib
+from typing import Dict, Optional, Tuple
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+_PRIME = (1 << 61) - 1
+_NUM_HASHES = 32
+_BANDS = 8
+_ROWS = _NUM_HASHES // _BANDS
+
+# fixed coefficients so signatures are identical across workers and restarts
+_rng = random.Random(0x5EED)
+_COEFFS = tuple((_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_HASHES))
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _NON_WORD.sub(" ", (text or "").lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def signature(normalized) -> Tuple[int, ...]:
+    """MinHash signature over the character 3-gram shingles of a normalized string."""
+    padded = f" {normalized} "
+    shingles = {padded[i:i + 3] for i in range(len(padded) - 2)} or {padded}
+    hashes = [zlib.crc32(sh.encode("utf-8")) for sh in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _COEFFS)
+
+
+class DuplicateDetector:
+    """
+    Per-lobby near-duplicate lookup for submissions.
+    Exact matches (after normalize) are a dict hit; near matches go through
+    LSH buckets over MinHash bands, so a new submission is only compared with
+    the few earlier ones sharing a bucket, never with everything submitted.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        # lobbies[lobby_code] = {
+        #   "exact": {normalized: text},
+        #   "buckets": {(band, band_values): [text, ...]},
+        #   "signatures": {text: signature},
+        # }
+        self.lobbies: Dict[str, Dict] = {}
+
+    def _state(self, lobby_code):
+        state = self.lobbies.get(lobby_code)
+        if state is None:
+            state = self.lobbies[lobby_code] = {"exact": {}, "buckets": {}, "signatures": {}}
+        return state
+
+    @staticmethod
+    def _bands(sig):
+        for band in range(_BANDS):
+            yield (band, sig[band * _ROWS:(band + 1) * _ROWS])
+
+    def find(self, lobby_code, text) -> Optional[str]:
+        """Return an earlier submission that text duplicates, or None."""
+        state = self.lobbies.get(lobby_code)
+        if not state:
+            return None
+        norm = normalize(text)
+        if norm in state["exact"]:
+            return state["exact"][norm]
+
+        sig = signature(norm)
+        checked = set()
+        for key in self._bands(sig):
+            for candidate in state["buckets"].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                other = state["signatures"][candidate]
+                same = sum(1 for x, y in zip(sig, other) if x == y)
+                if same / _NUM_HASHES >= self.threshold:
+                    return candidate
+        return None
+
+    def add(self, lobby_code, text):
+        """Remember a submission so later near-copies of it are found."""
+        state = self._state(lobby_code)
+        norm = normalize(text)
+        if norm in state["exact"]:
+            return
+        state["exact"][norm] = text
+        sig = signature(norm)
+        state["signatures"][text] = sig
+        for key in self._bands(sig):
+            state["buckets"].setdefault(key, []).append(text)
+
+    def reset(self, lobby_code):
+        self.lobbies.pop(lobby_code, None)
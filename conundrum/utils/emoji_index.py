@@ -0,0 +1,241 @@
+# conundrum/utils/emoji_index.py
+import hashlib
+import json
+import os
+import re
+from itertools import chain
+from typing import Dict, List, Optional
+
+_WORD = re.compile(r"[a-z0-9']+", re.IGNORECASE)
+
+# trie terminal key ("" is never a token or a character)
+_END = ""
+
+# Codepoints that can start an emoji grapheme
+_PICTOGRAPHIC = frozenset(chain(
+    (0x00A9, 0x00AE, 0x203C, 0x2049, 0x2122, 0x2139, 0x3030, 0x303D, 0x3297, 0x3299),
+    range(0x2190, 0x2200),
+    range(0x2300, 0x2400),
+    range(0x24C2, 0x24C3),
+    range(0x25A0, 0x27C0),
+    range(0x2900, 0x2980),
+    range(0x2B00, 0x2C00),
+    range(0x1F000, 0x1FB00),
+))
+# Codepoints that extend the grapheme before them (variation selectors, skin tones, keycap, tags)
+_EXTENDERS = frozenset(chain(
+    (0xFE0E, 0xFE0F, 0x20E3),
+    range(0x1F3FB, 0x1F400),
+    range(0xE0020, 0xE0080),
+))
+_ZWJ = 0x200D
+_REGIONAL = range(0x1F1E6, 0x1F200)
+_KEYCAP_BASES = frozenset("0123456789#*")
+
+
+# Words that carry no meaning when comparing a guess against keywords
+_STOP_WORDS = frozenset((
+    "a", "an", "and", "at", "for", "in", "is", "it", "of", "on", "or", "the", "to", "with",
+))
+_SUFFIXES = ("ingly", "edly", "ness", "ing", "ed", "es", "ly", "er", "s")
+
+
+def _strip_variation(s):
+    return s.replace("\ufe0f", "").replace("\ufe0e", "")
+
+
+def stem(token):
+    """Cheap suffix-stripping stemmer: crying/cries/cry -> cry, happiness -> happy."""
+    token = token.lower().replace("'", "")
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            break
+    if token.endswith("i"):
+        token = token[:-1] + "y"
+    return token
+
+
+def stem_bag(text):
+    """Set of stems for the meaningful words in text."""
+    return {stem(w) for w in _WORD.findall(text or "") if w.lower() not in _STOP_WORDS}
+
+
+class EmojiIndex:
+    """
+    Emoji data loaded once at startup.
+      - keyword_to_emoji: lowercase keyword -> emoji (first emoji listing the keyword wins)
+      - emoji_info: emoji -> {"category": str, "keywords": [str, ...]}
+      - payload / fingerprint: the JSON sent to browsers and its content hash
+      - phrase_trie: keyword tokens -> emoji, for longest-match text translation
+      - canonical: emoji without variation selectors -> spelling used in the data file
+      - stem_to_emojis: keyword stem -> emojis whose keywords contain it (inverted index for scoring)
+    """
+
+    def __init__(self, categories: Optional[Dict[str, List[Dict]]] = None):
+        self.categories = categories if isinstance(categories, dict) else {}
+        self._build()
+
+    @classmethod
+    def from_json(cls, path):
+        """Load emoji categories from JSON; fall back to an empty index on error."""
+        try:
+            with open(os.path.abspath(path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("emoji JSON must map category -> list of emoji entries")
+            return cls(data)
+        except Exception as e:
+            print(f"[EmojiIndex] failed to load '{path}': {e}. Using empty index.")
+            return cls({})
+
+    def _build(self):
+        self.keyword_to_emoji: Dict[str, str] = {}
+        self.emoji_info: Dict[str, Dict] = {}
+        for category, entries in self.categories.items():
+            for entry in entries:
+                emoji = entry.get("emoji")
+                if not emoji:
+                    continue
+                keywords = [k.lower() for k in entry.get("keywords", [])]
+                info = self.emoji_info.setdefault(emoji, {"category": category, "keywords": []})
+                for kw in keywords:
+                    if kw not in info["keywords"]:
+                        info["keywords"].append(kw)
+                    self.keyword_to_emoji.setdefault(kw, emoji)
+
+        self.phrase_trie: Dict = {}
+        for kw, emoji in self.keyword_to_emoji.items():
+            node = self.phrase_trie
+            for token in _WORD.findall(kw):
+                node = node.setdefault(token, {})
+            node.setdefault(_END, emoji)
+
+        self.canonical: Dict[str, str] = {}
+        for emoji in self.emoji_info:
+            self.canonical.setdefault(_strip_variation(emoji), emoji)
+
+        self.stem_to_emojis: Dict[str, frozenset] = {}
+        inverted: Dict[str, set] = {}
+        for emoji, info in self.emoji_info.items():
+            for kw in info["keywords"]:
+                for st in stem_bag(kw):
+                    inverted.setdefault(st, set()).add(emoji)
+        for st, emojis in inverted.items():
+            self.stem_to_emojis[st] = frozenset(emojis)
+
+        # serialized once; browsers fetch it as a fingerprinted, long-cached asset
+        self.payload = json.dumps(
+            {"categories": self.categories, "keywords": self.keyword_to_emoji},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.fingerprint = hashlib.sha256(self.payload).hexdigest()[:16]
+
+    def translate(self, text) -> str:
+        """
+        Replace keyword phrases in text with their emoji in a single left-to-right pass,
+        always taking the longest phrase ("tears of joy" beats "tear").
+        Words in a phrase may only be separated by whitespace.
+        """
+        text = text or ""
+        words = list(_WORD.finditer(text))
+        out = []
+        last = 0
+        i = 0
+        while i < len(words):
+            node = self.phrase_trie
+            best = None
+            k = i
+            while k < len(words):
+                if k > i and text[words[k - 1].end():words[k].start()].strip():
+                    break
+                node = node.get(words[k].group(0).lower())
+                if node is None:
+                    break
+                k += 1
+                if _END in node:
+                    best = (k, node[_END])
+            if best:
+                end, emoji = best
+                out.append(text[last:words[i].start()])
+                out.append(emoji)
+                last = words[end - 1].end()
+                i = end
+            else:
+                i += 1
+        out.append(text[last:])
+        return "".join(out)
+
+    def split_emoji(self, text) -> Optional[List[str]]:
+        """
+        Split text into emoji graphemes (whitespace between them is dropped).
+        Returns None if the text contains anything that is not an emoji.
+        """
+        graphemes = []
+        text = text or ""
+        n = len(text)
+        i = 0
+        while i < n:
+            ch = text[i]
+            if ch.isspace():
+                i += 1
+                continue
+            cp = ord(ch)
+            j = i + 1
+            if ch in _KEYCAP_BASES:
+                # keycaps: digit/#/* + optional VS16 + U+20E3
+                if j < n and ord(text[j]) == 0xFE0F:
+                    j += 1
+                if j >= n or ord(text[j]) != 0x20E3:
+                    return None
+            elif cp not in _PICTOGRAPHIC:
+                return None
+            elif cp in _REGIONAL and j < n and ord(text[j]) in _REGIONAL:
+                j += 1  # flag: pair of regional indicators
+            while j < n:
+                c = ord(text[j])
+                if c in _EXTENDERS:
+                    j += 1
+                elif c == _ZWJ and j + 1 < n and ord(text[j + 1]) in _PICTOGRAPHIC:
+                    j += 2
+                else:
+                    break
+            graphemes.append(text[i:j])
+            i = j
+        return graphemes
+
+    def canonicalize_prompt(self, text) -> Optional[str]:
+        """
+        Validate an emoji prompt and return it in canonical form: known emoji use the
+        data file's spelling, whitespace is removed. None if it is empty or not all emoji.
+        """
+        graphemes = self.split_emoji(text)
+        if not graphemes:
+            return None
+        return "".join(self.canonical.get(_strip_variation(g), g) for g in graphemes)
+
+    def score_guesses(self, prompt, guesses: Dict[str, str]) -> Dict[str, float]:
+        """
+        Score many guesses against one emoji prompt in a single call.
+        A guess's score is the share of the prompt's known emoji that at least one of its
+        (stemmed) words points back to through the inverted index, from 0.0 to 1.0.
+        """
+        expected = {self.canonical.get(_strip_variation(g), g) for g in self.split_emoji(prompt) or []}
+        expected &= self.emoji_info.keys()
+        if not expected:
+            return {key: 0.0 for key in guesses}
+
+        scores = {}
+        for key, guess in guesses.items():
+            hit = set()
+            for st in stem_bag(guess):
+                emojis = self.stem_to_emojis.get(st)
+                if emojis:
+                    hit |= emojis & expected
+            scores[key] = len(hit) / len(expected)
+        return scores
+
+
+# single instance for easy import
+emoji_index = EmojiIndex.from_json("data/emoji.json")
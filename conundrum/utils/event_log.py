@@ -0,0 +1,316 @@
+# conundrum/utils/event_log.py
+"""
+Write-ahead log of lobby state changes, replayed on top of the latest snapshot.
+
+After every state-changing socket event the lobby's fields (see lobby_sync)
+are pickled and compared with what was last logged; only the changed ones
+are appended, as one record:
+
+    length (u32) | crc32 (u32) | pickle((lobby_code, {field: bytes}, [deleted field, ...], {field: delta}))
+
+A changed field is logged as a delta against its last logged value: the
+dict keys, attributes and list items that changed, items appended to a list
+and members added to or removed from a set (see _delta). So a vote in a
+lobby of 500 costs about what it costs in a lobby of 5. A field whose delta
+would be bigger than the field is logged whole, and so is every field of a
+lobby the first time it is logged in a segment, so each segment replays on
+top of the snapshot taken when it was opened.
+
+Handlers never wait for the disk. Records are queued and a writer thread
+(a real OS thread, even under eventlet) writes whatever has accumulated and
+fsyncs once per commit interval, so a crash loses at most one interval.
+
+The log is split into numbered segments. Taking a snapshot starts a new
+segment and records its number in the snapshot; once the snapshot is on
+disk the older segments are deleted. Recovery loads the snapshot and
+replays the segments from that number on.
+"""
+import glob
+import os
+import pickle
+import struct
+import zlib
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+try:
+    # under eventlet's monkey patching the writer must still be a real thread,
+    # or fsync would stall every greenlet
+    from eventlet.patcher import original
+    _threading = original("threading")
+except ImportError:
+    import threading as _threading
+
+from conundrum.utils.lobby_sync import install_fields, lobby_fields
+
+# Milliseconds between group commits (one write + fsync for everything queued)
+COMMIT_INTERVAL_MS = 5
+
+_RECORD_HEADER = struct.Struct(">II")
+# queued in place of a record: close the current segment and open the next
+_ROTATE = object()
+
+# delta operations: (_SET, path, value), (_DEL, path), (_EXTEND, path, old length, items),
+# (_SET_DIFF, path, added, removed). A path is a tuple of dict keys, attribute names and
+# list indices leading from the field's value to what changed.
+_SET, _DEL, _EXTEND, _SET_DIFF = range(4)
+
+
+def _delta(old, new, path: Tuple, ops: List):
+    """Append to ops what turns old into new."""
+    if type(old) is not type(new):
+        ops.append((_SET, path, new))
+    elif isinstance(new, dict):
+        for key in old.keys() - new.keys():
+            ops.append((_DEL, path + (key,)))
+        for key, value in new.items():
+            if key in old:
+                _delta(old[key], value, path + (key,), ops)
+            else:
+                ops.append((_SET, path + (key,), value))
+    elif isinstance(new, list):
+        if len(new) < len(old):
+            ops.append((_SET, path, new))
+            return
+        for i, (before, after) in enumerate(zip(old, new)):
+            _delta(before, after, path + (i,), ops)
+        if len(new) > len(old):
+            ops.append((_EXTEND, path, len(old), new[len(old):]))
+    elif isinstance(new, set):
+        if old != new:
+            ops.append((_SET_DIFF, path, new - old, old - new))
+    elif hasattr(new, "__dict__"):
+        # an object: compare what it pickles (Lobby leaves its cached payload out)
+        _delta(_state(old), _state(new), path, ops)
+    elif old != new:
+        ops.append((_SET, path, new))
+
+
+def _state(obj):
+    getstate = getattr(obj, "__getstate__", None)
+    return getstate() if getstate else obj.__dict__
+
+
+def _child(target, key):
+    return target[key] if isinstance(target, (dict, list)) else getattr(target, key)
+
+
+def _patch(value, ops: List):
+    """Apply ops from _delta to value in place; returns the (possibly replaced) value."""
+    for op in ops:
+        kind, path = op[0], op[1]
+        if kind in (_EXTEND, _SET_DIFF):
+            target = value
+            for key in path:
+                target = _child(target, key)
+            if kind == _EXTEND:
+                del target[op[2]:]
+                target.extend(op[3])
+            else:
+                target |= op[2]
+                target -= op[3]
+            continue
+        if not path:
+            value = op[2]
+            continue
+        parent = value
+        for key in path[:-1]:
+            parent = _child(parent, key)
+        if isinstance(parent, (dict, list)):
+            if kind == _SET:
+                parent[path[-1]] = op[2]
+            else:
+                del parent[path[-1]]
+        elif kind == _SET:
+            setattr(parent, path[-1], op[2])
+        else:
+            delattr(parent, path[-1])
+    return value
+
+
+class EventLog:
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.interval = COMMIT_INTERVAL_MS / 1000
+        # number of the segment new records go to
+        self.segment = 0
+        # _logged[lobby_code] = {field: pickled bytes as last logged}
+        self._logged: Dict[str, Dict[str, bytes]] = {}
+        # _based[lobby_code] = segment holding the lobby's last full record, which deltas build on
+        self._based: Dict[str, int] = {}
+        self._queue = deque()
+        self._wake = _threading.Event()
+        self._lock = _threading.Lock()
+        self._writer = None
+        self._stopping = False
+        # segment the writer thread is appending to, and its open file
+        self._writing = 0
+        self._file = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(self, path=None, commit_interval_ms=COMMIT_INTERVAL_MS):
+        self.path = path or None
+        self.interval = max(1.0, float(commit_interval_ms)) / 1000
+
+    def segment_path(self, number) -> str:
+        return f"{self.path}.{number:08d}"
+
+    def _segments(self) -> List[int]:
+        numbers = []
+        for name in glob.glob(f"{glob.escape(self.path)}.*"):
+            suffix = name.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                numbers.append(int(suffix))
+        return sorted(numbers)
+
+    # -------------------------
+    # Appending
+    # -------------------------
+    def record(self, lobby_code):
+        """Queue whatever changed in a lobby since it was last logged (a closed lobby logs its deletion)."""
+        if not self.enabled or not lobby_code:
+            return
+        fields = lobby_fields(lobby_code)
+        logged = self._logged.get(lobby_code)
+        if not fields and logged is None:
+            return
+        logged = logged or {}
+        rebase = self._based.get(lobby_code) != self.segment
+        current, changed, deltas = {}, {}, {}
+        for name, value in fields.items():
+            blob = current[name] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            before = logged.get(name)
+            if rebase or before is None:
+                changed[name] = blob
+            elif blob != before:
+                ops = []
+                _delta(pickle.loads(before), value, (), ops)
+                delta = pickle.dumps(ops, protocol=pickle.HIGHEST_PROTOCOL)
+                if len(delta) < len(blob):
+                    deltas[name] = delta
+                else:
+                    changed[name] = blob
+        deleted = [name for name in logged if name not in fields]
+        if fields:
+            self._logged[lobby_code] = current
+            self._based[lobby_code] = self.segment
+        else:
+            self._logged.pop(lobby_code, None)
+            self._based.pop(lobby_code, None)
+        if changed or deleted or deltas:
+            payload = pickle.dumps((lobby_code, changed, deleted, deltas), protocol=pickle.HIGHEST_PROTOCOL)
+            self._queue.append(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._start_writer()
+
+    def rotate(self) -> int:
+        """Send later records to a new segment; returns its number (what a snapshot taken now covers up to)."""
+        self.segment += 1
+        self._queue.append(_ROTATE)
+        self._start_writer()
+        return self.segment
+
+    def _start_writer(self):
+        if self._writer is None:
+            self._writer = _threading.Thread(target=self._write_forever, name="conundrum-wal", daemon=True)
+            self._writer.start()
+
+    def _write_forever(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[EventLog] commit failed: {e}")
+
+    def close(self):
+        """Stop the writer thread, write out everything queued and close the segment (at shutdown)."""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._stopping = True
+            self._wake.set()
+            writer.join()
+            self._stopping = False
+            self._wake.clear()
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def flush(self):
+        """Write and fsync everything queued (the writer thread does this every commit interval)."""
+        with self._lock:
+            batch = []
+            while self._queue:
+                item = self._queue.popleft()
+                if item is _ROTATE:
+                    self._write(batch)
+                    batch = []
+                    self._writing += 1
+                    if self._file:
+                        self._file.close()
+                        self._file = None
+                else:
+                    batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        if self._file is None:
+            self._file = open(self.segment_path(self._writing), "ab")
+        self._file.write(b"".join(batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def compact(self, upto):
+        """Delete segments older than upto, now covered by a snapshot."""
+        for number in self._segments():
+            if number < upto:
+                try:
+                    os.remove(self.segment_path(number))
+                except OSError as e:
+                    print(f"[EventLog] failed to remove segment {number}: {e}")
+
+    # -------------------------
+    # Recovery
+    # -------------------------
+    def replay(self, from_segment=0) -> int:
+        """Apply every record from from_segment on; returns how many were applied."""
+        applied = 0
+        segments = [n for n in self._segments() if n >= from_segment]
+        for number in segments:
+            with open(self.segment_path(number), "rb") as f:
+                data = f.read()
+            pos = 0
+            while pos + _RECORD_HEADER.size <= len(data):
+                length, crc = _RECORD_HEADER.unpack_from(data, pos)
+                payload = data[pos + _RECORD_HEADER.size:pos + _RECORD_HEADER.size + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    # torn write at the tail: everything after it never committed
+                    print(f"[EventLog] segment {number} ends in a partial record; ignoring the rest")
+                    break
+                self._apply(*pickle.loads(payload))
+                pos += _RECORD_HEADER.size + length
+                applied += 1
+        # never append to a segment that may end in a torn record
+        self.segment = self._writing = (segments[-1] + 1) if segments else from_segment
+        return applied
+
+    def _apply(self, lobby_code, changed, deleted, deltas=None):
+        objects = {name: pickle.loads(blob) for name, blob in changed.items()}
+        if deltas:
+            live = lobby_fields(lobby_code)
+            for name, delta in deltas.items():
+                if name in live:
+                    objects[name] = _patch(live[name], pickle.loads(delta))
+                else:
+                    print(f"[EventLog] delta for missing field {name} of {lobby_code}; skipped")
+        install_fields(lobby_code, objects, deleted)
+
+
+# single instance for easy import
+event_log = EventLog()
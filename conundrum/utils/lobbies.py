@@ -0,0 +1,159 @@
+# conundrum/utils/lobbies.py
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class Lobby:
+    """
+    One lobby's membership and voting state.
+      - players: join order (what clients are shown); members: the same names as a set for O(1) checks
+      - sids: player -> latest socket sid (a player reconnecting from a new page gets a new sid)
+      - votes: player -> answer ID voted for this round
+      - options: answers revealed for voting this round (see socket._reveal_options), or None
+    """
+
+    def __init__(self, code: str, host: str, max_players: int = 8):
+        self.code = code
+        self.host = host
+        self.max_players = max_players
+        self.game_mode: Optional[str] = None
+        self.players: List[str] = []
+        self.members: Set[str] = set()
+        self.sids: Dict[str, str] = {}
+        self.votes: Dict[str, int] = {}
+        self.options: Optional[Dict] = None
+        self._update_payload: Optional[Dict] = None
+
+    def __getstate__(self):
+        # the cached payload is rebuilt on demand, so it is not part of the stored state
+        state = self.__dict__.copy()
+        state["_update_payload"] = None
+        return state
+
+    def __contains__(self, player):
+        return player in self.members
+
+    def is_full(self) -> bool:
+        return len(self.players) >= self.max_players
+
+    def add(self, player) -> bool:
+        """Add a player at the end of the join order; False if the lobby is full."""
+        if player in self.members:
+            return True
+        if self.is_full():
+            return False
+        self.players.append(player)
+        self.members.add(player)
+        self._update_payload = None
+        return True
+
+    def remove(self, player):
+        if player not in self.members:
+            return
+        self.players.remove(player)
+        self.members.discard(player)
+        self.sids.pop(player, None)
+        self._update_payload = None
+
+    def set_host(self, player):
+        self.host = player
+        self._update_payload = None
+
+    def voters(self) -> List[str]:
+        """Players who vote this round (everyone but the host), in join order."""
+        return [p for p in self.players if p != self.host]
+
+    def reset_votes(self):
+        """Forget this round's votes and revealed answers."""
+        self.votes = {}
+        self.options = None
+
+    def lobby_update(self) -> Dict:
+        """The "lobby_update" payload, rebuilt only after membership or host changes."""
+        if self._update_payload is None:
+            self._update_payload = {"host": self.host, "players": list(self.players)}
+        return self._update_payload
+
+
+class LobbyRegistry:
+    """
+    The one place lobby state lives: lobby code -> Lobby, plus a sid index so a
+    socket event can be mapped back to the lobby and player that sent it.
+    """
+
+    def __init__(self):
+        self.lobbies: Dict[str, Lobby] = {}
+        # by_sid[sid] = (lobby_code, player)
+        self.by_sid: Dict[str, Tuple[str, str]] = {}
+
+    def __contains__(self, lobby_code):
+        return lobby_code in self.lobbies
+
+    def __len__(self):
+        return len(self.lobbies)
+
+    def get(self, lobby_code) -> Optional[Lobby]:
+        return self.lobbies.get(lobby_code) if lobby_code else None
+
+    def create(self, lobby_code, host, max_players: int = 8) -> Lobby:
+        """Register a new lobby with its host as first member."""
+        lobby = Lobby(lobby_code, host, max_players)
+        lobby.add(host)
+        self.lobbies[lobby_code] = lobby
+        return lobby
+
+    def bind(self, lobby, player, sid):
+        """Record which socket a member is on, replacing any earlier one."""
+        if not sid:
+            return
+        old_sid = lobby.sids.get(player)
+        if old_sid and old_sid != sid:
+            self.by_sid.pop(old_sid, None)
+        lobby.sids[player] = sid
+        self.by_sid[sid] = (lobby.code, player)
+
+    def resolve(self, sid) -> Tuple[Optional[Lobby], Optional[str]]:
+        """(lobby, player) a socket is bound to, or (None, None)."""
+        entry = self.by_sid.get(sid)
+        if not entry:
+            return None, None
+        lobby = self.lobbies.get(entry[0])
+        return (lobby, entry[1]) if lobby else (None, None)
+
+    def player_for(self, lobby, sid) -> Optional[str]:
+        """
+        The player behind a socket event: the member the sid is bound to in this lobby,
+        or None if it is not bound here (names sent by the client are never trusted).
+        """
+        entry = self.by_sid.get(sid)
+        if entry and entry[0] == lobby.code:
+            return entry[1]
+        return None
+
+    def unbind(self, sid) -> Tuple[Optional[Lobby], Optional[str]]:
+        """Drop a socket from the index; returns the (lobby, player) it was bound to, if still current."""
+        entry = self.by_sid.pop(sid, None)
+        if not entry:
+            return None, None
+        lobby = self.lobbies.get(entry[0])
+        if not lobby or lobby.sids.get(entry[1]) != sid:
+            # the player has already moved on to a newer socket
+            return None, None
+        del lobby.sids[entry[1]]
+        return lobby, entry[1]
+
+    def remove_player(self, lobby, player):
+        sid = lobby.sids.get(player)
+        if sid:
+            self.by_sid.pop(sid, None)
+        lobby.remove(player)
+
+    def remove(self, lobby_code):
+        lobby = self.lobbies.pop(lobby_code, None)
+        if lobby:
+            for sid in lobby.sids.values():
+                self.by_sid.pop(sid, None)
+        return lobby
+
+
+# single instance for easy import
+lobby_registry = LobbyRegistry()
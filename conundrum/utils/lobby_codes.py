@@ -0,0 +1,206 @@
+# conundrum/utils/lobby_codes.py
+"""
+Lobby code allocation without retries.
+
+Codes are issued by walking a keyed permutation of the whole code space: the
+i-th code handed out is feistel(i), so codes look random, never repeat and
+cost O(1) each no matter how many are in use. A code of even length splits
+into two halves of m = len(alphabet) ** (length / 2) values each, and a
+balanced Feistel network over Z_m x Z_m is a bijection on exactly the code
+space (no cycle walking needed).
+
+Released codes sit in quarantine for QUARANTINE_SECONDS (a late client must
+not land in someone else's new lobby) and then join a free list, which is
+only drawn from once the permutation has been used up.
+
+A sharded worker only issues codes it owns: set_share() narrows the walk to
+its ranges of code values, permuted the same way (a square domain of side
+ceil(sqrt(n)) with cycle walking, a couple of steps on average), so a code
+never costs more than O(1) however many workers there are.
+"""
+import math
+import random
+import string
+import time
+from bisect import bisect_right
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 4
+FEISTEL_ROUNDS = 4
+# Seconds a released code waits before it can be issued again
+QUARANTINE_SECONDS = 300.0
+
+
+class CodeAllocator:
+    def __init__(self, alphabet: str = CODE_ALPHABET, length: int = CODE_LENGTH, quarantine: float = QUARANTINE_SECONDS):
+        if length % 2:
+            raise ValueError("code length must be even")
+        self.alphabet = alphabet
+        self.length = length
+        self.quarantine = quarantine
+        self.half = len(alphabet) ** (length // 2)
+        self.space = self.half * self.half
+        self.clock = time.monotonic
+        self.share: List[Tuple[int, int]] = []
+        self.configure(random.Random())
+
+    def configure(self, rng: random.Random, quarantine: Optional[float] = None):
+        """Key the permutation from rng (e.g. lobby_rng.codes, so seeded runs issue the same codes) and start over."""
+        if quarantine is not None:
+            self.quarantine = max(0.0, float(quarantine))
+        # one random round function per Feistel round, as a lookup table over a half
+        self._rounds = [[rng.randrange(self.half) for _ in range(self.half)] for _ in range(FEISTEL_ROUNDS)]
+        # next position in the permutation
+        self.position = 0
+        self.in_use = set()
+        # quarantined: (code, release deadline) in release order; free: codes past quarantine
+        self.quarantined = deque()
+        self.resting = set()
+        self.free = deque()
+        self.skipped = 0
+        self.set_share(None)
+
+    def set_share(self, ranges: Optional[List[Tuple[int, int]]] = None):
+        """
+        Only issue codes whose values fall in ranges ([start, end) pairs, e.g. this worker's
+        part of the shard ring); None means the whole code space. A new share starts a fresh walk.
+        """
+        ranges = [(0, self.space)] if ranges is None else [(start, end) for start, end in ranges if start < end]
+        if ranges == self.share:
+            return
+        self.share = ranges
+        self._starts = [start for start, _ in ranges]
+        # _offsets[i] = position in the share of ranges[i]'s first code
+        self._offsets = []
+        self.size = 0
+        for start, end in ranges:
+            self._offsets.append(self.size)
+            self.size += end - start
+        self._side = math.isqrt(self.size - 1) + 1 if self.size else 0
+        self.position = 0
+
+    def _permute(self, index: int) -> int:
+        side = self._side
+        while True:
+            left, right = divmod(index, side)
+            for table in self._rounds:
+                left, right = right, (left + table[right]) % side
+            index = left * side + right
+            if index < self.size:
+                break
+        i = bisect_right(self._offsets, index) - 1
+        return self.share[i][0] + index - self._offsets[i]
+
+    def _decode(self, code: str) -> int:
+        value = 0
+        for c in code:
+            value = value * len(self.alphabet) + self.alphabet.index(c)
+        return value
+
+    def _in_share(self, code: str) -> bool:
+        value = self._decode(code)
+        i = bisect_right(self._starts, value) - 1
+        return i >= 0 and value < self.share[i][1]
+
+    def _encode(self, value: int) -> str:
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(self.length):
+            value, digit = divmod(value, base)
+            chars.append(self.alphabet[digit])
+        return "".join(reversed(chars))
+
+    def _release_quarantined(self):
+        now = self.clock()
+        while self.quarantined and self.quarantined[0][1] <= now:
+            code = self.quarantined.popleft()[0]
+            self.resting.discard(code)
+            self.free.append(code)
+
+    def allocate(self, accept: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Issue an unused code from the share. accept can turn codes down (taken elsewhere);
+        a code it rejects from the permutation is never offered again.
+        Raises RuntimeError when every code in the share is in use or quarantined.
+        """
+        self._release_quarantined()
+        while True:
+            if self.position < self.size:
+                code = self._encode(self._permute(self.position))
+                self.position += 1
+                if code in self.resting:
+                    # issued before the share changed and not out of quarantine yet
+                    self.skipped += 1
+                    continue
+            elif self.free:
+                code = self.free.popleft()
+                if not self._in_share(code):
+                    continue
+            else:
+                raise RuntimeError("no lobby codes left")
+            if code in self.in_use or (accept is not None and not accept(code)):
+                self.skipped += 1
+                continue
+            self.in_use.add(code)
+            return code
+
+    def claim(self, code):
+        """Mark a code issued some other way (restored from a snapshot, chosen by the client) as in use."""
+        self.in_use.add(code)
+
+    def release(self, code):
+        """A lobby closed: its code is quarantined, then reusable."""
+        if code in self.in_use:
+            self.in_use.discard(code)
+            self.quarantined.append((code, self.clock() + self.quarantine))
+            self.resting.add(code)
+
+    def state(self) -> Dict:
+        """Where the allocator is, for snapshots; quarantine deadlines are kept as seconds left."""
+        now = self.clock()
+        return {
+            "rounds": self._rounds,
+            "share": self.share,
+            "position": self.position,
+            "quarantined": [(code, deadline - now) for code, deadline in self.quarantined],
+            "free": list(self.free),
+            "skipped": self.skipped,
+        }
+
+    def restore(self, state: Dict):
+        """
+        Carry on from a state() taken by an earlier process: the same permutation from the
+        same position, so codes issued before the restart are not handed out again (if the
+        share changed meanwhile, the walk starts over; quarantined codes are still skipped).
+        Codes in use are claimed separately. A state for another code space is ignored.
+        """
+        rounds = state["rounds"]
+        if len(rounds) != FEISTEL_ROUNDS or any(len(table) != self.half for table in rounds):
+            print("[CodeAllocator] saved state is for a different code space; starting a fresh permutation")
+            return
+        now = self.clock()
+        self._rounds = rounds
+        if [tuple(r) for r in state.get("share", [(0, self.space)])] == self.share:
+            self.position = state["position"]
+        self.quarantined = deque((code, now + left) for code, left in state["quarantined"])
+        self.resting = {code for code, _ in self.quarantined}
+        self.free = deque(state["free"])
+        self.skipped = state["skipped"]
+
+    def stats(self) -> Dict:
+        self._release_quarantined()
+        return {
+            "space": self.space,
+            "in_use": len(self.in_use),
+            "occupancy": len(self.in_use) / self.space,
+            "quarantined": len(self.quarantined),
+            "free": len(self.free),
+            "fresh_remaining": self.size - self.position,
+            "skipped": self.skipped,
+        }
+
+
+# single instance for easy import
+code_allocator = CodeAllocator()
@@ -0,0 +1,242 @@
+# conundrum/utils/lobby_sync.py
+"""
+Moves one lobby's state between the live objects and the shared state store.
+
+A lobby is these fields in the store:
+  - "lobby":   the Lobby (members, host, votes, revealed options)
+  - "round":   its round_manager state, including the phase deadline
+  - "game":    the game manager's per-lobby dict for lobby.game_mode
+  - "dups":    that manager's near-duplicate index for the lobby
+  - "rng":     the state of the lobby's random stream
+  - "prompts": its prompt bank cursors, prefetched prompts and last tags
+  - "away":    players in their reconnection grace window -> deadline
+  - "sent":    what the room batcher last sent the room
+  - "bucket":  the lobby's rate-limit token bucket
+The last five are missing while empty. Together they are everything a worker
+keeps about a lobby, so any worker can serve any of its events (socket.synced
+re-arms a phase deadline it pulls). Only per-connection state stays with the
+worker holding the connection: sid bindings and sid rate-limit buckets.
+Batched room updates are flushed before every push, because the lobby's next
+event may be handled elsewhere.
+
+pull_lobby() runs before a handler and push_lobby() after it, both inside
+lobby_locked() so that two workers handling events for the same lobby take
+turns instead of overwriting each other's changes. Both compare pickled
+bytes with what was last seen, so unchanged fields are neither unpickled nor
+written. Nothing happens unless state_store.shared.
+
+When sharding is on, the owning worker's copy is the live one: a lobby is
+pulled only when it arrives cold after a handoff and pushed only when it is
+handed off (or deleted when it closes).
+"""
+import pickle
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+import random
+
+from conundrum.games.registry import MODES, get_mode
+from conundrum.utils.broadcast import room_batcher
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.presence import presence
+from conundrum.utils.prompt_bank import prompt_bank
+from conundrum.utils.rate_limit import rate_limiter
+from conundrum.utils.rng import lobby_rng
+from conundrum.utils.round_manager import round_manager
+from conundrum.utils.sharding import shard
+from conundrum.utils.state_store import state_store
+from conundrum.utils.timer_wheel import timer_wheel
+
+FIELDS = ("lobby", "round", "game", "dups", "rng", "prompts", "away", "sent", "bucket")
+
+# _seen[lobby_code] = {field: pickled bytes last read from / written to the store}
+_seen: Dict[str, Dict[str, bytes]] = {}
+
+
+def install_round_handler(lobby_code, manager):
+    """Point round_manager's end-of-round callbacks at the mode's manager."""
+    round_manager.set_handler(
+        lobby_code,
+        {
+            "on_round_end": lambda lc, rn: manager.end_round(lc),
+            "reset_round": lambda lc: manager.reset_round_state(lc),
+        },
+    )
+
+
+def lobby_fields(lobby_code) -> Dict[str, object]:
+    """The live objects making up a lobby, by field name; {} if the lobby is not held here."""
+    lobby = lobby_registry.get(lobby_code)
+    if not lobby:
+        return {}
+    fields = {"lobby": lobby}
+    if lobby_code in round_manager.state:
+        fields["round"] = round_manager.state[lobby_code]
+    game_mode = get_mode(lobby.game_mode)
+    if game_mode and game_mode.is_loaded():
+        manager = game_mode.manager
+        if lobby_code in manager.games:
+            fields["game"] = manager.games[lobby_code]
+        if lobby_code in manager.duplicates.lobbies:
+            fields["dups"] = manager.duplicates.lobbies[lobby_code]
+    if lobby_code in lobby_rng.streams:
+        fields["rng"] = lobby_rng.streams[lobby_code].getstate()
+    draws = prompt_bank.lobby_draws(lobby_code)
+    if draws:
+        fields["prompts"] = draws
+    away = presence.away(lobby_code)
+    if away:
+        fields["away"] = away
+    sent = room_batcher.sent.get(lobby_code)
+    if sent:
+        fields["sent"] = sent
+    bucket = rate_limiter.lobbies.table.get(lobby_code)
+    if bucket:
+        fields["bucket"] = bucket
+    return fields
+
+
+def diff_fields(fields: Dict[str, object], seen: Dict[str, bytes]) -> Tuple[Dict[str, bytes], List[str]]:
+    """
+    Pickle fields and compare with seen (name -> bytes, updated in place).
+    Returns (changed name -> bytes, names that are gone).
+    """
+    changed = {}
+    for name, value in fields.items():
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if blob != seen.get(name):
+            changed[name] = seen[name] = blob
+    deleted = [name for name in seen if name not in fields]
+    for name in deleted:
+        del seen[name]
+    return changed, deleted
+
+
+def install_fields(lobby_code, changed: Dict[str, object], deleted: Iterable[str] = ()):
+    """Put unpickled fields of a lobby into the live objects and drop the deleted ones."""
+    deleted = set(deleted)
+    if "lobby" in deleted:
+        drop_lobby(lobby_code)
+        return
+    if "lobby" in changed:
+        lobby_registry.lobbies[lobby_code] = changed["lobby"]
+    lobby = lobby_registry.get(lobby_code)
+    if not lobby:
+        return
+
+    if "round" in changed:
+        round_manager.state[lobby_code] = changed["round"]
+    elif "round" in deleted:
+        round_manager.unregister_lobby(lobby_code)
+
+    game_mode = get_mode(lobby.game_mode)
+    if game_mode:
+        manager = game_mode.manager
+        if "game" in changed:
+            manager.games[lobby_code] = changed["game"]
+        elif "game" in deleted:
+            manager.games.pop(lobby_code, None)
+        if "dups" in changed:
+            manager.duplicates.lobbies[lobby_code] = changed["dups"]
+        elif "dups" in deleted:
+            manager.duplicates.reset(lobby_code)
+        if lobby_code in round_manager.state and lobby_code not in round_manager.handlers:
+            install_round_handler(lobby_code, manager)
+
+    if "rng" in changed:
+        rng = lobby_rng.streams[lobby_code] = random.Random()
+        rng.setstate(changed["rng"])
+    elif "rng" in deleted:
+        lobby_rng.release(lobby_code)
+    if "prompts" in changed or "prompts" in deleted:
+        prompt_bank.install_draws(lobby_code, changed.get("prompts"))
+    if "away" in changed or "away" in deleted:
+        presence.install(lobby_code, changed.get("away", {}))
+    if "sent" in changed:
+        room_batcher.sent[lobby_code] = changed["sent"]
+    elif "sent" in deleted:
+        room_batcher.sent.pop(lobby_code, None)
+    if "bucket" in changed:
+        rate_limiter.lobbies.put(lobby_code, changed["bucket"])
+    elif "bucket" in deleted:
+        rate_limiter.forget_lobby(lobby_code)
+
+
+def drop_lobby(lobby_code):
+    """Forget the live objects of a lobby closed (or taken over) elsewhere."""
+    lobby_registry.remove(lobby_code)
+    round_manager.unregister_lobby(lobby_code)
+    for game_mode in MODES.values():
+        if game_mode.is_loaded():
+            game_mode.manager.release(lobby_code)
+    lobby_rng.release(lobby_code)
+    prompt_bank.release(lobby_code)
+    presence.forget_lobby(lobby_code)
+    room_batcher.release(lobby_code)
+    rate_limiter.forget_lobby(lobby_code)
+    timer_wheel.cancel(lobby_code)
+
+
+def shares_lobbies() -> bool:
+    """Whether any worker may handle any lobby's events (a shared store without sharding)."""
+    return state_store.shared and not shard.enabled
+
+
+def pull_lobby(lobby_code):
+    """Refresh the local copy of a lobby from the store (a lobby the store lacks is dropped locally)."""
+    if not state_store.shared or not lobby_code:
+        return
+    if shard.enabled and lobby_code in lobby_registry:
+        return
+    stored = state_store.load(lobby_code)
+    seen = _seen.get(lobby_code, {})
+    if not stored:
+        if seen:
+            # closed by another worker
+            _seen.pop(lobby_code, None)
+            drop_lobby(lobby_code)
+        return
+    if "lobby" not in stored:
+        return
+
+    changed = {name: pickle.loads(blob) for name, blob in stored.items() if blob != seen.get(name)}
+    install_fields(lobby_code, changed, [name for name in FIELDS if name not in stored])
+    _seen[lobby_code] = stored
+
+
+def push_lobby(lobby_code, handoff: bool = False):
+    """Write back the fields of a lobby that changed since the last pull/push, in one round trip."""
+    if not state_store.shared or not lobby_code:
+        return
+    if not shard.enabled:
+        # the lobby's next event may be handled by another worker, which only knows what was sent from "sent"
+        room_batcher.flush(lobby_code)
+    fields = lobby_fields(lobby_code)
+    if not fields:
+        if _seen.pop(lobby_code, None) is not None:
+            state_store.delete(lobby_code)
+        return
+    if shard.enabled and not handoff:
+        return
+
+    changed, deleted = diff_fields(fields, _seen.setdefault(lobby_code, {}))
+    state_store.save(lobby_code, changed, deleted)
+
+
+@contextmanager
+def lobby_locked(lobby_code):
+    """
+    Hold a lobby's lock in the shared store around pull -> handle -> push
+    (state_store.LobbyBusy if it cannot be had in time). Nothing to lock without a
+    shared store, or with sharding, where the owning worker is the only writer.
+    """
+    if not lobby_code or not shares_lobbies():
+        yield
+        return
+    with state_store.lock(lobby_code):
+        yield
+
+
+def forget_lobby(lobby_code):
+    """Drop what was last seen of a lobby this worker no longer holds."""
+    _seen.pop(lobby_code, None)
@@ -0,0 +1,237 @@
+# conundrum/utils/metrics.py
+"""
+Server metrics in the Prometheus text format, served at /metrics.
+
+Every socket handler is wrapped by instrumented(): per event it counts calls
+and exceptions and records the handler's latency in a fixed-bucket histogram.
+Events naming a lobby that exists here also go to that lobby's trace (see trace.py).
+Emits are counted by event name. Payload size (JSON, once per emit, not per
+recipient) is estimated: every EMIT_SAMPLE-th emit of an event is encoded and
+counts for EMIT_SAMPLE emits, so emitting never re-encodes every payload. Gauges (lobbies, players, rounds, ...) are read from
+the live objects when /metrics is scraped.
+
+Numbers are plain per-process counters with no locks: handlers run as
+greenlets that never yield in the middle of an update. Each worker reports
+its own numbers and Prometheus adds them up across workers.
+"""
+import json
+import sys
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Tuple
+
+from flask import g, has_app_context, has_request_context, request
+
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.trace import lobby_traces
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# one emit in this many (per event) is JSON-encoded to estimate emitted bytes
+EMIT_SAMPLE = 64
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# emits that mean the event being handled did not go through, as its trace outcome
+_OUTCOME_EVENTS = {"error_message": "rejected", "lobby_moved": "moved"}
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        # counts[i] = observations in bucket i alone (the last one is +Inf); made cumulative on render
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    if not isinstance(values, tuple):
+        values = (values,)
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        # events[event] = [calls, errors, Histogram]
+        self.events: Dict[str, list] = {}
+        # emitted[event] = [emits, estimated payload bytes]
+        self.emitted: Dict[str, list] = {}
+        # timings[(operation, kind)] = Histogram
+        self.timings: Dict[Tuple[str, str], Histogram] = {}
+        # gauges[name] = (help, type, label names, collect)
+        self.gauges: Dict[str, Tuple[str, str, Tuple[str, ...], Callable]] = {}
+        # handling[frame of a running instrumented handler] = its event (read by the profiler)
+        self.handling: Dict[object, str] = {}
+        self.clock = time.perf_counter
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def instrumented(self, event):
+        """Decorator: count calls and exceptions of a socket handler and time it."""
+        def decorator(handler):
+            @wraps(handler)
+            def wrapper(*args):
+                entry = self.events.get(event)
+                if entry is None:
+                    entry = self.events[event] = [0, 0, Histogram()]
+                entry[0] += 1
+                frame = sys._getframe()
+                self.handling[frame] = event
+                outcome = "ok"
+                started = self.clock()
+                try:
+                    return handler(*args)
+                except Exception as e:
+                    entry[1] += 1
+                    outcome = f"error: {type(e).__name__}"
+                    raise
+                finally:
+                    elapsed = self.clock() - started
+                    entry[2].observe(elapsed)
+                    del self.handling[frame]
+                    # a rejection the handler reported itself; an exception outranks it
+                    reported = g.pop("trace_outcome", None) if has_app_context() else None
+                    if reported and outcome == "ok":
+                        outcome = reported
+                    data = args[0] if args else None
+                    lobby_code = data.get("lobbyCode") if isinstance(data, dict) else None
+                    if self._traced(lobby_code, outcome):
+                        player = data.get("player") or data.get("username")
+                        lobby_traces.record(lobby_code, event, player, outcome, elapsed)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _traced(lobby_code, outcome) -> bool:
+        """
+        Whether an event goes to its lobby's trace. Any client can send any code, so only
+        lobbies that exist here get one, and throttled events only from their own members
+        (an outsider being throttled would otherwise push the lobby's real events out).
+        """
+        if not isinstance(lobby_code, str) or lobby_code not in lobby_registry:
+            return False
+        if outcome != "throttled":
+            return True
+        entry = lobby_registry.by_sid.get(request.sid) if has_request_context() else None
+        return bool(entry) and entry[0] == lobby_code
+
+    @contextmanager
+    def timed(self, operation, kind=""):
+        """Time a block into the operation's histogram, e.g. timed("moderation", "chat")."""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(operation, kind, self.clock() - started)
+
+    def observe(self, operation, kind, seconds):
+        key = (operation, kind)
+        histogram = self.timings.get(key)
+        if histogram is None:
+            histogram = self.timings[key] = Histogram()
+        histogram.observe(seconds)
+
+    def count_emits(self, socketio):
+        """Wrap socketio.emit (which flask_socketio.emit also goes through) to count emits and estimate bytes."""
+        emit = socketio.emit
+
+        @wraps(emit)
+        def counted(event, *args, **kwargs):
+            entry = self.emitted.get(event)
+            if entry is None:
+                entry = self.emitted[event] = [0, 0]
+            entry[0] += 1
+            if (entry[0] - 1) % EMIT_SAMPLE == 0:
+                try:
+                    entry[1] += EMIT_SAMPLE * len(json.dumps(args, separators=(",", ":"), default=str))
+                except (TypeError, ValueError):
+                    pass
+            if event in _OUTCOME_EVENTS and has_app_context():
+                # inside a handler: the first one decides its trace outcome
+                payload = args[0] if args and isinstance(args[0], dict) else {}
+                outcome = "throttled" if payload.get("throttled") else _OUTCOME_EVENTS[event]
+                if payload.get("message") and outcome == "rejected":
+                    outcome = f"rejected: {payload['message']}"
+                g.setdefault("trace_outcome", outcome)
+            return emit(event, *args, **kwargs)
+        socketio.emit = counted
+
+    def gauge(self, name, help_text, collect: Callable, labels: Tuple[str, ...] = (), kind="gauge"):
+        """
+        Register a value read at scrape time. collect() returns a number, or with
+        labels a {label value (tuple if several): number} mapping.
+        """
+        self.gauges[name] = (help_text, kind, tuple(labels), collect)
+
+    # -------------------------
+    # Exposition
+    # -------------------------
+    def render(self) -> str:
+        lines = []
+
+        def family(name, help_text, kind):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, label_names, rows):
+            for label_values, hist in rows:
+                if not isinstance(label_values, tuple):
+                    label_values = (label_values,)
+                cumulative = 0
+                for bound, count in zip(hist.bounds + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(label_names + ('le',), label_values + (le,))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(label_names, label_values)} {hist.sum}")
+                lines.append(f"{name}_count{_labels(label_names, label_values)} {cumulative}")
+
+        events = sorted(self.events.items())
+        family("conundrum_socket_events_total", "Socket events handled.", "counter")
+        lines.extend(f"conundrum_socket_events_total{_labels(('event',), e)} {v[0]}" for e, v in events)
+        family("conundrum_socket_event_errors_total", "Socket handlers that raised.", "counter")
+        lines.extend(f"conundrum_socket_event_errors_total{_labels(('event',), e)} {v[1]}" for e, v in events)
+        family("conundrum_socket_event_seconds", "Socket handler latency.", "histogram")
+        histogram("conundrum_socket_event_seconds", ("event",), [(e, v[2]) for e, v in events])
+
+        emitted = sorted(self.emitted.items())
+        family("conundrum_emits_total", "Socket.IO emits, by event.", "counter")
+        lines.extend(f"conundrum_emits_total{_labels(('event',), e)} {v[0]}" for e, v in emitted)
+        family("conundrum_emitted_bytes_total", "Estimated JSON payload bytes emitted (once per emit, not per recipient; sampled).", "counter")
+        lines.extend(f"conundrum_emitted_bytes_total{_labels(('event',), e)} {v[1]}" for e, v in emitted)
+
+        family("conundrum_operation_seconds", "Time spent in internal operations (moderation, ...).", "histogram")
+        histogram("conundrum_operation_seconds", ("operation", "kind"), sorted(self.timings.items()))
+
+        for name, (help_text, kind, label_names, collect) in self.gauges.items():
+            try:
+                value = collect()
+            except Exception as e:
+                print(f"[Metrics] collecting {name} failed: {e}")
+                continue
+            family(name, help_text, kind)
+            if label_names:
+                lines.extend(f"{name}{_labels(label_names, k)} {v}" for k, v in sorted(value.items()))
+            else:
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# single instance for easy import
+metrics = Metrics()
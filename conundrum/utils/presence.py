@@ -0,0 +1,94 @@
+# conundrum/utils/presence.py
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds a disconnected player has to come back before being removed from their lobby
+RECONNECT_GRACE = 15.0
+# How often the reaper looks for players whose grace window has run out
+REAP_INTERVAL = 1.0
+
+
+class Presence:
+    """
+    Players whose socket went away, waiting out the reconnection grace window.
+    Every entry gets the same grace, so insertion order is deadline order and
+    expired entries are always at the front: due() pops them in O(1) each.
+
+    Deadlines are wall-clock times so that workers sharing a lobby agree on
+    them: a lobby's entries travel through the state store with the rest of
+    the lobby (see lobby_sync). An entry installed from the store can land
+    behind later deadlines; it is then reaped at most one grace window late.
+    """
+
+    def __init__(self):
+        self.grace = RECONNECT_GRACE
+        # departed[(lobby_code, player)] = deadline
+        self.departed: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        # by_lobby[lobby_code][player] = deadline, the same entries indexed by lobby
+        self.by_lobby: Dict[str, Dict[str, float]] = {}
+        self.clock = time.time
+
+    def configure(self, grace_seconds=RECONNECT_GRACE):
+        self.grace = max(0.0, float(grace_seconds))
+
+    def _add(self, lobby_code, player, deadline):
+        key = (lobby_code, player)
+        self.departed.pop(key, None)
+        self.departed[key] = deadline
+        self.by_lobby.setdefault(lobby_code, {})[player] = deadline
+
+    def _drop(self, lobby_code, player) -> bool:
+        if self.departed.pop((lobby_code, player), None) is None:
+            return False
+        away = self.by_lobby[lobby_code]
+        del away[player]
+        if not away:
+            del self.by_lobby[lobby_code]
+        return True
+
+    def disconnected(self, lobby_code, player):
+        self._add(lobby_code, player, self.clock() + self.grace)
+
+    def reconnected(self, lobby_code, player) -> bool:
+        """Cancel a pending removal; True if the player was inside their grace window."""
+        return self._drop(lobby_code, player)
+
+    def is_away(self, lobby_code, player) -> bool:
+        return (lobby_code, player) in self.departed
+
+    def due(self) -> Dict[str, List[str]]:
+        """Pop every player whose grace ran out, grouped as lobby_code -> [player, ...]."""
+        now = self.clock()
+        expired: Dict[str, List[str]] = {}
+        while self.departed:
+            key, deadline = next(iter(self.departed.items()))
+            if deadline > now:
+                break
+            self._drop(*key)
+            expired.setdefault(key[0], []).append(key[1])
+        return expired
+
+    def away(self, lobby_code) -> Dict[str, float]:
+        """A lobby's players in their grace window: player -> deadline."""
+        return self.by_lobby.get(lobby_code, {})
+
+    def install(self, lobby_code, away: Dict[str, float]):
+        """Make a lobby's entries exactly away (as read from the state store)."""
+        current = self.by_lobby.get(lobby_code, {})
+        for player in [p for p in current if p not in away]:
+            self._drop(lobby_code, player)
+        for player, deadline in away.items():
+            if current.get(player) != deadline:
+                self._add(lobby_code, player, deadline)
+
+    def forget(self, lobby_code, players: Iterable[str]):
+        for player in players:
+            self._drop(lobby_code, player)
+
+    def forget_lobby(self, lobby_code):
+        self.forget(lobby_code, list(self.away(lobby_code)))
+
+
+# single instance for easy import
+presence = Presence()
@@ -0,0 +1,154 @@
+# conundrum/utils/profiler.py
+"""
+On-demand sampling profiler for a live worker.
+
+Every greenlet runs on the one OS thread that hosts the eventlet hub, so a
+sample is simply that thread's current stack: whichever greenlet is running
+(or the hub, waiting for I/O, when the worker is idle). A real OS thread
+takes SAMPLE_INTERVAL_MS samples while the worker keeps serving; nothing is
+traced, so the overhead is one stack walk per interval.
+
+A profile can be scoped to socket events: samples whose stack is not inside
+a handler for one of them (see metrics.instrumented) are dropped. Results
+come out as collapsed stacks (flamegraph.pl / speedscope) or as a pstats
+file (python -m pstats, snakeviz).
+"""
+import marshal
+import sys
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+try:
+    # the sampler must be a real thread: a greenlet would only ever sample itself
+    from eventlet.patcher import original
+    _threading = original("threading")
+except ImportError:
+    import threading as _threading
+
+from conundrum.utils.metrics import metrics
+
+# Milliseconds between samples
+SAMPLE_INTERVAL_MS = 5
+# Longest profile one request may ask for
+MAX_SECONDS = 60.0
+
+
+def running_stack(thread_id):
+    """(frames of what a thread is running now, innermost first; the socket event it is handling or None)."""
+    frames = []
+    event = None
+    frame = sys._current_frames().get(thread_id)
+    while frame is not None:
+        if event is None:
+            event = metrics.handling.get(frame)
+        frames.append(frame)
+        frame = frame.f_back
+    return frames, event
+
+
+class Profile:
+    """Samples of one run: stack (root first, as (file, first line, function)) -> count."""
+
+    def __init__(self, interval: float, events: Optional[frozenset]):
+        self.interval = interval
+        self.events = events
+        self.samples: Counter = Counter()
+        # samples outside the requested events
+        self.skipped = 0
+        self.started = time.time()
+        self.duration = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """One "root;...;leaf count" line per distinct stack."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            frames = ";".join(f"{name} ({filename}:{line})" for filename, line, name in stack)
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def pstats(self) -> bytes:
+        """The samples as a marshalled pstats table; a sample stands for interval seconds."""
+        # stats[function] = [calls, calls, own time, cumulative time, {caller: [...]}]
+        stats = {}
+
+        def entry(function):
+            if function not in stats:
+                stats[function] = [0, 0, 0.0, 0.0, {}]
+            return stats[function]
+
+        for stack, count in self.samples.items():
+            elapsed = count * self.interval
+            leaf = entry(stack[-1])
+            leaf[2] += elapsed
+            # recursion: a function counts once per sample
+            for function in set(stack):
+                row = entry(function)
+                row[0] += count
+                row[1] += count
+                row[3] += elapsed
+            for caller, callee in set(zip(stack, stack[1:])):
+                calls = entry(callee)[4].setdefault(caller, [0, 0, 0.0, 0.0])
+                calls[0] += count
+                calls[1] += count
+                calls[3] += elapsed
+        return marshal.dumps({
+            function: (row[0], row[1], row[2], row[3], {c: tuple(v) for c, v in row[4].items()})
+            for function, row in stats.items()
+        })
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms: float = SAMPLE_INTERVAL_MS):
+        self.interval = max(1.0, float(interval_ms)) / 1000
+        self._lock = _threading.Lock()
+        self._stop = _threading.Event()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, events: Optional[Iterable[str]] = None, sleep=time.sleep) -> Optional[Profile]:
+        """
+        Sample the calling thread for seconds; None if a profile is already running.
+        Call it from a greenlet with sleep=socketio.sleep so the worker keeps serving meanwhile.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            profile = Profile(self.interval, frozenset(events) if events else None)
+            self._stop.clear()
+            sampler = _threading.Thread(
+                target=self._sample,
+                args=(_threading.get_ident(), profile),
+                name="conundrum-profiler",
+                daemon=True,
+            )
+            started = time.monotonic()
+            sampler.start()
+            sleep(min(max(0.0, float(seconds)), MAX_SECONDS))
+            self._stop.set()
+            sampler.join()
+            profile.duration = time.monotonic() - started
+            return profile
+        finally:
+            self._lock.release()
+
+    def _sample(self, thread_id, profile):
+        while not self._stop.wait(self.interval):
+            frames, event = running_stack(thread_id)
+            if not frames:
+                continue
+            if profile.events is not None and event not in profile.events:
+                profile.skipped += 1
+                continue
+            stack = tuple((f.f_code.co_filename, f.f_code.co_firstlineno, f.f_code.co_name) for f in reversed(frames))
+            profile.samples[stack] += 1
+
+
+# single instance for easy import
+profiler = SamplingProfiler()
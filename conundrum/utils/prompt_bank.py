@@ -0,0 +1,243 @@
+# conundrum/utils/prompt_bank.py
+import json
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+from conundrum.utils.question_pack import QuestionPack
+from conundrum.utils.rng import lobby_rng
+
+# game mode -> prompt file
+PROMPT_FILES = {
+    "bad_advice_hotline": "data/bad_advice_questions.json",
+}
+
+
+class _Cursor:
+    """
+    Lazy Fisher-Yates walk over a tuple (or range) of prompt indices.
+    Each draw is O(1) and only the swapped slots are stored, so a lobby
+    costs nothing per prompt in the bank, only per prompt it has drawn.
+    The latest draw can be taken back (see undo).
+    """
+    __slots__ = ("indices", "pos", "swaps", "last")
+
+    def __init__(self, indices):
+        self.indices = indices
+        self.pos = 0
+        self.swaps = {}
+        # (slot drawn from, what slot j and slot pos held before), for undo
+        self.last = None
+
+    def next(self, rng):
+        size = len(self.indices)
+        if self.pos >= size:
+            # bank exhausted: start a fresh pass
+            self.pos = 0
+            self.swaps.clear()
+        j = rng.randrange(self.pos, size)
+        self.last = (j, self.swaps.get(j), self.swaps.get(self.pos))
+        picked = self.swaps.get(j, j)
+        self.swaps[j] = self.swaps.get(self.pos, self.pos)
+        self.pos += 1
+        return self.indices[picked]
+
+    def undo(self):
+        """Put back the prompt the latest next() took, so a later draw can still pick it."""
+        if self.last is None:
+            return
+        j, at_j, at_pos = self.last
+        self.last = None
+        self.pos -= 1
+        for slot, held in ((self.pos, at_pos), (j, at_j)):
+            if held is None:
+                self.swaps.pop(slot, None)
+            else:
+                self.swaps[slot] = held
+
+
+class PromptBank:
+    """
+    Read-only prompt store shared by every lobby, indexed by game mode and tag,
+    with per-lobby no-repeat draws.
+
+    File entries are either plain strings or {"prompt": str, "tags": [str, ...]}.
+    Modes backed by a QuestionPack draw (prompt, solution) records instead,
+    with the pack's categories acting as tags.
+    """
+
+    def __init__(self):
+        # prompts[mode] = tuple of prompt strings, or a QuestionPack
+        self.prompts: Dict[str, Sequence] = {}
+        # tags[mode][tag] = indices into prompts[mode] (tuple, or range for packs); tag None = whole mode
+        self.tags: Dict[str, Dict[Optional[str], Sequence[int]]] = {}
+        # cursors[lobby_code][(mode, tag)] = _Cursor
+        self.cursors: Dict[str, Dict[Tuple[str, Optional[str]], _Cursor]] = {}
+        # prefetched[lobby_code][(mode, tag)] = prompt drawn ahead of the next round
+        self.prefetched: Dict[str, Dict[Tuple[str, Optional[str]], object]] = {}
+        # last_tags[lobby_code][mode] = tag of the lobby's latest draw, what the next prefetch uses
+        self.last_tags: Dict[str, Dict[str, Optional[str]]] = {}
+
+    @classmethod
+    def from_json(cls, files):
+        """A bank holding every mode -> path in files (see load_files)."""
+        bank = cls()
+        bank.load_files(files)
+        return bank
+
+    def load_files(self, files):
+        """Load every mode -> path in files; a file that fails to load leaves that mode empty."""
+        for mode, path in files.items():
+            try:
+                with open(os.path.abspath(path), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, list):
+                    raise ValueError("prompt JSON must be a list")
+                self.add_prompts(mode, data)
+            except Exception as e:
+                print(f"[PromptBank] failed to load '{path}': {e}. Mode '{mode}' has no prompts.")
+
+    def load_packs(self, files, directory="."):
+        """Attach the question packs in files (relative to directory) that exist; missing packs are skipped."""
+        for mode, name in files.items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                continue
+            try:
+                self.add_pack(mode, QuestionPack(path))
+            except Exception as e:
+                print(f"[PromptBank] failed to open pack '{path}': {e}.")
+
+    def add_pack(self, mode, pack):
+        """Serve a mode from a memory-mapped pack; nothing is decoded until drawn."""
+        self.prompts[mode] = pack
+        self.tags[mode] = dict(pack.categories)
+        self.tags[mode][None] = range(len(pack))
+
+    def add_prompts(self, mode, entries):
+        """Index entries for a mode, replacing whatever it held before."""
+        prompts = []
+        tags: Dict[Optional[str], list] = {}
+        for entry in entries:
+            if isinstance(entry, dict):
+                text = entry.get("prompt")
+                entry_tags = entry.get("tags", []) or []
+            else:
+                text, entry_tags = entry, []
+            if not text:
+                continue
+            for tag in entry_tags:
+                tags.setdefault(str(tag).lower(), []).append(len(prompts))
+            prompts.append(str(text))
+
+        self.prompts[mode] = tuple(prompts)
+        self.tags[mode] = {tag: tuple(idx) for tag, idx in tags.items()}
+        self.tags[mode][None] = tuple(range(len(prompts)))
+
+    def has_prompts(self, mode, tag=None) -> bool:
+        return bool(self.tags.get(mode, {}).get(tag))
+
+    def draw(self, lobby_code, mode, tag=None):
+        """
+        Next prompt for a lobby, never repeating until the mode (or tag) is exhausted.
+        Returns a string for prompt files, a (prompt, solution) tuple for packs, or None.
+        """
+        tag = tag.lower() if tag else None
+        key = (mode, tag)
+        self.last_tags.setdefault(lobby_code, {})[mode] = tag
+        pending = self.prefetched.get(lobby_code)
+        if pending:
+            if key in pending:
+                return pending.pop(key)
+            # the host asked for another tag: prompts prefetched for this mode go back to their cursors
+            for stale in [k for k in pending if k[0] == mode]:
+                del pending[stale]
+                cursor = self.cursors.get(lobby_code, {}).get(stale)
+                if cursor:
+                    cursor.undo()
+        return self._draw(lobby_code, mode, tag)
+
+    def _draw(self, lobby_code, mode, tag):
+        key = (mode, tag)
+        indices = self.tags.get(mode, {}).get(tag)
+        if not indices:
+            return None
+        lobby_cursors = self.cursors.setdefault(lobby_code, {})
+        cursor = lobby_cursors.get(key)
+        if cursor is None:
+            cursor = lobby_cursors[key] = _Cursor(indices)
+        return self.prompts[mode][cursor.next(lobby_rng.for_lobby(lobby_code))]
+
+    def last_tag(self, lobby_code, mode) -> Optional[str]:
+        """The tag the lobby last drew this mode's prompts with (None: untagged, or never drawn)."""
+        return self.last_tags.get(lobby_code, {}).get(mode)
+
+    def prefetch(self, lobby_code, mode, tag=None):
+        """Draw the next round's prompt now (e.g. during voting) so starting the round is a lookup."""
+        tag = tag.lower() if tag else None
+        pending = self.prefetched.setdefault(lobby_code, {})
+        if (mode, tag) not in pending:
+            prompt = self._draw(lobby_code, mode, tag)
+            if prompt is None:
+                return None
+            pending[(mode, tag)] = prompt
+        return pending[(mode, tag)]
+
+    def release(self, lobby_code):
+        """Forget a lobby's cursors and prefetched prompts."""
+        self.cursors.pop(lobby_code, None)
+        self.prefetched.pop(lobby_code, None)
+        self.last_tags.pop(lobby_code, None)
+
+    def lobby_draws(self, lobby_code) -> Optional[Dict]:
+        """
+        A lobby's place in its draws (cursors as (pos, swaps, last), prefetched prompts, last tags),
+        or None if it has drawn nothing.
+        """
+        cursors = self.cursors.get(lobby_code)
+        pending = self.prefetched.get(lobby_code)
+        tags = self.last_tags.get(lobby_code)
+        if not (cursors or pending or tags):
+            return None
+        return {
+            "cursors": {key: (c.pos, dict(c.swaps), c.last) for key, c in (cursors or {}).items()},
+            "prefetched": dict(pending or {}),
+            "last_tags": dict(tags or {}),
+        }
+
+    def install_draws(self, lobby_code, saved: Optional[Dict]):
+        """Put back what lobby_draws() returned; cursors over a mode or tag whose prompts changed start over."""
+        self.release(lobby_code)
+        if not saved:
+            return
+        # (pos, swaps) before undo was added
+        for (mode, tag), (pos, swaps, *last) in saved.get("cursors", {}).items():
+            indices = self.tags.get(mode, {}).get(tag)
+            if not indices or pos > len(indices) or any(max(j, i) >= len(indices) for j, i in swaps.items()):
+                continue
+            cursor = _Cursor(indices)
+            cursor.pos, cursor.swaps = pos, dict(swaps)
+            cursor.last = last[0] if last else None
+            self.cursors.setdefault(lobby_code, {})[(mode, tag)] = cursor
+        if saved.get("prefetched"):
+            self.prefetched[lobby_code] = dict(saved["prefetched"])
+        if saved.get("last_tags"):
+            self.last_tags[lobby_code] = dict(saved["last_tags"])
+
+    def draws(self) -> Dict:
+        """Every lobby's draws for snapshots: {"cursors": {code: ...}, "prefetched": {code: ...}, "last_tags": {code: ...}}."""
+        saved = {"cursors": {}, "prefetched": {}, "last_tags": {}}
+        for code in set(self.cursors) | set(self.prefetched) | set(self.last_tags):
+            for part, value in (self.lobby_draws(code) or {}).items():
+                if value:
+                    saved[part][code] = value
+        return saved
+
+    def restore_draws(self, saved):
+        """Put back what draws() returned, replacing every lobby's draws."""
+        self.cursors, self.prefetched, self.last_tags = {}, {}, {}
+        for code in set().union(*(saved.get(part, {}) for part in ("cursors", "prefetched", "last_tags"))):
+            self.install_draws(code, {part: saved.get(part, {}).get(code, {}) for part in ("cursors", "prefetched", "last_tags")})
+
+
+# single instance for easy import (prompt files are loaded by socket.py, packs by create_app)
+prompt_bank = PromptBank()
@@ -0,0 +1,188 @@
+# conundrum/utils/question_pack.py
+"""
+Memory-mapped question packs for very large trivia banks.
+
+Layout (little-endian):
+
+    header    magic "CQPK", version u16, reserved u16, record_count u32,
+              category_count u32, categories_offset u64, index_offset u64
+    records   per record: prompt_len u32, prompt utf-8, solution_len u32, solution utf-8
+    categories  per category: name_len u16, name utf-8, start u32, end u32
+    index     (record_count + 1) x u64 record offsets
+
+Records are stored grouped by category, so every category is one contiguous
+ID range and filtering is just picking an index range. Opening a pack parses
+only the header and category table; a record is decoded when it is read.
+Every worker mapping the same file shares its pages through the OS page cache.
+
+Packs are built from a JSON list of {"category", "prompt", "solution"} objects
+(or [category, prompt, solution] lists):
+
+    python -m conundrum.utils.question_pack build questions.json data/packs/obviously_lies.pack
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+MAGIC = b"CQPK"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIIQQ")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_RANGE = struct.Struct("<II")
+
+# Directory the server loads packs from (CONUNDRUM_PACK_DIR)
+PACK_DIR = "data/packs"
+
+# game mode -> pack file in the pack directory; records are (prompt, solution):
+#   obviously_lies   -> (question, correct answer)
+#   reverse_guessing -> (answer, correct question)
+PACK_FILES = {
+    "obviously_lies": "obviously_lies.pack",
+    "reverse_guessing": "reverse_guessing.pack",
+}
+
+
+def write_pack(path, records: Iterable[Tuple[str, str, str]]):
+    """Write (category, prompt, solution) records to a pack file at path."""
+    by_category: Dict[str, list] = {}
+    for category, prompt, solution in records:
+        by_category.setdefault(str(category or "general").lower(), []).append((prompt, solution))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        offsets = []
+        ranges = []
+        count = 0
+        for category in sorted(by_category):
+            start = count
+            for prompt, solution in by_category[category]:
+                offsets.append(f.tell())
+                for field in (prompt, solution):
+                    raw = str(field).encode("utf-8")
+                    f.write(_U32.pack(len(raw)))
+                    f.write(raw)
+                count += 1
+            ranges.append((category, start, count))
+        offsets.append(f.tell())
+
+        categories_offset = f.tell()
+        for category, start, end in ranges:
+            raw = category.encode("utf-8")
+            f.write(_U16.pack(len(raw)))
+            f.write(raw)
+            f.write(_RANGE.pack(start, end))
+
+        index_offset = f.tell()
+        for off in offsets:
+            f.write(_U64.pack(off))
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, count, len(ranges), categories_offset, index_offset))
+    os.replace(tmp_path, path)
+
+
+class QuestionPack:
+    """Read-only, random-access view over a pack file."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, n_categories, categories_offset, index_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a question pack")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} has unsupported pack version {version}")
+
+        self._count = count
+        self._index_offset = index_offset
+
+        # categories[name] = range of record IDs
+        self.categories: Dict[str, range] = {}
+        pos = categories_offset
+        for _ in range(n_categories):
+            (name_len,) = _U16.unpack_from(self._mm, pos)
+            pos += _U16.size
+            name = self._mm[pos:pos + name_len].decode("utf-8")
+            pos += name_len
+            start, end = _RANGE.unpack_from(self._mm, pos)
+            pos += _RANGE.size
+            self.categories[name] = range(start, end)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, record_id) -> Tuple[str, str]:
+        """Decode a single record as (prompt, solution)."""
+        if not 0 <= record_id < self._count:
+            raise IndexError(f"record {record_id} out of range")
+        (pos,) = _U64.unpack_from(self._mm, self._index_offset + record_id * _U64.size)
+        fields = []
+        for _ in range(2):
+            (length,) = _U32.unpack_from(self._mm, pos)
+            pos += _U32.size
+            fields.append(self._mm[pos:pos + length].decode("utf-8"))
+            pos += length
+        return fields[0], fields[1]
+
+    def category_range(self, category) -> range:
+        return self.categories.get(str(category).lower(), range(0))
+
+    def close(self):
+        self._mm.close()
+
+
+def read_source(path) -> List[Tuple[str, str, str]]:
+    """(category, prompt, solution) records from a JSON source file; ValueError on a bad entry."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("pack source JSON must be a list")
+    records = []
+    for n, entry in enumerate(data):
+        if isinstance(entry, dict):
+            category, prompt, solution = entry.get("category"), entry.get("prompt"), entry.get("solution")
+        elif isinstance(entry, (list, tuple)) and len(entry) == 3:
+            category, prompt, solution = entry
+        else:
+            raise ValueError(f"entry {n}: expected an object or a [category, prompt, solution] list")
+        if not isinstance(prompt, str) or not prompt or not isinstance(solution, str) or not solution:
+            raise ValueError(f"entry {n}: prompt and solution must be non-empty strings")
+        records.append((category, prompt, solution))
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m conundrum.utils.question_pack", description="Build question packs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="write a pack from a JSON source file")
+    build.add_argument("source", help="JSON list of {category, prompt, solution}")
+    build.add_argument("output", help="pack file to write, e.g. data/packs/obviously_lies.pack")
+    args = parser.parse_args(argv)
+
+    try:
+        records = read_source(args.source)
+    except (OSError, ValueError) as e:
+        sys.exit(f"{args.source}: {e}")
+    write_pack(args.output, records)
+    pack = QuestionPack(args.output)
+    print(f"wrote {len(pack)} records in {len(pack.categories)} categories to {args.output}")
+    pack.close()
+
+
+if __name__ == "__main__":
+    main()
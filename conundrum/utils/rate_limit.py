@@ -0,0 +1,164 @@
+# conundrum/utils/rate_limit.py
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Per connection: bursts of up to SID_BURST tokens, refilled at SID_RATE tokens/second
+SID_RATE = 5.0
+SID_BURST = 10.0
+# Per lobby (all of its connections together), for lobbies of up to LOBBY_PLAYERS;
+# bigger lobbies get a proportionally bigger bucket
+LOBBY_RATE = 40.0
+LOBBY_BURST = 80.0
+LOBBY_PLAYERS = 16
+
+# Tokens each event costs; events not listed are never limited
+DEFAULT_COSTS = {
+    "create_lobby": 2.0,
+    "join_lobby": 1.0,
+    "send_message": 1.0,
+    "start_game": 1.0,
+    "end_round": 1.0,
+}
+
+# Costs for every game mode's own events, by kind (submissions run moderation, so cost more)
+MODE_COSTS = {
+    "start_round": 1.0,
+    "submit": 2.0,
+    "vote": 1.0,
+}
+
+
+class _Buckets:
+    """
+    Token buckets keyed by sid or lobby code: key -> [tokens, last refill time, scale].
+    A bucket's rate and burst are the base ones times its scale, so every bucket
+    refills from empty in idle_after seconds. Kept in least-recently-used order,
+    so buckets idle long enough to be full again (i.e. no different from a fresh
+    one) are dropped from the front in O(1).
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.idle_after = burst / rate if rate else float("inf")
+        self.table: "OrderedDict[str, list]" = OrderedDict()
+
+    def take(self, key, cost, now, scale=1.0) -> float:
+        """Spend cost tokens; returns 0.0 if allowed, else seconds until it would be."""
+        burst = self.burst * scale
+        rate = self.rate * scale
+        bucket = self.table.get(key)
+        if bucket is None:
+            bucket = self.table[key] = [burst, now, scale]
+        else:
+            bucket[0] = min(burst, bucket[0] + max(0.0, now - bucket[1]) * rate)
+            bucket[1] = now
+            bucket[2] = scale
+            self.table.move_to_end(key)
+
+        # expire at most a couple of idle buckets per call; amortized O(1)
+        for _ in range(2):
+            oldest_key, oldest = next(iter(self.table.items()))
+            if oldest_key == key or now - oldest[1] < self.idle_after:
+                break
+            del self.table[oldest_key]
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / rate if rate else float("inf")
+
+    def refund(self, key, cost):
+        bucket = self.table.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst * bucket[2], bucket[0] + cost)
+
+    def put(self, key, bucket):
+        """Install a bucket as read from elsewhere (the state store), as the most recently used."""
+        self.table[key] = list(bucket)
+        self.table.move_to_end(key)
+
+    def forget(self, key):
+        self.table.pop(key, None)
+
+
+class RateLimiter:
+    """
+    Per-sid and per-lobby token buckets for socket events, with allow/throttle counters.
+    Refill times are wall-clock, so a lobby's bucket can travel through the state store
+    to whichever worker handles the lobby's next event (see lobby_sync); sid buckets
+    stay with the worker holding the connection.
+    """
+
+    def __init__(self, costs: Optional[Dict[str, float]] = None):
+        self.costs: Dict[str, float] = dict(DEFAULT_COSTS if costs is None else costs)
+        self.sids = _Buckets(SID_RATE, SID_BURST)
+        self.lobbies = _Buckets(LOBBY_RATE, LOBBY_BURST)
+        # counters[event] = {"allowed": int, "throttled": int}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.clock = time.time
+
+    def set_cost(self, event, cost):
+        self.costs[event] = float(cost)
+
+    def check(self, sid, lobby_code, event, players=0) -> float:
+        """
+        Charge an event to its connection and, given the lobby the connection is
+        a member of (lobby_code, with its player count), to that lobby.
+        Returns 0.0 if it may run, otherwise how many seconds the client should wait.
+        """
+        cost = self.costs.get(event)
+        if not cost:
+            return 0.0
+        counter = self.counters.get(event)
+        if counter is None:
+            counter = self.counters[event] = {"allowed": 0, "throttled": 0}
+
+        now = self.clock()
+        wait = self.sids.take(sid, cost, now)
+        if not wait and lobby_code:
+            wait = self._take_lobby(sid, lobby_code, cost, now, players)
+
+        counter["throttled" if wait else "allowed"] += 1
+        return wait
+
+    def check_lobby(self, sid, lobby_code, event, players=0) -> float:
+        """
+        The lobby half of check(), for an event check() already let through on its
+        connection alone (a lobby shared by several workers is charged once its state
+        has been pulled from the store). A refusal is counted as a throttle.
+        """
+        cost = self.costs.get(event)
+        if not cost or not lobby_code:
+            return 0.0
+        wait = self._take_lobby(sid, lobby_code, cost, self.clock(), players)
+        if wait:
+            counter = self.counters[event]
+            counter["allowed"] -= 1
+            counter["throttled"] += 1
+        return wait
+
+    def _take_lobby(self, sid, lobby_code, cost, now, players) -> float:
+        wait = self.lobbies.take(lobby_code, cost, now, max(1.0, players / LOBBY_PLAYERS))
+        if wait:
+            # the lobby said no: don't charge the connection for it
+            self.sids.refund(sid, cost)
+        return wait
+
+    def forget_sid(self, sid):
+        self.sids.forget(sid)
+
+    def forget_lobby(self, lobby_code):
+        self.lobbies.forget(lobby_code)
+
+    def stats(self) -> Dict:
+        return {
+            "events": {event: dict(c) for event, c in self.counters.items()},
+            "sid_buckets": len(self.sids.table),
+            "lobby_buckets": len(self.lobbies.table),
+        }
+
+
+# single instance for easy import
+rate_limiter = RateLimiter()
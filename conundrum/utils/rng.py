@@ -0,0 +1,46 @@
+# conundrum/utils/rng.py
+import hashlib
+import os
+import random
+from typing import Dict, Optional
+
+
+class LobbyRandom:
+    """
+    Hands out one random.Random stream per lobby, each derived from a single
+    server seed plus the lobby code. With a fixed seed (deterministic mode)
+    the same sequence of socket events replays to identical lobby codes,
+    shuffles and prompt draws.
+    """
+
+    def __init__(self, seed: Optional[str] = None):
+        self.configure(seed)
+
+    def configure(self, seed: Optional[str] = None):
+        """Install a server seed. None picks a fresh one (non-deterministic)."""
+        self.deterministic = seed is not None
+        self.seed = str(seed) if seed is not None else os.urandom(16).hex()
+        # streams[lobby_code] = random.Random
+        self.streams: Dict[str, random.Random] = {}
+        # lobby codes are drawn before the lobby exists, so they get their own stream
+        self.codes = random.Random(self._derive("lobby-codes"))
+
+    def _derive(self, label: str) -> int:
+        # hashlib rather than hash(): str hashes change with PYTHONHASHSEED
+        digest = hashlib.sha256(f"{self.seed}:{label}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def for_lobby(self, lobby_code: str) -> random.Random:
+        """Return the lobby's stream, creating it on first use."""
+        rng = self.streams.get(lobby_code)
+        if rng is None:
+            rng = self.streams[lobby_code] = random.Random(self._derive(f"lobby:{lobby_code}"))
+        return rng
+
+    def release(self, lobby_code: str):
+        """Drop a lobby's stream once the lobby is gone."""
+        self.streams.pop(lobby_code, None)
+
+
+# single instance for easy import
+lobby_rng = LobbyRandom()
@@ -0,0 +1,164 @@
+# conundrum/utils/sharding.py
+"""
+Lobby-affine sharding: every lobby code belongs to one worker process, picked
+by consistent hashing, so all of a lobby's state stays in that worker's memory.
+
+Workers are identified by the base URL clients reach them on. A request for a
+lobby that lives elsewhere is redirected there (HTTP pages) or told where to
+go with a "lobby_moved" event (sockets). When workers are added or removed
+only ~1/N of the codes change owner; those lobbies are handed off through the
+shared state store (see socket.rebalance), or, without one, stay where they
+are until they close.
+
+Lobby codes sit on the ring at their value in the code space (scaled to the
+ring) rather than at a hash, so a worker's share is a handful of code ranges
+that the code allocator draws from directly (see code_share).
+"""
+import bisect
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+from conundrum.utils.lobby_codes import CODE_ALPHABET, CODE_LENGTH
+
+# Points per worker on the ring; more points = more even split
+VIRTUAL_NODES = 128
+# How often workers look for a new worker list in the ring file
+RING_POLL_INTERVAL = 2.0
+
+RING_SIZE = 1 << 64
+CODE_SPACE = len(CODE_ALPHABET) ** CODE_LENGTH
+_CODE_DIGITS = {c: i for i, c in enumerate(CODE_ALPHABET)}
+
+
+def _point(label: str) -> int:
+    # hashlib rather than hash(): every worker must agree on the ring
+    return int.from_bytes(hashlib.md5(label.encode("utf-8")).digest()[:8], "big")
+
+
+def code_value(key) -> Optional[int]:
+    """A lobby code's value in the code space (as the code allocator encodes it), or None."""
+    if not isinstance(key, str) or len(key) != CODE_LENGTH:
+        return None
+    value = 0
+    for c in key:
+        digit = _CODE_DIGITS.get(c)
+        if digit is None:
+            return None
+        value = value * len(CODE_ALPHABET) + digit
+    return value
+
+
+def _key_point(key) -> int:
+    value = code_value(key)
+    if value is None:
+        return _point(key)
+    return value * RING_SIZE // CODE_SPACE
+
+
+def _first_code(point: int) -> int:
+    # smallest code value whose point is >= point
+    return -(-point * CODE_SPACE // RING_SIZE)
+
+
+class HashRing:
+    """Consistent hash ring over worker URLs."""
+
+    def __init__(self, workers=(), vnodes: int = VIRTUAL_NODES):
+        self.vnodes = vnodes
+        self.workers: List[str] = []
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.set_workers(workers)
+
+    def set_workers(self, workers):
+        self.workers = sorted(set(workers))
+        ring = sorted((_point(f"{w}#{i}"), w) for w in self.workers for i in range(self.vnodes))
+        self._points = [p for p, _ in ring]
+        self._owners = [w for _, w in ring]
+
+    def owner(self, key) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _key_point(key)) % len(self._points)
+        return self._owners[i]
+
+    def arcs(self, worker) -> List[Tuple[int, int]]:
+        """The [start, end) ranges of ring points that belong to worker."""
+        arcs = []
+        start = 0
+        for point, owner in zip(self._points + [RING_SIZE], self._owners + self._owners[:1]):
+            if owner == worker and start < point:
+                if arcs and arcs[-1][1] == start:
+                    arcs[-1] = (arcs[-1][0], point)
+                else:
+                    arcs.append((start, point))
+            start = point
+        return arcs
+
+
+class Shard:
+    """This worker's view of the ring. Disabled (everything is local) unless configured."""
+
+    def __init__(self):
+        self.me: Optional[str] = None
+        self.ring = HashRing()
+        self.ring_file: Optional[str] = None
+        self._ring_mtime = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.me is not None and len(self.ring.workers) > 1
+
+    def configure(self, me=None, workers=None, ring_file=None):
+        """me: this worker's URL; workers: every worker's URL; ring_file: one URL per line, re-read when it changes."""
+        self.me = me.rstrip("/") if me else None
+        self.ring_file = ring_file
+        self._ring_mtime = None
+        self.ring.set_workers([w.rstrip("/") for w in workers or ()])
+        if ring_file:
+            self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the ring file; True if the worker list changed."""
+        try:
+            mtime = os.stat(self.ring_file).st_mtime
+            if mtime == self._ring_mtime:
+                return False
+            with open(self.ring_file, "r", encoding="utf-8") as f:
+                workers = [line.strip().rstrip("/") for line in f if line.strip()]
+        except OSError as e:
+            print(f"[Shard] failed to read ring file {self.ring_file}: {e}")
+            return False
+        self._ring_mtime = mtime
+        if sorted(set(workers)) == self.ring.workers:
+            return False
+        self.ring.set_workers(workers)
+        return True
+
+    def owns(self, lobby_code) -> bool:
+        return not self.enabled or self.ring.owner(lobby_code) == self.me
+
+    def code_share(self) -> Optional[List[Tuple[int, int]]]:
+        """The [start, end) ranges of code values this worker owns; None when not sharded (all of them)."""
+        if not self.enabled:
+            return None
+        share = []
+        for start, end in self.ring.arcs(self.me):
+            first, stop = _first_code(start), _first_code(end)
+            if first < stop:
+                share.append((first, stop))
+        return share
+
+    def owner_url(self, lobby_code, held: bool = False) -> Optional[str]:
+        """
+        Base URL of the worker that should serve a lobby, or None if it is this one.
+        A lobby this worker still holds (held=True) is served here even if the ring moved.
+        """
+        if held or self.owns(lobby_code):
+            return None
+        return self.ring.owner(lobby_code)
+
+
+# single instance for easy import
+shard = Shard()
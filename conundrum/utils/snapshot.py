@@ -0,0 +1,250 @@
+# conundrum/utils/snapshot.py
+"""
+Point-in-time snapshots of every live lobby, restored on startup.
+
+A snapshot file is a fixed header followed by the zlib-compressed pickle of
+the state (see capture()):
+
+    magic "CCSNAP" | format version (u16) | taken at (f64, unix time) | crc32 of body (u32)
+
+Snapshots are taken in a forked child: the child sees the parent's memory as
+of the fork (copy-on-write), so it can pickle and write at leisure while the
+server keeps serving. Files are written to a temp name and renamed, so the
+latest complete snapshot is always the one at the configured path.
+
+With the event log on, a snapshot also records which log segment starts
+after it; recovery replays from there and older segments are deleted.
+
+Rounds carry the wall-clock time their phase deadline falls due, so the
+server re-arms the deadlines of rounds in flight once recovery is done.
+"""
+import os
+import pickle
+import random
+import signal
+import struct
+import time
+import zlib
+from typing import Dict, Optional
+
+from conundrum.games.registry import MODES, get_mode
+from conundrum.utils.event_log import event_log
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.lobby_codes import code_allocator
+from conundrum.utils.lobby_sync import install_round_handler
+from conundrum.utils.presence import presence
+from conundrum.utils.prompt_bank import prompt_bank
+from conundrum.utils.rng import lobby_rng
+from conundrum.utils.round_manager import round_manager
+
+MAGIC = b"CCSNAP"
+# bump when the layout of capture() changes; restore refuses newer versions
+FORMAT_VERSION = 3
+_HEADER = struct.Struct(">6sHdI")
+
+# Seconds between background snapshots
+SNAPSHOT_INTERVAL = 30.0
+
+
+def capture(log_segment: int = 0) -> Dict:
+    """
+    Everything needed to bring the lobbies back: membership, rounds, game state, RNG streams,
+    plus where the code allocator and the prompt draws had got to.
+    """
+    return {
+        # first event log segment not covered by this snapshot (added in format 2)
+        "log_segment": log_segment,
+        # added in format 3
+        "codes": code_allocator.state(),
+        "prompts": prompt_bank.draws(),
+        "lobbies": lobby_registry.lobbies,
+        "rounds": round_manager.state,
+        "modes": {
+            name: {"games": mode.manager.games, "dups": mode.manager.duplicates.lobbies}
+            for name, mode in MODES.items()
+            if mode.is_loaded()
+        },
+        "rng": {code: rng.getstate() for code, rng in lobby_rng.streams.items()},
+    }
+
+
+def install(state: Dict):
+    """Load captured state into the live objects, replacing what they held."""
+    lobby_registry.lobbies = state["lobbies"]
+    lobby_registry.by_sid = {}
+    round_manager.state = state["rounds"]
+    round_manager.handlers = {}
+    for name, saved in state["modes"].items():
+        game_mode = get_mode(name)
+        if game_mode:
+            game_mode.manager.games = saved["games"]
+            game_mode.manager.duplicates.lobbies = saved["dups"]
+    for code, rng_state in state["rng"].items():
+        rng = lobby_rng.streams[code] = random.Random()
+        rng.setstate(rng_state)
+    # format 2 snapshots have neither: codes start a fresh permutation, prompt draws start over
+    if "codes" in state:
+        code_allocator.restore(state["codes"])
+    if "prompts" in state:
+        prompt_bank.restore_draws(state["prompts"])
+
+    for lobby in lobby_registry.lobbies.values():
+        game_mode = get_mode(lobby.game_mode)
+        if game_mode and lobby.code in round_manager.state:
+            install_round_handler(lobby.code, game_mode.manager)
+
+
+def resume_players():
+    """Every socket died with the old process: players get the usual grace window to come back."""
+    lobby_registry.by_sid = {}
+    for lobby in lobby_registry.lobbies.values():
+        code_allocator.claim(lobby.code)
+        lobby.sids = {}
+        for player in lobby.players:
+            presence.disconnected(lobby.code, player)
+
+
+def encode(state: Dict) -> bytes:
+    body = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, time.time(), zlib.crc32(body)) + body
+
+
+def decode(blob: bytes):
+    """(taken_at, state) from a snapshot file's bytes; ValueError if it is not a usable snapshot."""
+    if len(blob) < _HEADER.size:
+        raise ValueError("snapshot is truncated")
+    magic, version, taken_at, crc = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("not a snapshot file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"snapshot format {version} is newer than this server ({FORMAT_VERSION})")
+    body = blob[_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise ValueError("snapshot checksum mismatch")
+    return taken_at, pickle.loads(zlib.decompress(body))
+
+
+class Snapshotter:
+    def __init__(self):
+        self.socketio = None
+        self.path: Optional[str] = None
+        self.interval = SNAPSHOT_INTERVAL
+        # pid of the forked child still writing, if any, and the log segment its snapshot starts
+        self._child: Optional[int] = None
+        self._child_segment = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(self, socketio, path=None, interval=SNAPSHOT_INTERVAL):
+        self.socketio = socketio
+        self.path = path or None
+        self.interval = max(1.0, float(interval))
+
+    def write(self, log_segment=0):
+        """Capture and write a snapshot in this process (used at shutdown, or where fork is unavailable)."""
+        blob = encode(capture(log_segment))
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        return len(blob)
+
+    def take(self) -> bool:
+        """Start a snapshot in a forked child; False if the previous one is still being written."""
+        self._reap()
+        if self._child is not None:
+            return False
+        # records from here on go to a new segment, which this snapshot does not cover
+        segment = event_log.rotate() if event_log.enabled else 0
+        if not hasattr(os, "fork"):
+            self.write(segment)
+            event_log.compact(segment)
+            return True
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.write(segment)
+            except Exception as e:
+                print(f"[Snapshotter] failed to write '{self.path}': {e}")
+                code = 1
+            os._exit(code)
+        self._child, self._child_segment = pid, segment
+        return True
+
+    def _reap(self):
+        if self._child is None:
+            return
+        pid, status = os.waitpid(self._child, os.WNOHANG)
+        if pid:
+            self._child = None
+            if status == 0 and event_log.enabled:
+                event_log.compact(self._child_segment)
+
+    def restore(self) -> Optional[int]:
+        """Load the snapshot at the configured path; returns the log segment to replay from, or None."""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                taken_at, state = decode(f.read())
+            install(state)
+        except Exception as e:
+            print(f"[Snapshotter] failed to load '{self.path}': {e}. Starting empty.")
+            return None
+        print(f"[Snapshotter] restored {len(lobby_registry)} lobbies from {time.time() - taken_at:.1f}s ago")
+        return state.get("log_segment", 0)
+
+    def recover(self) -> bool:
+        """Warm start: latest snapshot, then the event log on top. True if any lobby came back."""
+        segment = self.restore() if self.enabled else None
+        if event_log.enabled:
+            applied = event_log.replay(segment or 0)
+            if applied:
+                print(f"[EventLog] replayed {applied} records")
+        if not len(lobby_registry):
+            return False
+        resume_players()
+        return True
+
+    def snapshot_on_shutdown(self):
+        """
+        Write a last snapshot when the process is told to stop (SIGTERM), so a deploy loses nothing.
+        The event log is drained and closed first; then whatever handled SIGTERM before (gunicorn's
+        graceful shutdown, or the default) still runs.
+        """
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def on_term(signum, frame):
+            try:
+                segment = 0
+                if event_log.enabled:
+                    segment = event_log.rotate()
+                    event_log.close()
+                self.write(segment)
+                event_log.compact(segment)
+            except Exception as e:
+                print(f"[Snapshotter] final snapshot failed: {e}")
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+        signal.signal(signal.SIGTERM, on_term)
+
+    def run(self):
+        """Background task: snapshot every interval."""
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.take()
+            except Exception as e:
+                print(f"[Snapshotter] snapshot failed: {e}")
+
+
+# single instance for easy import
+snapshotter = Snapshotter()
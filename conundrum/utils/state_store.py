@@ -0,0 +1,229 @@
+# conundrum/utils/state_store.py
+"""
+Where lobby state lives between socket events.
+
+Each lobby is stored as a small hash of pickled fields ("lobby", "round",
+"game", ...). A handler pulls the hash in one read before it runs and writes
+back only the fields it changed in one transaction after, so an event costs
+at most two round trips (plus taking and releasing the lobby's lock).
+
+The default backend keeps nothing outside the process: the live objects in
+lobby_registry, round_manager and the game managers are the state, and
+syncing is skipped entirely. The Redis backend lets several workers share
+lobbies (pair it with Flask-SocketIO's message_queue so room emits reach
+every worker). Handlers cannot be re-run once they have emitted, so rather
+than retrying on conflict, pull -> handle -> push holds a per-lobby lock:
+events for one lobby run one at a time across all workers.
+
+Every stored field is HMAC-signed with the store key (over lobby code, field
+name and bytes); a field whose signature does not check out is never
+unpickled.
+"""
+import hashlib
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+# Lobbies nobody touched for this long are dropped by Redis
+LOBBY_TTL_SECONDS = 6 * 60 * 60
+# A lobby lock expires on its own after this long (a worker died holding it)
+LOCK_TIMEOUT_SECONDS = 30.0
+# How long an event waits for its lobby's lock before giving up, and how often it retries
+LOCK_WAIT_SECONDS = 5.0
+LOCK_RETRY_SECONDS = 0.005
+
+_MAC_SIZE = hashlib.sha256().digest_size
+
+
+class LobbyBusy(Exception):
+    """The lobby's lock could not be taken in time."""
+
+
+class TamperedState(Exception):
+    """A stored field failed its signature check."""
+
+
+class MemoryBackend:
+    """Blobs in a dict; only useful to exercise the sync path inside one process."""
+
+    def __init__(self):
+        self.hashes: Dict[str, Dict[str, bytes]] = {}
+        # held lobby locks, by lobby code
+        self.locks = set()
+
+    def load(self, lobby_code) -> Dict[str, bytes]:
+        return dict(self.hashes.get(lobby_code, {}))
+
+    def save(self, lobby_code, fields: Dict[str, bytes], deleted: Iterable[str] = ()):
+        stored = self.hashes.setdefault(lobby_code, {})
+        stored.update(fields)
+        for name in deleted:
+            stored.pop(name, None)
+
+    def exists(self, lobby_code) -> bool:
+        return lobby_code in self.hashes
+
+    def delete(self, lobby_code):
+        self.hashes.pop(lobby_code, None)
+
+    @contextmanager
+    def lock(self, lobby_code):
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while lobby_code in self.locks:
+            if time.monotonic() >= deadline:
+                raise LobbyBusy(lobby_code)
+            time.sleep(LOCK_RETRY_SECONDS)
+        self.locks.add(lobby_code)
+        try:
+            yield
+        finally:
+            self.locks.discard(lobby_code)
+
+
+class RedisBackend:
+    """Lobby hashes in Redis (or anything speaking its protocol, e.g. fakeredis)."""
+
+    def __init__(self, client, prefix: str = "conundrum:lobby:", ttl: int = LOBBY_TTL_SECONDS):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("the redis package is required for a redis:// state store") from e
+        return cls(redis.Redis.from_url(url))
+
+    def _key(self, lobby_code):
+        return f"{self.prefix}{lobby_code}"
+
+    def load(self, lobby_code) -> Dict[str, bytes]:
+        raw = self.client.hgetall(self._key(lobby_code))
+        return {(k.decode() if isinstance(k, bytes) else k): v for k, v in raw.items()}
+
+    def save(self, lobby_code, fields: Dict[str, bytes], deleted: Iterable[str] = ()):
+        key = self._key(lobby_code)
+        deleted = list(deleted)
+        pipe = self.client.pipeline(transaction=True)
+        if fields:
+            pipe.hset(key, mapping=fields)
+        if deleted:
+            pipe.hdel(key, *deleted)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def exists(self, lobby_code) -> bool:
+        return bool(self.client.exists(self._key(lobby_code)))
+
+    def delete(self, lobby_code):
+        self.client.delete(self._key(lobby_code))
+
+    @contextmanager
+    def lock(self, lobby_code):
+        """Hold the lobby's lock: SET NX with an expiry, released only by the token that took it."""
+        key = f"{self._key(lobby_code)}:lock"
+        token = os.urandom(16).hex().encode()
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        # time.sleep is a green sleep under eventlet's monkey patching
+        while not self.client.set(key, token, nx=True, px=int(LOCK_TIMEOUT_SECONDS * 1000)):
+            if time.monotonic() >= deadline:
+                raise LobbyBusy(lobby_code)
+            time.sleep(LOCK_RETRY_SECONDS)
+        try:
+            yield
+        finally:
+            self._unlock(key, token)
+
+    def _unlock(self, key, token):
+        from redis.exceptions import WatchError
+        with self.client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) != token:
+                    print(f"[StateStore] lock {key} expired before it was released")
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+            except WatchError:
+                print(f"[StateStore] lock {key} expired and was taken while being released")
+
+
+class StateStore:
+    """
+    The configured backend. Without one (the default) state stays in process
+    memory and shared is False, so callers skip syncing altogether.
+    """
+
+    def __init__(self):
+        self.backend = None
+        # socket.io message queue URL matching the backend, for SocketIO(message_queue=...)
+        self.message_queue: Optional[str] = None
+        # HMAC key for stored fields
+        self.key = b""
+
+    @property
+    def shared(self) -> bool:
+        return self.backend is not None
+
+    def configure(self, url: Optional[str] = None, backend=None, key: Optional[str] = None):
+        """
+        url: None/"memory" (in-process), "memory://" (sync through MemoryBackend) or "redis://...".
+        key signs what is stored; it is required for Redis, where other processes read the fields.
+        """
+        self.message_queue = None
+        if backend is not None:
+            self.backend = backend
+        elif not url or url == "memory":
+            self.backend = None
+        elif url == "memory://":
+            self.backend = MemoryBackend()
+        elif url.startswith(("redis://", "rediss://", "unix://")):
+            if not key:
+                raise ValueError("a redis state store needs a signing key (CONUNDRUM_STATE_KEY)")
+            self.backend = RedisBackend.from_url(url)
+            self.message_queue = url
+        else:
+            raise ValueError(f"unsupported state store URL '{url}'")
+        # nothing outside this process reads an in-process store, so any key will do
+        self.key = key.encode() if key else os.urandom(32)
+
+    def _mac(self, lobby_code, name, blob) -> bytes:
+        message = f"{lobby_code}\0{name}\0".encode() + blob
+        return hmac.new(self.key, message, hashlib.sha256).digest()
+
+    def load(self, lobby_code) -> Dict[str, bytes]:
+        """The lobby's fields, signatures checked and stripped; TamperedState if one does not check out."""
+        if not self.backend:
+            return {}
+        fields = {}
+        for name, signed in self.backend.load(lobby_code).items():
+            mac, blob = signed[:_MAC_SIZE], signed[_MAC_SIZE:]
+            if not hmac.compare_digest(mac, self._mac(lobby_code, name, blob)):
+                raise TamperedState(f"field '{name}' of lobby {lobby_code} has a bad signature")
+            fields[name] = blob
+        return fields
+
+    def save(self, lobby_code, fields, deleted=()):
+        if self.backend and (fields or deleted):
+            signed = {name: self._mac(lobby_code, name, blob) + blob for name, blob in fields.items()}
+            self.backend.save(lobby_code, signed, deleted)
+
+    def exists(self, lobby_code) -> bool:
+        return bool(self.backend) and self.backend.exists(lobby_code)
+
+    def delete(self, lobby_code):
+        if self.backend:
+            self.backend.delete(lobby_code)
+
+    def lock(self, lobby_code):
+        """Context manager holding the lobby's lock across workers; LobbyBusy if it cannot be had in time."""
+        return self.backend.lock(lobby_code)
+
+
+# single instance for easy import
+state_store = StateStore()
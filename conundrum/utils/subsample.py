@@ -0,0 +1,45 @@
+# conundrum/utils/subsample.py
+from typing import Dict, Iterable, List, Optional, Set
+
+# Parties with at least this many voters get a subset of answers each
+LARGE_PARTY_MIN_VOTERS = 12
+# Answers shown to each voter in a large party (the truth counts towards it)
+LARGE_PARTY_SAMPLE_SIZE = 8
+
+
+def assign_subsets(
+    option_count: int,
+    voters: Iterable[str],
+    own_ids: Dict[str, Set[int]],
+    sample_size: int = LARGE_PARTY_SAMPLE_SIZE,
+    truth_id: Optional[int] = None,
+) -> Dict[str, List[int]]:
+    """
+    Pick the answer IDs each voter is shown, for every voter in one pass.
+
+    Submitted answers are dealt out as consecutive windows of one shared cycle,
+    so each is shown to the same number of voters (give or take one). A voter's
+    own answers are skipped and the truth, if there is one, is always included.
+    The result only depends on the inputs, so every worker computes the same deal.
+    """
+    pool = [i for i in range(option_count) if i != truth_id]
+    per_voter = max(0, sample_size - (1 if truth_id is not None else 0))
+    size = len(pool)
+
+    subsets = {}
+    cursor = 0
+    for voter in voters:
+        mine = own_ids.get(voter, ())
+        picked = []
+        seen = 0
+        while len(picked) < per_voter and seen < size:
+            candidate = pool[cursor % size]
+            cursor += 1
+            seen += 1
+            if candidate not in mine:
+                picked.append(candidate)
+        if truth_id is not None:
+            picked.append(truth_id)
+        # ID order follows the shuffled reveal order, so the truth's position gives nothing away
+        subsets[voter] = sorted(picked)
+    return subsets
@@ -0,0 +1,163 @@
+# conundrum/utils/timer_wheel.py
+"""
+One hierarchical timer wheel for every lobby's phase deadline.
+
+Time advances in ticks of TICK_MS. Level 0 has 256 one-tick slots; each
+higher level has 64 slots, each as wide as the whole level below it, so four
+levels reach ~77 days at 100 ms ticks. A timer goes in the lowest level whose
+range covers its delay and moves down a level each time the level below
+wraps around to its slot. Arming and cancelling are a dict insert/delete
+(timers are keyed, one per lobby), and a tick only touches the slot that is
+due, however many lobbies are waiting.
+
+A single background task drives the wheel; lag (how late timers fire against
+their deadline) is tracked for stats().
+"""
+import time
+from typing import Callable, Dict, Optional
+
+TICK_MS = 100
+_LEVEL_BITS = (8, 6, 6, 6)
+
+# Default seconds a phase may run before the server moves the round along; 0 = no deadline
+PHASE_SECONDS = {
+    "submit": 90.0,
+    "vote": 60.0,
+}
+
+
+class _Timer:
+    __slots__ = ("due", "level", "slot", "callback", "args")
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.level = 0
+        self.slot = 0
+        self.callback = callback
+        self.args = args
+
+
+class TimerWheel:
+    def __init__(self, tick_ms: float = TICK_MS):
+        self.socketio = None
+        self.tick = tick_ms / 1000
+        self.phase_seconds = dict(PHASE_SECONDS)
+        self.clock = time.monotonic
+        self.levels = [[{} for _ in range(1 << bits)] for bits in _LEVEL_BITS]
+        # timers[key] = _Timer, wherever it sits in the wheel
+        self.timers: Dict[object, _Timer] = {}
+        self.start = self.clock()
+        # last tick processed
+        self.current = 0
+        self._running = False
+        self.fired = 0
+        self.lag_max = 0.0
+        self.lag_avg = 0.0
+
+    def configure(self, socketio, tick_ms: float = TICK_MS, phase_seconds: Optional[Dict[str, float]] = None):
+        self.socketio = socketio
+        self.phase_seconds = dict(PHASE_SECONDS, **(phase_seconds or {}))
+        if not self.timers:
+            # the tick can only change while nothing is armed against the old one
+            self.tick = max(1.0, float(tick_ms)) / 1000
+            self.start = self.clock()
+            self.current = 0
+
+    # -------------------------
+    # Arm / cancel
+    # -------------------------
+    def arm(self, key, delay: float, callback: Callable, *args):
+        """Call callback(*args) about delay seconds from now, replacing any timer under key."""
+        self.cancel(key)
+        due = int((self.clock() - self.start + delay) / self.tick) + 1
+        timer = self.timers[key] = _Timer(max(due, self.current + 1), callback, args)
+        self._place(key, timer)
+        self._start()
+
+    def cancel(self, key) -> bool:
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return False
+        del self.levels[timer.level][timer.slot][key]
+        return True
+
+    def _place(self, key, timer):
+        delta = timer.due - self.current
+        shift = 0
+        for level, bits in enumerate(_LEVEL_BITS):
+            last = level == len(_LEVEL_BITS) - 1
+            if delta < (1 << (shift + bits)) or last:
+                # beyond the top level's range: park in its farthest slot and re-place on cascade
+                due = timer.due if delta < (1 << (shift + bits)) else self.current + (1 << (shift + bits)) - 1
+                timer.level, timer.slot = level, (due >> shift) & ((1 << bits) - 1)
+                self.levels[level][timer.slot][key] = timer
+                return
+            shift += bits
+
+    # -------------------------
+    # Driving
+    # -------------------------
+    def _start(self):
+        if not self._running and self.socketio is not None:
+            self._running = True
+            self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.tick)
+            try:
+                self.advance()
+            except Exception as e:
+                print(f"[TimerWheel] tick failed: {e}")
+
+    def advance(self, now: Optional[float] = None):
+        """Process every tick up to now, firing the timers that are due."""
+        now = self.clock() if now is None else now
+        target = int((now - self.start) / self.tick)
+        while self.current < target:
+            self.current += 1
+            self._cascade()
+            slot = self.levels[0][self.current & ((1 << _LEVEL_BITS[0]) - 1)]
+            if slot:
+                due = list(slot.items())
+                slot.clear()
+                for key, timer in due:
+                    del self.timers[key]
+                    self._fire(timer, now)
+
+    def _cascade(self):
+        shift = _LEVEL_BITS[0]
+        for level in range(1, len(_LEVEL_BITS)):
+            if self.current & ((1 << shift) - 1):
+                return
+            slot = self.levels[level][(self.current >> shift) & ((1 << _LEVEL_BITS[level]) - 1)]
+            moving = list(slot.items())
+            slot.clear()
+            for key, timer in moving:
+                self._place(key, timer)
+            shift += _LEVEL_BITS[level]
+
+    def _fire(self, timer, now):
+        lag = max(0.0, now - (self.start + timer.due * self.tick))
+        self.fired += 1
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_avg += (lag - self.lag_avg) * 0.05
+        try:
+            timer.callback(*timer.args)
+        except Exception as e:
+            print(f"[TimerWheel] timer callback failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "armed": len(self.timers),
+            "fired": self.fired,
+            "tick_ms": self.tick * 1000,
+            "lag_avg_ms": round(self.lag_avg * 1000, 3),
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+            # how far the driver is behind the clock right now
+            "behind_ms": round(max(0.0, self.clock() - self.start - self.current * self.tick) * 1000, 3),
+        }
+
+
+# single instance for easy import
+timer_wheel = TimerWheel()
@@ -0,0 +1,104 @@
+# conundrum/utils/trace.py
+"""
+Per-lobby trace of the last socket events, for working out what happened to
+a lobby that got stuck.
+
+Each lobby gets a fixed-size ring, allocated once, of
+(unix time, event, player, outcome, handler seconds) tuples; recording an
+event stores one tuple in the next slot and allocates nothing else. At most
+LIVE_KEPT rings are live; past that the least recently recorded one is
+dropped. Rings of closed lobbies are kept (up to CLOSED_KEPT of them) so a
+lobby can still be inspected after it fell apart; a new lobby reusing the
+code starts a fresh one.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Events remembered per lobby; 0 = tracing off
+TRACE_EVENTS = 64
+# Traces of open lobbies kept, least recently recorded dropped first
+LIVE_KEPT = 10000
+# Traces of closed lobbies kept for inspection
+CLOSED_KEPT = 256
+
+
+class _Ring:
+    __slots__ = ("slots", "count")
+
+    def __init__(self, size):
+        self.slots = [None] * size
+        # events recorded so far; the next goes to slots[count % size]
+        self.count = 0
+
+    def entries(self) -> List[tuple]:
+        """Recorded entries, oldest first."""
+        size = len(self.slots)
+        if self.count <= size:
+            return self.slots[:self.count]
+        start = self.count % size
+        return self.slots[start:] + self.slots[:start]
+
+
+class LobbyTraces:
+    def __init__(self, size: int = TRACE_EVENTS):
+        self.size = size
+        self.clock = time.time
+        # live[lobby_code] = ring, least recently recorded first
+        self.live: "OrderedDict[str, _Ring]" = OrderedDict()
+        # closed[lobby_code] = ring, oldest closure first
+        self.closed: "OrderedDict[str, _Ring]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def configure(self, size=TRACE_EVENTS):
+        self.size = max(0, int(size))
+
+    def __contains__(self, lobby_code):
+        return lobby_code in self.live or lobby_code in self.closed
+
+    def record(self, lobby_code, event, player=None, outcome="ok", seconds=0.0):
+        if not self.enabled or not lobby_code:
+            return
+        ring = self.live.get(lobby_code)
+        if ring is None:
+            ring = self.live[lobby_code] = _Ring(self.size)
+            self.closed.pop(lobby_code, None)
+            if len(self.live) > LIVE_KEPT:
+                self.live.popitem(last=False)
+        else:
+            self.live.move_to_end(lobby_code)
+        ring.slots[ring.count % len(ring.slots)] = (self.clock(), event, player, outcome, seconds)
+        ring.count += 1
+
+    def close(self, lobby_code):
+        """The lobby is gone: keep its trace aside for inspection."""
+        ring = self.live.pop(lobby_code, None)
+        if ring is None:
+            return
+        self.closed[lobby_code] = ring
+        while len(self.closed) > CLOSED_KEPT:
+            self.closed.popitem(last=False)
+
+    def dump(self, lobby_code) -> Optional[Dict]:
+        ring = self.live.get(lobby_code)
+        closed = ring is None
+        if closed:
+            ring = self.closed.get(lobby_code)
+        if ring is None:
+            return None
+        return {
+            "lobbyCode": lobby_code,
+            "closed": closed,
+            "recorded": ring.count,
+            "events": [
+                {"at": at, "event": event, "player": player, "outcome": outcome, "ms": round(seconds * 1000, 3)}
+                for at, event, player, outcome, seconds in ring.entries()
+            ],
+        }
+
+
+# single instance for easy import
+lobby_traces = LobbyTraces()
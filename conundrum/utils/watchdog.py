@@ -0,0 +1,115 @@
+# conundrum/utils/watchdog.py
+"""
+Event-loop lag watchdog.
+
+A heartbeat greenlet wakes every HEARTBEAT_MS and notes the time; how late
+it wakes up is the hub's scheduling lag, recorded in the metrics histogram.
+A heartbeat can only notice lag once the blocking code has finished, so a
+real OS thread watches the heartbeat too: when none has landed for
+LAG_THRESHOLD_MS, the hub is stuck right now, and the thread captures the
+hub thread's stack and the socket event in flight. Each stall is logged once
+and counted by event.
+"""
+import time
+import traceback
+from collections import Counter
+from typing import Dict
+
+try:
+    # the monitor must be a real thread: a greenlet cannot run while the hub is blocked
+    from eventlet.patcher import original
+    _threading = original("threading")
+except ImportError:
+    import threading as _threading
+
+from conundrum.utils.metrics import metrics
+from conundrum.utils.profiler import running_stack
+
+# Milliseconds between heartbeats
+HEARTBEAT_MS = 50
+# Milliseconds without a heartbeat before the hub counts as blocked; 0 = watchdog off
+LAG_THRESHOLD_MS = 250
+# Innermost frames of a blocked stack written to the log
+LOGGED_FRAMES = 12
+
+
+class LagWatchdog:
+    def __init__(self):
+        self.socketio = None
+        self.interval = HEARTBEAT_MS / 1000
+        self.threshold = LAG_THRESHOLD_MS / 1000
+        self.clock = time.monotonic
+        self.beat = self.clock()
+        # OS thread the hub (and so the heartbeat) runs on
+        self._hub_thread = None
+        self._monitor = None
+        self._running = False
+        self.lag_max = 0.0
+        # stalls[socket event, or "" outside any handler] = count
+        self.stalls: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def configure(self, socketio, threshold_ms=LAG_THRESHOLD_MS, heartbeat_ms=HEARTBEAT_MS):
+        self.socketio = socketio
+        self.threshold = max(0.0, float(threshold_ms)) / 1000
+        self.interval = max(1.0, float(heartbeat_ms)) / 1000
+
+    def run(self):
+        """Background task: the heartbeat. Starts the monitor thread the first time it runs."""
+        if self._running:
+            return
+        self._running = True
+        self._hub_thread = _threading.get_ident()
+        self.beat = self.clock()
+        if self._monitor is None:
+            self._monitor = _threading.Thread(target=self._watch, name="conundrum-lag-watchdog", daemon=True)
+            self._monitor.start()
+        while True:
+            self.socketio.sleep(self.interval)
+            now = self.clock()
+            lag = max(0.0, now - self.beat - self.interval)
+            self.beat = now
+            self.lag_max = max(self.lag_max, lag)
+            metrics.observe("event_loop_lag", "heartbeat", lag)
+
+    def _watch(self):
+        reported = None
+        # time.sleep may be eventlet's here, which must not be called off the hub thread
+        pause = _threading.Event()
+        while True:
+            pause.wait(self.interval)
+            beat = self.beat
+            if beat == reported or self.clock() - beat < self.threshold:
+                continue
+            # one report per stall: the next heartbeat moves beat on
+            reported = beat
+            try:
+                self._report(self.clock() - beat)
+            except Exception as e:
+                print(f"[LagWatchdog] failed to capture the blocked stack: {e}")
+
+    def _report(self, blocked):
+        frames, event = running_stack(self._hub_thread)
+        self.stalls[event or ""] += 1
+        stack = traceback.StackSummary.extract(
+            ((frame, frame.f_lineno) for frame in reversed(frames[:LOGGED_FRAMES])),
+            lookup_lines=True,
+        )
+        del frames
+        print(
+            f"[LagWatchdog] event loop has been blocked for {blocked * 1000:.0f} ms"
+            f" (handling {event or 'no socket event'}):\n" + "".join(stack.format()).rstrip()
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+            "stalls": dict(self.stalls),
+        }
+
+
+# single instance for easy import
+lag_watchdog = LagWatchdog()
@@ -1,9 +1,10 @@
 # engine.py
 from flask import Flask, render_template, request
 from flask_socketio import SocketIO, emit, join_room, leave_room
-import random
 import string
 
+from conundrum.utils.lobby_codes import CodeAllocator
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'super-secret-key'
 socketio = SocketIO(app, cors_allowed_origins="*")
@@ -24,9 +25,13 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 lobbies = {}
 
 
-def generate_code(length=4):
-    """Generate random uppercase lobby code."""
-    return ''.join(random.choices(string.ascii_uppercase, k=length))
+# uppercase-only codes, issued from a keyed permutation (no retries, no reuse until quarantine ends)
+code_allocator = CodeAllocator(alphabet=string.ascii_uppercase)
+
+
+def generate_code():
+    """Generate an unused uppercase lobby code."""
+    return code_allocator.allocate(lambda code: code not in lobbies)
 
 
 # ---------- ROUTES ----------
@@ -65,8 +70,6 @@ def on_create_lobby(data):
 
     # generate unique code
     lobby_code = generate_code()
-    while lobby_code in lobbies:
-        lobby_code = generate_code()
 
     # create lobby
     lobbies[lobby_code] = {
@@ -137,6 +140,7 @@ def on_leave_lobby(data):
     # if no players left, remove lobby
     if not lobby["players"]:
         del lobbies[lobby_code]
+        code_allocator.release(lobby_code)
         return
 
     emit("lobby_update", {"players": lobby["players"], "host": lobby["host"]}, room=lobby_code)
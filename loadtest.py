@@ -0,0 +1,326 @@
+# loadtest.py
+"""
+Load test: many lobbies playing complete games at once.
+
+    python loadtest.py --lobbies 1000 --concurrency 200 --players 4 --rounds 2
+    python loadtest.py --url http://127.0.0.1:5000 --lobbies 200
+
+Without --url the server runs in this process and every player is a
+socketio.test_client; with --url every player is a real Socket.IO client
+(needs python-socketio[client]) against a running server. Each lobby plays one
+game: create, join, start, then per round start_round, submit, vote and wait
+for the round to end (the host sends end_round if voting stalls). Modes are
+taken round-robin from --modes. Players wait a random think time before each
+action.
+
+Reported: events/sec, p50/p99/max latency per event (emit until the reply the
+sender is waiting for) and peak memory of this process (with the server
+in-process, that includes the server).
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+from collections import defaultdict
+
+from eventlet.queue import Empty, LightQueue
+
+# what the sender of each event waits for; events not listed are fire-and-forget
+REPLIES = {
+    "create_lobby": ("lobby_created",),
+    "join_lobby": ("lobby_joined",),
+    "start_game": ("game_started",),
+    "end_round": ("round_ended", "game_over"),
+}
+
+START_FIELDS = {
+    "obviously_lies": {"question": "What is the capital of {n}?", "correctAnswer": "The real city {n}"},
+    "reverse_guessing": {"answer": "Answer number {n}", "correctQuestion": "What is question {n}?"},
+    "bad_advice_hotline": {"question": "How do I fix problem {n}?"},
+    "emoji_translation": {"emojiPrompt": "😂🐶"},
+}
+
+WORDS = (
+    "apple banana cactus donkey engine feather giraffe harbor igloo jacket kettle lantern "
+    "mango noodle octopus pickle quartz rocket saddle tulip umbrella violin walrus yogurt zebra"
+).split()
+
+
+class Failed(Exception):
+    pass
+
+
+class _Inbox(LightQueue):
+    # the test client delivers events by appending to its queue
+    append = LightQueue.put
+
+
+class Player:
+    """One connection. Incoming events are queued; wait_for() consumes them in order."""
+
+    def __init__(self, name, connect, stats, timeout):
+        self.name = name
+        self.stats = stats
+        self.timeout = timeout
+        self.inbox = _Inbox()
+        self.client = connect(self.inbox)
+
+    def emit(self, event, data, replies=None):
+        """Send an event and, if it expects a reply, wait for it and record the latency."""
+        replies = replies or REPLIES.get(event)
+        started = time.perf_counter()
+        self.client.emit(event, data)
+        self.stats.sent += 1
+        if not replies:
+            return None
+        reply = self.wait_for(*replies)
+        self.stats.latency[event].append(time.perf_counter() - started)
+        return reply
+
+    def wait_for(self, *names):
+        """Next event with one of names, skipping others; Failed on an error_message or timeout."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                item = self.inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except Empty:
+                raise Failed(f"{self.name}: timed out waiting for {'/'.join(names)}")
+            if item["name"] in names:
+                return item["name"], (item["args"][0] if item["args"] else None)
+            if item["name"] == "error_message":
+                self.stats.errors += 1
+                raise Failed(f"{self.name}: {item['args'][0].get('message') if item['args'] else 'error'}")
+
+    def wait_for_final_reveal(self, mode):
+        """The reveal that opens voting; the one sent at round start only holds the truth."""
+        while True:
+            _, reveal = self.wait_for(mode.reveal_event)
+            if len(reveal[mode.reveal_key]) > 1 or reveal.get("answerIds"):
+                return reveal
+
+    def close(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+def in_process():
+    """connect() for test clients on an app created in this process."""
+    # the load generator shares the server's hub here, so the lag watchdog would only report the harness
+    os.environ.setdefault("CONUNDRUM_LAG_THRESHOLD_MS", "0")
+    from conundrum import create_app, socketio
+    app = create_app()
+
+    def connect(inbox):
+        client = socketio.test_client(app)
+        client.queue = inbox
+        return client
+    return connect
+
+
+def over_socket(url):
+    """connect() for real Socket.IO clients of the server at url."""
+    try:
+        import socketio as socketio_client
+    except ImportError:
+        sys.exit("real-socket mode needs python-socketio[client]")
+
+    def connect(inbox):
+        client = socketio_client.Client(reconnection=False)
+
+        @client.on("*")
+        def deliver(event, *args):
+            inbox.put({"name": event, "args": list(args)})
+        client.connect(url, wait_timeout=30)
+        return client
+    return connect
+
+
+class Stats:
+    def __init__(self):
+        self.sent = 0
+        self.errors = 0
+        self.completed = 0
+        self.failed = 0
+        self.failures = defaultdict(int)
+        # latency[event] = [seconds, ...]
+        self.latency = defaultdict(list)
+
+
+def think(args):
+    eventlet.sleep(random.uniform(args.think_min, args.think_max))
+
+
+def answer_text(rng):
+    return " ".join(rng.sample(WORDS, 4)) + f" {rng.randrange(10 ** 6)}"
+
+
+def play_player(player, lobby_code, mode, args, rng):
+    """A non-host player: join, then submit and vote every round until game over. Returns the failure, if any."""
+    try:
+        _play_rounds(player, lobby_code, mode, args, rng)
+    except Failed as e:
+        return e
+
+
+def _play_rounds(player, lobby_code, mode, args, rng):
+    think(args)
+    player.emit("join_lobby", {"username": player.name, "lobbyCode": lobby_code})
+    player.wait_for("game_started")
+    own_event = f"player_own_{mode.reveal_key}"
+    while True:
+        player.wait_for(mode.round_started_event)
+        think(args)
+        _, own = player.emit(mode.submit_event, {"lobbyCode": lobby_code, "player": player.name, mode.submit_field: answer_text(rng)},
+                             replies=(own_event,))
+        reveal = player.wait_for_final_reveal(mode)
+        think(args)
+        options = reveal[mode.reveal_key]
+        ids = reveal.get("answerIds") or list(range(len(options)))
+        # the games turn down votes for your own answer (as stored, after censoring and merging)
+        ids = [i for i, text in zip(ids, options) if text not in own[mode.reveal_key]] or ids
+        player.emit(mode.vote_event, {"lobbyCode": lobby_code, "player": player.name, "answerId": rng.choice(ids)},
+                    replies=("vote_confirmed",))
+        name, _ = player.wait_for("round_ended", "game_over")
+        if name == "game_over":
+            return
+
+
+def play_lobby(number, mode, connect, stats, args):
+    """Host one lobby from creation to game over; True if the game finished."""
+    rng = random.Random(number)
+    players = []
+    threads = []
+    pool = eventlet.GreenPool()
+    try:
+        host = Player(f"host{number}", connect, stats, args.timeout)
+        players.append(host)
+        _, created = host.emit("create_lobby", {"username": host.name, "maxPlayers": args.players + 1, "maxRounds": args.rounds})
+        lobby_code = created["lobbyCode"]
+
+        guests = [Player(f"p{number}_{i}", connect, stats, args.timeout) for i in range(args.players)]
+        players.extend(guests)
+        threads.extend(pool.spawn(play_player, guest, lobby_code, mode, args, rng) for guest in guests)
+        joined = 0
+        while joined < len(guests):
+            _, update = host.wait_for("lobby_update")
+            joined = len(update.get("players", [])) - 1
+
+        think(args)
+        host.emit("start_game", {"lobbyCode": lobby_code, "username": host.name, "mode": mode.name})
+        fields = {k: v.format(n=number) for k, v in START_FIELDS[mode.name].items()}
+        for _ in range(args.rounds):
+            think(args)
+            host.emit(mode.start_event, dict(fields, lobbyCode=lobby_code, username=host.name),
+                      replies=(mode.round_started_event,))
+            if mode.name != "emoji_translation":
+                # the host answers too, except in emoji translation where they set the prompt
+                host.emit(mode.submit_event, {"lobbyCode": lobby_code, "player": host.name, mode.submit_field: answer_text(rng)},
+                          replies=(f"player_own_{mode.reveal_key}",))
+            try:
+                name, _ = host.wait_for("round_ended", "game_over")
+            except Failed:
+                # voting stalled: end the round by hand
+                name, _ = host.emit("end_round", {"lobbyCode": lobby_code, "username": host.name})
+            if name == "game_over":
+                break
+        for thread in threads:
+            error = thread.wait()
+            if error:
+                raise error
+        return True
+    except Exception as e:
+        stats.failures[str(e).split(":")[-1].strip()] += 1
+        return False
+    finally:
+        for thread in threads:
+            thread.kill()
+        for player in players:
+            player.close()
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def report(stats, elapsed, args):
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    summary = {
+        "lobbies": args.lobbies,
+        "completed": stats.completed,
+        "failed": stats.failed,
+        "seconds": round(elapsed, 2),
+        "events": stats.sent,
+        "events_per_second": round(stats.sent / elapsed, 1) if elapsed else 0.0,
+        "error_replies": stats.errors,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "latency_ms": {
+            event: {
+                "count": len(values),
+                "p50": round(percentile(values, 0.50) * 1000, 2),
+                "p99": round(percentile(values, 0.99) * 1000, 2),
+                "max": round(max(values) * 1000, 2),
+            }
+            for event, values in sorted(stats.latency.items())
+        },
+        "failures": dict(stats.failures),
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"lobbies: {stats.completed} completed, {stats.failed} failed in {elapsed:.1f}s")
+    print(f"events:  {stats.sent} sent, {summary['events_per_second']}/s, {stats.errors} error replies")
+    print(f"{'event':<40} {'count':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for event, row in summary["latency_ms"].items():
+        print(f"{event:<40} {row['count']:>7} {row['p50']:>9} {row['p99']:>9} {row['max']:>9}")
+    where = "this process" if args.url else "this process, server included"
+    print(f"peak RSS: {summary['peak_rss_mb']} MB ({where})")
+    for reason, count in sorted(stats.failures.items(), key=lambda kv: -kv[1]):
+        print(f"  failed x{count}: {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many Conundrum Corner games at once.")
+    parser.add_argument("--url", default=None, help="server to load over real sockets (default: in-process test clients)")
+    parser.add_argument("--lobbies", type=int, default=100, help="games to play in total")
+    parser.add_argument("--concurrency", type=int, default=50, help="games in flight at once")
+    parser.add_argument("--players", type=int, default=4, help="players per lobby, not counting the host")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--modes", default="obviously_lies,reverse_guessing,bad_advice_hotline,emoji_translation")
+    parser.add_argument("--think-min", type=float, default=0.05, help="seconds")
+    parser.add_argument("--think-max", type=float, default=0.5, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for any one reply")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    if not args.url:
+        # the app loads its data files relative to the repo root
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    connect = over_socket(args.url) if args.url else in_process()
+    from conundrum.games.registry import MODES
+    modes = [MODES[name] for name in args.modes.split(",") if name]
+
+    stats = Stats()
+    pool = eventlet.GreenPool(max(1, args.concurrency))
+    started = time.perf_counter()
+    for finished in pool.imap(
+        lambda n: play_lobby(n, modes[n % len(modes)], connect, stats, args),
+        range(args.lobbies),
+    ):
+        if finished:
+            stats.completed += 1
+        else:
+            stats.failed += 1
+    report(stats, time.perf_counter() - started, args)
+
+
+if __name__ == "__main__":
+    main()
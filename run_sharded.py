@@ -0,0 +1,160 @@
+# run_sharded.py
+"""
+Run Conundrum Corner as N worker processes, one lobby shard each.
+
+    python run_sharded.py --workers 4 --base-port 5001
+
+Worker i listens on base-port + i. Lobby codes are spread over the workers by
+consistent hashing (conundrum/utils/sharding.py); a client that reaches the
+wrong worker is redirected to the owner, so every lobby lives in one
+process's memory. The worker list is written to a ring file the workers
+re-read while running.
+
+Send SIGUSR1 to add a worker. The ring is rewritten once it is listening and
+lobbies that now belong to it are handed off, which needs a shared state
+store (CONUNDRUM_STATE_URL=redis://... and CONUNDRUM_STATE_KEY); without one
+they stay where they are until they close and only new lobbies land on the
+new worker.
+"""
+import argparse
+import os
+import signal
+import socket as pysocket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def serve(host, port):
+    from conundrum import create_app, socketio
+    app = create_app()
+    socketio.run(app, host=host, port=port)
+
+
+class Launcher:
+    def __init__(self, host, base_port, public_url, ring_file):
+        self.host = host
+        self.base_port = base_port
+        self.public_url = public_url
+        self.ring_file = ring_file
+        # workers[url] = subprocess.Popen
+        self.workers = {}
+        self.pending_adds = 0
+        self.stopping = False
+
+    def url_for(self, port):
+        return self.public_url.format(host=self.host, port=port).rstrip("/")
+
+    def write_ring(self):
+        # replace atomically so workers never read a half-written list
+        tmp = f"{self.ring_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.workers) + "\n")
+        os.replace(tmp, self.ring_file)
+
+    def spawn(self, port):
+        url = self.url_for(port)
+        env = dict(os.environ, CONUNDRUM_WORKER_URL=url, CONUNDRUM_RING_FILE=self.ring_file)
+        if env.get("CONUNDRUM_SNAPSHOT_PATH"):
+            # one snapshot per worker
+            env["CONUNDRUM_SNAPSHOT_PATH"] = f"{env['CONUNDRUM_SNAPSHOT_PATH']}.{port}"
+        cmd = [sys.executable, os.path.abspath(__file__), "--serve", str(port), "--host", self.host]
+        proc = subprocess.Popen(cmd, env=env)
+        print(f"[Launcher] worker {url} started (pid {proc.pid})")
+        return url, proc
+
+    def wait_listening(self, port, timeout=15.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with pysocket.create_connection((self.host, port), timeout=0.5):
+                    return True
+            except OSError:
+                time.sleep(0.2)
+        return False
+
+    def add_worker(self):
+        port = self.base_port + len(self.workers)
+        # keep the new worker out of the ring until it can take traffic
+        url, proc = self.spawn(port)
+        if not self.wait_listening(port):
+            print(f"[Launcher] worker {url} did not start listening; not adding it")
+            proc.terminate()
+            return
+        self.workers[url] = proc
+        self.write_ring()
+        print(f"[Launcher] worker {url} added; {len(self.workers)} workers")
+
+    def start(self, count):
+        ports = [self.base_port + i for i in range(count)]
+        # every worker reads the ring at startup, so it is written before any of them starts
+        self.workers = {self.url_for(port): None for port in ports}
+        self.write_ring()
+        for port in ports:
+            url, proc = self.spawn(port)
+            self.workers[url] = proc
+
+    def stop(self, timeout=10.0):
+        for proc in self.workers.values():
+            proc.terminate()
+        for proc in self.workers.values():
+            try:
+                proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def run(self):
+        signal.signal(signal.SIGUSR1, self._on_add)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        try:
+            while not self.stopping:
+                while self.pending_adds:
+                    self.pending_adds -= 1
+                    self.add_worker()
+                for url, proc in self.workers.items():
+                    if proc.poll() is not None:
+                        print(f"[Launcher] worker {url} exited with {proc.returncode}; stopping")
+                        self.stopping = True
+                time.sleep(0.5)
+        finally:
+            self.stop()
+            try:
+                os.remove(self.ring_file)
+            except OSError:
+                pass
+
+    def _on_add(self, signum, frame):
+        self.pending_adds += 1
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run lobby-sharded Conundrum Corner workers.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=5001)
+    parser.add_argument("--public-url", default="http://{host}:{port}",
+                        help="how clients reach a worker; {host} and {port} are filled in")
+    parser.add_argument("--ring-file", default=None)
+    parser.add_argument("--serve", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        serve(args.host, args.serve)
+        return
+
+    if not os.environ.get("CONUNDRUM_STATE_URL"):
+        print("[Launcher] no CONUNDRUM_STATE_URL: lobbies cannot be handed off when workers are added")
+    ring_file = args.ring_file or os.path.join(tempfile.gettempdir(), f"conundrum-ring-{os.getpid()}.txt")
+    launcher = Launcher(args.host, args.base_port, args.public_url, ring_file)
+    launcher.start(max(1, args.workers))
+    launcher.run()
+
+
+if __name__ == "__main__":
+    main()
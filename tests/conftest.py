@@ -0,0 +1,33 @@
+import pytest
+
+from conundrum.games.registry import MODES
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.lobby_codes import code_allocator
+from conundrum.utils.presence import presence
+from conundrum.utils.rng import lobby_rng
+from conundrum.utils.round_manager import round_manager
+
+
+def wipe_state():
+    """Forget every lobby, as a freshly started process would."""
+    lobby_registry.lobbies = {}
+    lobby_registry.by_sid = {}
+    round_manager.state = {}
+    round_manager.handlers = {}
+    lobby_rng.streams.clear()
+    presence.departed.clear()
+    presence.by_lobby.clear()
+    for mode in MODES.values():
+        if mode.is_loaded():
+            mode.manager.games = {}
+            mode.manager.duplicates.lobbies = {}
+
+
+@pytest.fixture
+def clean_state():
+    """Live lobby state starts empty and is thrown away after the test."""
+    in_use = set(code_allocator.in_use)
+    wipe_state()
+    yield
+    wipe_state()
+    code_allocator.in_use = in_use
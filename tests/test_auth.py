@@ -0,0 +1,35 @@
+import pytest
+
+import loadtest
+from conundrum.utils.lobbies import LobbyRegistry
+
+
+def test_unbound_sockets_are_nobody():
+    registry = LobbyRegistry()
+    lobby = registry.create("ABCD", "host")
+    registry.bind(lobby, "host", "sid-host")
+    other = registry.create("WXYZ", "someone")
+    registry.bind(other, "someone", "sid-other")
+
+    assert registry.player_for(lobby, "sid-host") == "host"
+    assert registry.player_for(lobby, "sid-unknown") is None
+    # bound, but to a different lobby
+    assert registry.player_for(lobby, "sid-other") is None
+
+
+@pytest.mark.parametrize("event, data", [
+    ("start_game", {"mode": "obviously_lies", "username": "host"}),
+    ("send_message", {"message": "hi", "username": "host"}),
+])
+def test_events_from_outside_the_lobby_are_rejected(event, data):
+    connect = loadtest.in_process()
+    host = loadtest.Player("host", connect, loadtest.Stats(), timeout=5)
+    _, created = host.emit("create_lobby", {"username": "host", "maxPlayers": 4})
+    outsider = loadtest.Player("outsider", connect, loadtest.Stats(), timeout=5)
+
+    outsider.client.emit(event, dict(data, lobbyCode=created["lobbyCode"]))
+
+    with pytest.raises(loadtest.Failed, match="not in this lobby"):
+        outsider.wait_for("game_started", "lobby_batch")
+    host.close()
+    outsider.close()
@@ -0,0 +1,96 @@
+import pytest
+
+from conundrum.utils.broadcast import BATCH_EVENT, RoomBatcher
+
+
+class _Socket:
+    """Records emits; ticks are queued and only run when the test says so."""
+
+    def __init__(self):
+        self.sent = []
+        self.ticks = []
+
+    def emit(self, event, payload, to=None):
+        self.sent.append((event, to, payload))
+
+    def start_background_task(self, target, *args):
+        self.ticks.append((target, args))
+
+    def sleep(self, seconds):
+        pass
+
+    def run_ticks(self):
+        ticks, self.ticks = self.ticks, []
+        for target, args in ticks:
+            target(*args)
+
+
+@pytest.fixture
+def socket():
+    return _Socket()
+
+
+@pytest.fixture
+def batcher(socket):
+    batcher = RoomBatcher()
+    batcher.configure(socket, window_ms=50)
+    return batcher
+
+
+def test_a_window_of_updates_goes_out_as_one_event(batcher, socket):
+    batcher.update("ABCD", "votes", {"p1": 0})
+    batcher.update("ABCD", "votes", {"p1": 0, "p2": 1})
+    batcher.set("ABCD", "tallies", [1, 1])
+    batcher.append("ABCD", "chat", "hi")
+    batcher.append("ABCD", "chat", "there")
+    batcher.update("WXYZ", "scores", {"p9": 5})
+    # one tick per lobby, however many updates were queued
+    assert len(socket.ticks) == 2
+    assert socket.sent == []
+
+    socket.run_ticks()
+    assert socket.sent == [
+        (BATCH_EVENT, "ABCD", {"votes": {"p1": 0, "p2": 1}, "tallies": [1, 1], "chat": ["hi", "there"]}),
+        (BATCH_EVENT, "WXYZ", {"scores": {"p9": 5}}),
+    ]
+
+
+def test_only_changes_are_sent(batcher, socket):
+    batcher.update("ABCD", "scores", {"p1": 0, "p2": 0})
+    batcher.set("ABCD", "tallies", [0, 0])
+    batcher.flush("ABCD")
+    batcher.update("ABCD", "scores", {"p1": 5, "p2": 0})
+    batcher.set("ABCD", "tallies", [0, 0])
+    batcher.flush("ABCD")
+    assert socket.sent[-1] == (BATCH_EVENT, "ABCD", {"scores": {"p1": 5}})
+
+    # nothing changed: nothing is sent
+    batcher.update("ABCD", "scores", {"p1": 5, "p2": 0})
+    batcher.flush("ABCD")
+    assert len(socket.sent) == 2
+
+
+def test_a_shrunk_mapping_is_sent_whole(batcher, socket):
+    batcher.update("ABCD", "votes", {"p1": 0, "p2": 1})
+    batcher.flush("ABCD")
+    batcher.update("ABCD", "votes", {"p1": 0})
+    batcher.flush("ABCD")
+    assert socket.sent[-1] == (BATCH_EVENT, "ABCD", {"reset": ["votes"], "votes": {"p1": 0}})
+
+
+def test_flush_before_a_tick_leaves_the_tick_nothing_to_send(batcher, socket):
+    batcher.append("ABCD", "chat", "hi")
+    batcher.flush("ABCD")
+    socket.run_ticks()
+    assert len(socket.sent) == 1
+
+
+def test_release_flushes_and_forgets(batcher, socket):
+    batcher.update("ABCD", "scores", {"p1": 1})
+    batcher.release("ABCD")
+    assert socket.sent == [(BATCH_EVENT, "ABCD", {"scores": {"p1": 1}})]
+    assert "ABCD" not in batcher.sent
+    # a reopened lobby starts from scratch
+    batcher.update("ABCD", "scores", {"p1": 1})
+    batcher.flush("ABCD")
+    assert socket.sent[-1] == (BATCH_EVENT, "ABCD", {"scores": {"p1": 1}})
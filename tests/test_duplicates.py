@@ -0,0 +1,39 @@
+import pytest
+
+from conundrum.utils.duplicates import DuplicateDetector
+
+
+@pytest.fixture
+def detector():
+    detector = DuplicateDetector()
+    detector.add("ABCD", "The Eiffel Tower is in Berlin")
+    detector.add("ABCD", "Paris")
+    return detector
+
+
+@pytest.mark.parametrize("text", [
+    "the eiffel tower is in berlin!!",
+    "The Eifel Tower is in Berlin",
+    "The Eiffel Tower is in Berln",
+])
+def test_near_copies_are_found(detector, text):
+    assert detector.find("ABCD", text) == "The Eiffel Tower is in Berlin"
+
+
+@pytest.mark.parametrize("text", ["The Eiffel Tower is in Rome", "Berlin", "Pariss", "Paros", "Parts"])
+def test_different_answers_are_not(detector, text):
+    assert detector.find("ABCD", text) is None
+
+
+def test_short_answers_only_merge_when_equal():
+    detector = DuplicateDetector()
+    for text in ("cat", "bat", "car", "cats"):
+        assert detector.find("ABCD", text) is None
+        detector.add("ABCD", text)
+    assert detector.find("ABCD", "Cat.") == "cat"
+
+
+def test_lobbies_are_separate(detector):
+    assert detector.find("WXYZ", "Paris") is None
+    detector.reset("ABCD")
+    assert detector.find("ABCD", "Paris") is None
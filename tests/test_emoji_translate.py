@@ -0,0 +1,21 @@
+import pytest
+
+from conundrum import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize("body", [{"text": 5}, {"text": ["cat"]}, {"text": None}, ["cat"]])
+def test_translate_rejects_non_string_text(client, body):
+    resp = client.post("/games/emoji/translate", json=body)
+    assert resp.status_code == 400
+    assert resp.get_json() == {"success": False, "error": "text must be a string"}
+
+
+def test_translate_accepts_string_text(client):
+    resp = client.post("/games/emoji/translate", json={"text": "cat"})
+    assert resp.status_code == 200
+    assert resp.get_json()["original"] == "cat"
@@ -0,0 +1,220 @@
+import os
+import pickle
+import signal
+
+import pytest
+
+from conundrum.utils import snapshot
+from conundrum.utils.event_log import EventLog
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.round_manager import round_manager
+from conundrum.utils.snapshot import Snapshotter
+
+from conftest import wipe_state
+
+
+@pytest.fixture
+def log(tmp_path, clean_state, monkeypatch):
+    log = EventLog()
+    log.configure(str(tmp_path / "wal"))
+    monkeypatch.setattr(snapshot, "event_log", log)
+    return log
+
+
+def vote_record_size(log, players):
+    """Bytes logged for one vote in a lobby of that many players."""
+    code = f"V{players:03d}"
+    lobby = lobby_registry.create(code, "host", max_players=players + 1)
+    for n in range(players):
+        lobby.add(f"player{n}")
+    lobby.options = {"options": [f"answer {n}" for n in range(players)], "tallies": [0] * players}
+    log.record(code)
+    log.flush()
+    before = os.path.getsize(log.segment_path(0))
+    lobby.votes["player1"] = players - 1
+    lobby.options["tallies"][players - 1] += 1
+    log.record(code)
+    log.flush()
+    return os.path.getsize(log.segment_path(0)) - before
+
+
+def membership():
+    return {code: list(lobby.players) for code, lobby in lobby_registry.lobbies.items()}
+
+
+def test_replay_restores_logged_lobbies(log):
+    lobby = lobby_registry.create("ABCD", "host")
+    round_manager.register_lobby("ABCD", max_rounds=3)
+    log.record("ABCD")
+    lobby.add("p1")
+    round_manager.start_round("ABCD")
+    log.record("ABCD")
+    lobby_registry.create("WXYZ", "other")
+    log.record("WXYZ")
+    log.flush()
+    expected = membership()
+
+    wipe_state()
+    assert log.replay() == 3
+    assert membership() == expected
+    assert round_manager.state["ABCD"]["round_active"]
+
+
+@pytest.mark.parametrize("damage", ["truncated", "bad_crc", "garbage"])
+def test_replay_stops_at_a_torn_or_corrupt_tail(log, damage):
+    lobby = lobby_registry.create("ABCD", "host")
+    log.record("ABCD")
+    lobby.add("p1")
+    log.record("ABCD")
+    log.flush()
+    committed = membership()
+    with open(log.segment_path(0), "rb") as f:
+        good_size = len(f.read())
+
+    lobby.add("p2")
+    log.record("ABCD")
+    log.flush()
+    path = log.segment_path(0)
+    with open(path, "rb") as f:
+        data = f.read()
+    if damage == "truncated":
+        data = data[:-3]
+    elif damage == "bad_crc":
+        data = data[:good_size + 4] + bytes([data[good_size + 4] ^ 0xFF]) + data[good_size + 5:]
+    else:
+        data = data[:good_size] + b"\x00\x00\x00\x10not a record"
+    with open(path, "wb") as f:
+        f.write(data)
+
+    wipe_state()
+    assert log.replay() == 2
+    assert membership() == committed
+    # new records go to a fresh segment, never after the torn one
+    assert log.segment == 1
+
+
+def test_closed_lobbies_stay_closed_after_replay(log):
+    lobby_registry.create("ABCD", "host")
+    log.record("ABCD")
+    lobby_registry.remove("ABCD")
+    log.record("ABCD")
+    log.flush()
+
+    wipe_state()
+    assert log.replay() == 2
+    assert "ABCD" not in lobby_registry
+
+
+def test_compaction_keeps_the_latest_state(log, tmp_path, monkeypatch):
+    monkeypatch.delattr(snapshot.os, "fork")
+    snapper = Snapshotter()
+    snapper.configure(None, str(tmp_path / "snap"))
+
+    lobby = lobby_registry.create("ABCD", "host")
+    log.record("ABCD")
+    lobby.add("p1")
+    log.record("ABCD")
+    # the writer has caught up by the time a snapshot is taken
+    log.flush()
+    assert snapper.take()
+    log.flush()
+    assert log._segments() == []
+
+    lobby.add("p2")
+    log.record("ABCD")
+    lobby_registry.create("WXYZ", "other")
+    log.record("WXYZ")
+    log.flush()
+    assert log._segments() == [1]
+    assert snapper.take()
+    log.flush()
+    # everything logged so far is covered by the latest snapshot
+    assert log._segments() == []
+
+    lobby.add("p3")
+    log.record("ABCD")
+    log.flush()
+    assert log._segments() == [2]
+    expected = membership()
+
+    wipe_state()
+    assert snapper.recover()
+    assert membership() == expected
+
+
+def test_snapshot_plus_log_recovery_restores_lobbies(log, tmp_path, monkeypatch):
+    monkeypatch.delattr(snapshot.os, "fork")
+    snapper = Snapshotter()
+    snapper.configure(None, str(tmp_path / "snap"))
+
+    lobby_registry.create("ABCD", "host").add("p1")
+    log.record("ABCD")
+    assert snapper.take()
+    # after the snapshot: one lobby changes, one closes, one opens
+    lobby_registry.get("ABCD").add("p2")
+    log.record("ABCD")
+    lobby_registry.create("WXYZ", "other")
+    log.record("WXYZ")
+    lobby_registry.create("GONE", "left")
+    log.record("GONE")
+    lobby_registry.remove("GONE")
+    log.record("GONE")
+    log.flush()
+    expected = membership()
+
+    wipe_state()
+    assert snapper.recover()
+    assert membership() == expected
+    # every socket died with the old process: players are waiting out their grace window
+    assert all(not lobby.sids for lobby in lobby_registry.lobbies.values())
+
+
+def test_sigterm_drains_the_log_before_the_snapshot_and_chains(log, tmp_path):
+    snapper = Snapshotter()
+    snapper.configure(None, str(tmp_path / "snap"))
+    chained = []
+    before = signal.signal(signal.SIGTERM, lambda signum, frame: chained.append(signum))
+    try:
+        snapper.snapshot_on_shutdown()
+        lobby_registry.create("ABCD", "host").add("p1")
+        log.record("ABCD")
+        writer = log._writer
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+    finally:
+        signal.signal(signal.SIGTERM, before)
+
+    assert chained == [signal.SIGTERM]
+    assert not writer.is_alive() and log._writer is None and not log._queue
+    expected = membership()
+    wipe_state()
+    assert snapper.recover()
+    assert membership() == expected
+
+
+def test_records_stay_small_as_a_lobby_grows(log):
+    small, large = vote_record_size(log, 5), vote_record_size(log, 500)
+    assert large <= small + 16
+    assert large < 200
+
+
+def test_deltas_replay_to_the_same_state(log):
+    lobby = lobby_registry.create("ABCD", "host")
+    for n in range(6):
+        lobby.add(f"p{n}")
+    round_manager.register_lobby("ABCD", max_rounds=3)
+    log.record("ABCD")
+    lobby.options = {"options": ["a", "b", "c"], "tallies": [0, 0, 0]}
+    log.record("ABCD")
+    lobby.votes["p1"] = 2
+    lobby.options["tallies"][2] += 1
+    round_manager.start_round("ABCD")
+    log.record("ABCD")
+    lobby_registry.remove_player(lobby, "p3")
+    lobby.set_host("p0")
+    log.record("ABCD")
+    log.flush()
+    expected = (lobby.__getstate__(), pickle.loads(pickle.dumps(round_manager.state["ABCD"])))
+
+    wipe_state()
+    assert log.replay() == 4
+    assert (lobby_registry.get("ABCD").__getstate__(), round_manager.state["ABCD"]) == expected
@@ -0,0 +1,83 @@
+from conundrum.games.emoji_translation import AUTO_SCORE_POINTS, EmojiTranslationGame
+from conundrum.games.obviously_lies import ObviouslyLiesGame
+from conundrum.utils.emoji_index import EmojiIndex
+
+INDEX = EmojiIndex({
+    "emotions": [
+        {"emoji": "😂", "keywords": ["laughing", "tears of joy", "funny"]},
+        {"emoji": "😢", "keywords": ["sad", "crying"]},
+    ],
+    "animals": [
+        {"emoji": "🐶", "keywords": ["dog", "puppy"]},
+    ],
+})
+
+
+def emoji_round(guesses):
+    game = EmojiTranslationGame(INDEX)
+    game.start_round("ABCD", "😂🐶", ["host", *guesses], host="host")
+    for player, guess in guesses.items():
+        assert game.submit_guess("ABCD", player, guess)
+    return game
+
+
+def test_auto_score_awards_a_share_of_the_points():
+    game = emoji_round({"both": "laughing dogs", "half": "a funny hat", "miss": "sad cat"})
+    similarity = game.auto_score_round("ABCD")
+    assert similarity == {"both": 1.0, "half": 0.5, "miss": 0.0}
+    assert game.get_scores("ABCD") == {
+        "both": AUTO_SCORE_POINTS,
+        "half": round(0.5 * AUTO_SCORE_POINTS),
+        "miss": 0,
+    }
+    assert game.end_round("ABCD")["details"]["similarity"] == similarity
+
+
+def test_auto_score_runs_once_per_round():
+    game = emoji_round({"p1": "puppy crying with laughter"})
+    game.auto_score_round("ABCD")
+    game.auto_score_round("ABCD")
+    assert game.get_scores("ABCD") == {"p1": round(0.5 * AUTO_SCORE_POINTS)}
+
+    # the next round is scored afresh
+    game.reset_round_state("ABCD")
+    game.submit_guess("ABCD", "p1", "funny puppy")
+    game.auto_score_round("ABCD")
+    assert game.get_scores("ABCD") == {"p1": round(0.5 * AUTO_SCORE_POINTS) + AUTO_SCORE_POINTS}
+
+
+def test_auto_score_ignores_unknown_emoji():
+    game = EmojiTranslationGame(INDEX)
+    game.start_round("ABCD", "🚀", ["host", "p1"], host="host")
+    game.submit_guess("ABCD", "p1", "rocket")
+    assert game.auto_score_round("ABCD") == {"p1": 0.0}
+    assert game.get_scores("ABCD") == {"p1": 0}
+
+
+def test_near_duplicate_lies_merge_and_share_credit():
+    game = ObviouslyLiesGame()
+    game.start_round("ABCD", "Where is the Eiffel Tower?", "Paris", ["host", "p1", "p2", "p3"], host="host")
+    assert game.submit_false_answer("ABCD", "p1", "The Eiffel Tower is in Berlin")
+    assert game.submit_false_answer("ABCD", "p2", "the Eifel tower is in Berlin!")
+    assert game.submit_false_answer("ABCD", "p3", "Rome")
+    assert game.get_all_answers("ABCD") == sorted(["Paris", "The Eiffel Tower is in Berlin", "Rome"])
+    assert game.games["ABCD"]["answer_to_player"]["The Eiffel Tower is in Berlin"] == {"p1", "p2"}
+
+    assert game.cast_vote("ABCD", "p3", "The Eiffel Tower is in Berlin")
+    scores = game.get_scores("ABCD")
+    assert scores["p1"] == scores["p2"] > 0
+    # neither owner may vote for the merged answer
+    assert not game.cast_vote("ABCD", "p2", "The Eiffel Tower is in Berlin")
+
+
+def test_a_copy_of_the_truth_is_rejected():
+    game = ObviouslyLiesGame()
+    game.start_round("ABCD", "Capital of France?", "Paris", ["host", "p1"], host="host")
+    assert not game.submit_false_answer("ABCD", "p1", "paris!")
+    assert game.submit_false_answer("ABCD", "p1", "Lyon")
+
+
+def test_short_distinct_guesses_stay_apart():
+    game = emoji_round({"p1": "cat", "p2": "bat", "p3": "Cat"})
+    assert game.get_all_guesses("ABCD") == ["bat", "cat"]
+    assert game.games["ABCD"]["guess_to_player"]["cat"] == {"p1", "p3"}
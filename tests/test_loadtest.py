@@ -0,0 +1,49 @@
+import argparse
+import json
+
+import pytest
+
+import loadtest
+from conundrum.games.registry import MODES
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_every_mode_plays_to_game_over(clean_state, mode):
+    args = argparse.Namespace(players=3, rounds=2, think_min=0.0, think_max=0.01, timeout=10.0)
+    stats = loadtest.Stats()
+    assert loadtest.play_lobby(0, MODES[mode], loadtest.in_process(), stats, args), dict(stats.failures)
+    assert not stats.errors
+    assert stats.latency[MODES[mode].start_event]
+    assert len(stats.latency[MODES[mode].vote_event]) == 3 * 2
+
+
+def test_a_failed_lobby_is_counted_not_raised(clean_state):
+    # nobody can answer within no time at all
+    args = argparse.Namespace(players=2, rounds=1, think_min=0.0, think_max=0.0, timeout=0.0)
+    stats = loadtest.Stats()
+    assert not loadtest.play_lobby(0, MODES["obviously_lies"], loadtest.in_process(), stats, args)
+    assert sum(stats.failures.values()) == 1
+
+
+def test_percentile():
+    values = [0.004, 0.001, 0.003, 0.002]
+    assert loadtest.percentile(values, 0.0) == 0.001
+    assert loadtest.percentile(values, 0.5) == 0.003
+    assert loadtest.percentile(values, 0.99) == 0.004
+
+
+def test_main_reports_json(clean_state, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", [
+        "loadtest.py", "--lobbies", "4", "--concurrency", "4", "--players", "2", "--rounds", "1",
+        "--think-min", "0", "--think-max", "0.01", "--timeout", "10", "--json",
+    ])
+    loadtest.main()
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["completed"] == 4
+    assert summary["failed"] == 0
+    assert summary["error_replies"] == 0
+    assert summary["latency_ms"]["create_lobby"]["count"] == 4
+    # one lobby per mode, round-robin
+    assert {event for event in summary["latency_ms"] if event.endswith("_start_round")} == {
+        mode.start_event for mode in MODES.values()
+    }
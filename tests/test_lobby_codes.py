@@ -0,0 +1,122 @@
+import random
+from itertools import product
+
+import pytest
+
+from conundrum.utils.lobby_codes import CodeAllocator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_allocator(clock, alphabet="ABC", length=2, quarantine=10.0, seed=7):
+    allocator = CodeAllocator(alphabet=alphabet, length=length, quarantine=quarantine)
+    allocator.configure(random.Random(seed))
+    allocator.clock = clock
+    return allocator
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_permutation_is_a_bijection_over_the_code_space(clock, seed):
+    allocator = make_allocator(clock, alphabet="ABCDE", length=4, seed=seed)
+    issued = [allocator.allocate() for _ in range(allocator.space)]
+    assert len(set(issued)) == allocator.space
+    assert set(issued) == {"".join(p) for p in product("ABCDE", repeat=4)}
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+
+def test_permutation_is_keyed_by_the_rng(clock):
+    def order(seed):
+        allocator = make_allocator(clock, seed=seed)
+        return tuple(allocator.allocate() for _ in range(allocator.space))
+
+    assert order(1) == order(1)
+    assert len({order(seed) for seed in range(10)}) > 1
+
+
+def test_released_codes_stay_quarantined(clock):
+    allocator = make_allocator(clock)
+    codes = [allocator.allocate() for _ in range(allocator.space)]
+    allocator.release(codes[0])
+    # the permutation is used up and the only released code is still in quarantine
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+    assert allocator.stats()["quarantined"] == 1
+
+    clock.now = 9.9
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+    clock.now = 10.0
+    assert allocator.allocate() == codes[0]
+
+
+def test_free_list_is_used_only_after_the_permutation(clock):
+    allocator = make_allocator(clock, quarantine=0.0)
+    first = allocator.allocate()
+    allocator.release(first)
+    fresh = [allocator.allocate() for _ in range(allocator.space - 1)]
+    # every fresh code is issued before the released one comes back
+    assert first not in fresh
+    assert allocator.stats()["fresh_remaining"] == 0
+    assert allocator.allocate() == first
+
+
+def test_free_list_reuse_in_release_order(clock):
+    allocator = make_allocator(clock, quarantine=5.0)
+    codes = [allocator.allocate() for _ in range(allocator.space)]
+    for n, code in enumerate(codes[:3]):
+        clock.now = n
+        allocator.release(code)
+    clock.now = 100.0
+    assert [allocator.allocate() for _ in range(3)] == codes[:3]
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+
+def test_claimed_and_rejected_codes_are_skipped(clock):
+    claimed = make_allocator(clock).allocate()
+    allocator = make_allocator(clock)
+    allocator.claim(claimed)
+    offered = []
+    issued = allocator.allocate(accept=lambda code: offered.append(code) or len(offered) > 1)
+    # the claimed code is skipped without being offered, the first offer is turned down
+    assert claimed not in offered
+    assert issued == offered[1]
+    assert allocator.stats()["skipped"] == 2
+
+
+def test_a_share_is_walked_without_touching_other_codes(clock):
+    allocator = make_allocator(clock, alphabet="ABCDE", length=4)
+    share = [(3, 40), (100, 101), (500, 620)]
+    allocator.set_share(share)
+    offered = []
+    issued = [allocator.allocate(accept=lambda code: offered.append(code) or True) for _ in range(158)]
+    values = {allocator._decode(code) for code in issued}
+    assert values == set(range(3, 40)) | {100} | set(range(500, 620))
+    # nothing outside the share was ever drawn, let alone offered
+    assert offered == issued and allocator.stats()["skipped"] == 0
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+
+def test_a_new_share_skips_codes_still_in_quarantine(clock):
+    allocator = make_allocator(clock, alphabet="ABCDE", length=4)
+    allocator.set_share([(0, 10)])
+    codes = [allocator.allocate() for _ in range(10)]
+    allocator.release(codes[0])
+    allocator.set_share([(0, 20)])
+    issued = [allocator.allocate() for _ in range(10)]
+    assert codes[0] not in issued and not set(codes) & set(issued)
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
@@ -0,0 +1,30 @@
+import json
+
+import conundrum.utils.metrics as metrics_module
+from conundrum.utils.metrics import Metrics
+
+
+class _Socket:
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, *args, **kwargs):
+        self.sent.append(event)
+
+
+def test_emits_are_counted_and_bytes_sampled(monkeypatch):
+    monkeypatch.setattr(metrics_module, "EMIT_SAMPLE", 4)
+    encoded = []
+    real_dumps = json.dumps
+    monkeypatch.setattr(metrics_module.json, "dumps", lambda *a, **k: encoded.append(1) or real_dumps(*a, **k))
+    metrics, socket = Metrics(), _Socket()
+    metrics.count_emits(socket)
+
+    for _ in range(8):
+        socket.emit("chat", {"m": "hi"})
+
+    assert socket.sent == ["chat"] * 8
+    assert len(encoded) == 2
+    emits, size = metrics.emitted["chat"]
+    assert emits == 8
+    assert size == 8 * len(real_dumps(({"m": "hi"},), separators=(",", ":")))
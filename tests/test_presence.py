@@ -0,0 +1,128 @@
+import pytest
+
+import loadtest
+from conundrum.games.registry import MODES
+from conundrum.socket import reap_departed
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.presence import Presence, presence
+from conundrum.utils.timer_wheel import timer_wheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def away(clock):
+    away = Presence()
+    away.configure(grace_seconds=15)
+    away.clock = clock
+    return away
+
+
+def test_players_are_due_once_their_grace_runs_out(away, clock):
+    away.disconnected("ABCD", "p1")
+    clock.now = 5.0
+    away.disconnected("ABCD", "p2")
+    away.disconnected("WXYZ", "p3")
+    clock.now = 14.9
+    assert away.due() == {}
+    clock.now = 20.0
+    assert away.due() == {"ABCD": ["p1", "p2"], "WXYZ": ["p3"]}
+    assert away.due() == {}
+    assert not away.by_lobby
+
+
+def test_coming_back_cancels_the_removal(away, clock):
+    away.disconnected("ABCD", "p1")
+    assert away.is_away("ABCD", "p1")
+    assert away.reconnected("ABCD", "p1")
+    assert not away.reconnected("ABCD", "p1")
+    clock.now = 60.0
+    assert away.due() == {}
+
+
+def test_dropping_again_restarts_the_grace(away, clock):
+    away.disconnected("ABCD", "p1")
+    clock.now = 10.0
+    away.disconnected("ABCD", "p1")
+    clock.now = 20.0
+    assert away.due() == {}
+    clock.now = 25.0
+    assert away.due() == {"ABCD": ["p1"]}
+
+
+def test_install_replaces_a_lobby_entries(away, clock):
+    away.disconnected("ABCD", "p1")
+    away.disconnected("WXYZ", "p3")
+    away.install("ABCD", {"p2": 5.0})
+    assert away.away("ABCD") == {"p2": 5.0}
+    assert away.away("WXYZ") == {"p3": 15.0}
+    clock.now = 15.0
+    assert away.due() == {"ABCD": ["p2"], "WXYZ": ["p3"]}
+
+
+@pytest.fixture
+def lobby_in_round(clean_state, monkeypatch):
+    """Host and two guests submitting in obviously_lies, on a clock the test controls."""
+    clock = FakeClock()
+    monkeypatch.setattr(presence, "clock", clock)
+    mode = MODES["obviously_lies"]
+    connect = loadtest.in_process()
+    players = {name: loadtest.Player(name, connect, loadtest.Stats(), timeout=5) for name in ("host", "p1", "p2")}
+    _, created = players["host"].emit("create_lobby", {"username": "host", "maxPlayers": 4})
+    lobby_code = created["lobbyCode"]
+    for name in ("p1", "p2"):
+        players[name].emit("join_lobby", {"username": name, "lobbyCode": lobby_code})
+    players["host"].emit("start_game", {"lobbyCode": lobby_code, "mode": mode.name})
+    players["host"].emit(mode.start_event,
+                         {"lobbyCode": lobby_code, "question": "Capital of France?", "correctAnswer": "Paris"},
+                         replies=(mode.round_started_event,))
+    for name, lie in (("host", "Berlin"), ("p1", "Lyon")):
+        players[name].emit(mode.submit_event, {"lobbyCode": lobby_code, mode.submit_field: lie})
+    yield lobby_code, players, clock, connect
+    timer_wheel.cancel(lobby_code)
+    for player in players.values():
+        player.close()
+
+
+def test_a_player_who_comes_back_in_time_keeps_their_place(lobby_in_round):
+    lobby_code, players, clock, connect = lobby_in_round
+    players["p2"].close()
+    assert presence.is_away(lobby_code, "p2")
+
+    players["p2"] = loadtest.Player("p2", connect, loadtest.Stats(), timeout=5)
+    players["p2"].emit("join_lobby", {"username": "p2", "lobbyCode": lobby_code})
+    assert not presence.is_away(lobby_code, "p2")
+    clock.now += presence.grace + 1
+    reap_departed()
+    assert "p2" in lobby_registry.get(lobby_code)
+
+
+def test_the_reaper_removes_players_and_moves_the_round_along(lobby_in_round):
+    lobby_code, players, clock, _ = lobby_in_round
+    mode = MODES["obviously_lies"]
+    players["p2"].close()
+    players["host"].close()
+
+    clock.now += presence.grace - 1
+    reap_departed()
+    assert "p2" in lobby_registry.get(lobby_code)
+
+    clock.now += 2
+    reap_departed()
+    lobby = lobby_registry.get(lobby_code)
+    assert lobby.players == ["p1"]
+    # the host left, so the longest-standing player took over
+    assert lobby.host == "p1"
+    # p2 was the last one missing: voting opens without them
+    assert "Lyon" in players["p1"].wait_for_final_reveal(mode)[mode.reveal_key]
@@ -0,0 +1,68 @@
+from conundrum.utils.prompt_bank import PromptBank
+from conundrum.utils.rng import lobby_rng
+
+PROMPTS = [f"prompt {n}" for n in range(10)]
+
+
+def make_bank():
+    bank = PromptBank()
+    bank.add_prompts("advice", PROMPTS + [
+        {"prompt": "How do I train a cat?", "tags": ["Animals"]},
+        {"prompt": "How do I walk a dog?", "tags": ["animals", "outdoors"]},
+        {"prompt": ""},
+    ])
+    lobby_rng.release("ABCD")
+    return bank
+
+
+def test_draws_do_not_repeat_until_the_bank_is_used_up():
+    bank = make_bank()
+    first = [bank.draw("ABCD", "advice") for _ in range(12)]
+    assert len(set(first)) == 12
+    # then a fresh pass over everything
+    second = [bank.draw("ABCD", "advice") for _ in range(12)]
+    assert set(second) == set(first)
+
+
+def test_tags_narrow_the_draw():
+    bank = make_bank()
+    assert {bank.draw("ABCD", "advice", "ANIMALS") for _ in range(2)} == {"How do I train a cat?", "How do I walk a dog?"}
+    assert bank.draw("ABCD", "advice", "outdoors") == "How do I walk a dog?"
+    assert bank.draw("ABCD", "advice", "cooking") is None
+    assert bank.draw("ABCD", "unknown") is None
+    assert not bank.has_prompts("advice", "cooking")
+
+
+def test_a_prefetched_prompt_is_served_next():
+    bank = make_bank()
+    ahead = bank.prefetch("ABCD", "advice")
+    # prefetching again does not draw another one
+    assert bank.prefetch("ABCD", "advice") == ahead
+    assert bank.draw("ABCD", "advice") == ahead
+    rest = [bank.draw("ABCD", "advice") for _ in range(11)]
+    assert ahead not in rest and len(set(rest)) == 11
+
+
+def test_release_forgets_a_lobby():
+    bank = make_bank()
+    bank.prefetch("ABCD", "advice")
+    bank.release("ABCD")
+    assert "ABCD" not in bank.cursors and "ABCD" not in bank.prefetched
+
+
+def test_switching_tags_gives_the_prefetched_prompt_back():
+    bank = make_bank()
+    ahead = bank.prefetch("ABCD", "advice")
+    assert bank.draw("ABCD", "advice", "animals") in ("How do I train a cat?", "How do I walk a dog?")
+    assert not bank.prefetched["ABCD"]
+    # the untagged prompt drawn ahead is back in its pass: nothing is lost or repeated
+    untagged = [bank.draw("ABCD", "advice") for _ in range(12)]
+    assert ahead in untagged and len(set(untagged)) == 12
+
+
+def test_the_next_prefetch_uses_the_last_tag():
+    bank = make_bank()
+    bank.draw("ABCD", "advice", "Animals")
+    assert bank.last_tag("ABCD", "advice") == "animals"
+    ahead = bank.prefetch("ABCD", "advice", bank.last_tag("ABCD", "advice"))
+    assert bank.draw("ABCD", "advice", "animals") == ahead
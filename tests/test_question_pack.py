@@ -0,0 +1,40 @@
+import json
+
+from conundrum.utils.prompt_bank import PromptBank
+from conundrum.utils.question_pack import PACK_FILES, QuestionPack, main
+
+
+def test_build_writes_a_pack_the_bank_loads(tmp_path):
+    source = tmp_path / "questions.json"
+    source.write_text(json.dumps([
+        {"category": "Geography", "prompt": "Capital of France?", "solution": "Paris"},
+        ["science", "H2O is?", "Water"],
+        {"prompt": "Uncategorised?", "solution": "Yes"},
+    ]), encoding="utf-8")
+    pack_dir = tmp_path / "packs"
+
+    main(["build", str(source), str(pack_dir / PACK_FILES["obviously_lies"])])
+
+    pack = QuestionPack(str(pack_dir / PACK_FILES["obviously_lies"]))
+    assert len(pack) == 3
+    assert set(pack.categories) == {"geography", "science", "general"}
+    assert pack[pack.categories["geography"][0]] == ("Capital of France?", "Paris")
+    pack.close()
+
+    bank = PromptBank()
+    bank.load_packs(PACK_FILES, str(pack_dir))
+    assert "obviously_lies" in bank.prompts
+    assert "reverse_guessing" not in bank.prompts
+    assert bank.draw("ABCD", "obviously_lies", "science") == ("H2O is?", "Water")
+
+
+def test_build_rejects_bad_entries(tmp_path, capsys):
+    source = tmp_path / "questions.json"
+    source.write_text(json.dumps([{"category": "x", "prompt": "", "solution": "y"}]), encoding="utf-8")
+    try:
+        main(["build", str(source), str(tmp_path / "out.pack")])
+    except SystemExit as e:
+        assert "entry 0" in str(e.code)
+    else:
+        raise AssertionError("build accepted an empty prompt")
+    assert not (tmp_path / "out.pack").exists()
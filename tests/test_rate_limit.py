@@ -0,0 +1,41 @@
+import argparse
+
+import loadtest
+from conundrum.games.registry import MODES
+from conundrum.utils.rate_limit import LOBBY_BURST, LOBBY_PLAYERS, RateLimiter, rate_limiter
+
+
+def test_lobby_bucket_scales_with_players():
+    limiter = RateLimiter({"vote": 1.0})
+    limiter.clock = lambda: 0.0
+    players = LOBBY_PLAYERS * 4
+    allowed = sum(not limiter.check(f"sid{n}", "ABCD", "vote", players) for n in range(int(LOBBY_BURST) * 4 + 1))
+    assert allowed == LOBBY_BURST * 4
+    # a small lobby keeps the base burst
+    allowed = sum(not limiter.check(f"sid{n}", "WXYZ", "vote", 2) for n in range(int(LOBBY_BURST) + 1))
+    assert allowed == LOBBY_BURST
+
+
+def test_sockets_outside_a_lobby_do_not_drain_it():
+    connect = loadtest.in_process()
+    host = loadtest.Player("host", connect, loadtest.Stats(), timeout=5)
+    _, created = host.emit("create_lobby", {"username": "host", "maxPlayers": 4})
+    lobby_code = created["lobbyCode"]
+
+    outsider = loadtest.Player("outsider", connect, loadtest.Stats(), timeout=5)
+    for n in range(int(LOBBY_BURST) * 2):
+        outsider.client.emit("send_message", {"lobbyCode": lobby_code, "username": "outsider", "message": f"hi {n}"})
+    assert lobby_code not in rate_limiter.lobbies.table
+
+    host.client.emit("send_message", {"lobbyCode": lobby_code, "username": "host", "message": "hello"})
+    assert lobby_code in rate_limiter.lobbies.table
+    host.close()
+    outsider.close()
+
+
+def test_sixty_player_round_completes():
+    args = argparse.Namespace(players=60, rounds=1, think_min=0.05, think_max=0.5, timeout=20.0)
+    connect = loadtest.in_process()
+    stats = loadtest.Stats()
+    assert loadtest.play_lobby(0, MODES["obviously_lies"], connect, stats, args), dict(stats.failures)
+    assert not stats.errors
@@ -0,0 +1,37 @@
+from conundrum import create_app
+from conundrum.utils.rng import LobbyRandom, lobby_rng
+
+
+def draws(rng, count=5):
+    return [rng.random() for _ in range(count)]
+
+
+def test_a_fixed_seed_replays_every_stream(monkeypatch):
+    monkeypatch.setenv("CONUNDRUM_SEED", "42")
+    create_app()
+    first = (draws(lobby_rng.codes), draws(lobby_rng.for_lobby("ABCD")))
+    create_app()
+    assert lobby_rng.deterministic
+    assert (draws(lobby_rng.codes), draws(lobby_rng.for_lobby("ABCD"))) == first
+
+
+def test_lobby_streams_are_independent():
+    a, b = LobbyRandom("1"), LobbyRandom("1")
+    draws(a.for_lobby("ABCD"), 100)
+    # one lobby drawing a lot does not move another lobby's stream
+    assert draws(a.for_lobby("WXYZ")) == draws(b.for_lobby("WXYZ"))
+    assert draws(b.for_lobby("ABCD")) != draws(b.for_lobby("WXYZ"))
+    assert draws(LobbyRandom("2").for_lobby("WXYZ")) != draws(LobbyRandom("1").for_lobby("WXYZ"))
+
+
+def test_released_streams_start_over():
+    rng = LobbyRandom("1")
+    first = draws(rng.for_lobby("ABCD"))
+    rng.release("ABCD")
+    assert "ABCD" not in rng.streams
+    assert draws(rng.for_lobby("ABCD")) == first
+
+
+def test_no_seed_is_not_deterministic():
+    assert not LobbyRandom().deterministic
+    assert draws(LobbyRandom().for_lobby("ABCD")) != draws(LobbyRandom().for_lobby("ABCD"))
@@ -0,0 +1,56 @@
+from collections import Counter
+
+from conundrum.utils.lobby_codes import CODE_ALPHABET, CODE_LENGTH, CodeAllocator
+from conundrum.utils.sharding import CODE_SPACE, HashRing, Shard, code_value
+
+WORKERS = [f"http://w{n}:5000" for n in range(4)]
+
+
+def _codes(count):
+    allocator = CodeAllocator()
+    return [allocator.allocate() for _ in range(count)]
+
+
+def test_every_worker_sees_the_same_owner():
+    codes = _codes(2000)
+    a, b = HashRing(WORKERS), HashRing(reversed(WORKERS))
+    assert all(a.owner(code) == b.owner(code) for code in codes)
+    # and no worker is starved
+    load = Counter(a.owner(code) for code in codes)
+    assert set(load) == set(WORKERS)
+    assert min(load.values()) > len(codes) / len(WORKERS) / 2
+
+
+def test_adding_a_worker_only_moves_codes_to_it():
+    codes = _codes(4000)
+    before, after = HashRing(WORKERS[:3]), HashRing(WORKERS)
+    moved = [code for code in codes if before.owner(code) != after.owner(code)]
+    assert all(after.owner(code) == WORKERS[3] for code in moved)
+    # about a quarter of the codes move, not a reshuffle
+    assert 0.15 < len(moved) / len(codes) < 0.35
+
+
+def test_code_shares_partition_the_code_space():
+    shares = []
+    for me in WORKERS:
+        shard = Shard()
+        shard.configure(me, WORKERS)
+        shares.append((me, shard.code_share()))
+    covered = sorted(r for _, share in shares for r in share)
+    assert covered[0][0] == 0 and covered[-1][1] == CODE_SPACE
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(covered, covered[1:]))
+
+    ring = HashRing(WORKERS)
+    for me, share in shares:
+        for start, end in share:
+            for value in (start, end - 1):
+                code = "".join(CODE_ALPHABET[value // len(CODE_ALPHABET) ** i % len(CODE_ALPHABET)]
+                               for i in reversed(range(CODE_LENGTH)))
+                assert code_value(code) == value
+                assert ring.owner(code) == me
+
+
+def test_unsharded_workers_own_everything():
+    shard = Shard()
+    shard.configure("http://w0:5000", WORKERS[:1])
+    assert shard.code_share() is None
@@ -0,0 +1,111 @@
+import random
+import time
+
+import pytest
+
+import loadtest
+from conundrum.games.registry import MODES
+from conundrum.utils.lobby_codes import code_allocator
+from conundrum.utils.prompt_bank import prompt_bank
+from conundrum.utils.round_manager import round_manager
+from conundrum.utils.snapshot import capture, decode, encode, install
+from conundrum.utils.timer_wheel import timer_wheel
+
+from conftest import wipe_state
+
+
+def round_trip():
+    """What a restarted process would read back from a snapshot taken now."""
+    return decode(encode(capture()))[1]
+
+
+def test_allocator_carries_on_after_restore(clean_state):
+    issued = code_allocator.allocate()
+    code_allocator.release(issued)
+    state = round_trip()
+    expected = [code_allocator.allocate() for _ in range(5)]
+    for code in expected:
+        code_allocator.in_use.discard(code)
+
+    # a new process keys a different permutation until the snapshot is installed
+    code_allocator.configure(random.Random(12345))
+    install(state)
+    assert [code_allocator.allocate() for _ in range(5)] == expected
+    assert code_allocator.stats()["quarantined"] == 1
+    assert issued not in expected
+
+
+def test_prompt_draws_carry_on_after_restore(clean_state):
+    prompt_bank.add_prompts("snapshot_test", [f"prompt {n}" for n in range(20)])
+    drawn = [prompt_bank.draw("ABCD", "snapshot_test") for _ in range(5)]
+    prompt_bank.prefetch("ABCD", "snapshot_test")
+    state = round_trip()
+    expected = [prompt_bank.draw("ABCD", "snapshot_test") for _ in range(10)]
+
+    wipe_state()
+    prompt_bank.release("ABCD")
+    install(state)
+    assert [prompt_bank.draw("ABCD", "snapshot_test") for _ in range(10)] == expected
+    # no prompt repeats across the restart until the bank is used up
+    assert len(set(drawn + expected)) == 15
+    prompt_bank.release("ABCD")
+
+
+def test_format_2_snapshots_still_install(clean_state):
+    state = round_trip()
+    del state["codes"], state["prompts"]
+    install(state)
+
+
+@pytest.fixture
+def round_in_flight(clean_state):
+    """A lobby of obviously_lies in its submission phase."""
+    connect = loadtest.in_process()
+    host = loadtest.Player("host", connect, loadtest.Stats(), timeout=5)
+    guest = loadtest.Player("guest", connect, loadtest.Stats(), timeout=5)
+    _, created = host.emit("create_lobby", {"username": "host", "maxPlayers": 4, "maxRounds": 2})
+    lobby_code = created["lobbyCode"]
+    guest.emit("join_lobby", {"username": "guest", "lobbyCode": lobby_code})
+    host.emit("start_game", {"lobbyCode": lobby_code, "username": "host", "mode": "obviously_lies"})
+    fields = {"question": "Capital of France?", "correctAnswer": "Paris"}
+    host.emit("obviously_lies_start_round", dict(fields, lobbyCode=lobby_code, username="host"),
+              replies=(MODES["obviously_lies"].round_started_event,))
+    yield lobby_code
+    timer_wheel.cancel(lobby_code)
+    host.close()
+    guest.close()
+
+
+def test_restore_rearms_phase_deadlines(round_in_flight):
+    from conundrum import socket
+    lobby_code = round_in_flight
+    phase, round_no, due = round_manager.state[lobby_code]["deadline"]
+    assert (phase, round_no) == ("submit", 1)
+    state = round_trip()
+
+    wipe_state()
+    timer_wheel.cancel(lobby_code)
+    install(state)
+    assert socket.rearm_phases() == 1
+    timer = timer_wheel.timers[lobby_code]
+    assert timer.args == (lobby_code, 1, "submit")
+    left = timer.due * timer_wheel.tick - (timer_wheel.clock() - timer_wheel.start)
+    assert abs(left - (due - time.time())) < 1.0
+
+    # nothing was submitted: the deadline ends the round once it fires
+    timer_wheel.advance(timer_wheel.start + (timer.due + 1) * timer_wheel.tick)
+    assert round_manager.state[lobby_code]["current_round"] == 2
+
+
+def test_ended_rounds_are_not_rearmed(round_in_flight):
+    from conundrum import socket
+    lobby_code = round_in_flight
+    socket._process_end_round_for_manager(socket.lobby_registry.get(lobby_code), MODES["obviously_lies"].manager)
+    # the next round is active but the host has not started it: no deadline yet
+    assert round_manager.state[lobby_code]["round_active"]
+    state = round_trip()
+
+    wipe_state()
+    install(state)
+    assert socket.rearm_phases() == 0
+    assert lobby_code not in timer_wheel.timers
@@ -0,0 +1,195 @@
+import argparse
+import pickle
+import time
+
+import fakeredis
+
+import pytest
+
+import loadtest
+import conundrum.utils.lobby_sync as lobby_sync
+import conundrum.utils.state_store as state_store_module
+from conundrum.games.registry import MODES
+from conundrum.utils.broadcast import room_batcher
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.lobby_sync import lobby_fields, pull_lobby, push_lobby
+from conundrum.utils.presence import presence
+from conundrum.utils.prompt_bank import prompt_bank
+from conundrum.utils.rate_limit import rate_limiter
+from conundrum.utils.rng import lobby_rng
+from conundrum.utils.state_store import LobbyBusy, RedisBackend, StateStore, TamperedState, state_store
+from conundrum.utils.timer_wheel import timer_wheel
+
+from conftest import wipe_state
+
+
+@pytest.fixture
+def redis_store():
+    store = StateStore()
+    store.configure(backend=RedisBackend(fakeredis.FakeRedis()), key="test-key")
+    return store
+
+
+def switch_worker():
+    """Forget everything this process keeps about lobbies, as if the next event went to another worker."""
+    wipe_state()
+    lobby_sync._seen.clear()
+    prompt_bank.cursors, prompt_bank.prefetched, prompt_bank.last_tags = {}, {}, {}
+    room_batcher.sent.clear()
+    rate_limiter.lobbies.table.clear()
+    timer_wheel.timers.clear()
+
+
+@pytest.fixture
+def shared(clean_state):
+    """The app's store, shared through an in-process backend for the test."""
+    state_store.configure("memory://")
+    yield state_store
+    state_store.configure(None)
+
+
+def test_fields_round_trip_signed(redis_store):
+    redis_store.save("ABCD", {"lobby": b"one", "round": b"two"})
+    assert redis_store.load("ABCD") == {"lobby": b"one", "round": b"two"}
+    raw = redis_store.backend.load("ABCD")
+    assert raw["lobby"] != b"one" and raw["lobby"].endswith(b"one")
+
+
+def test_tampered_fields_are_refused(redis_store):
+    redis_store.save("ABCD", {"lobby": b"one"})
+    redis_store.save("WXYZ", {"lobby": b"two"})
+    client = redis_store.backend.client
+
+    # a blob moved from another lobby carries that lobby's signature
+    client.hset("conundrum:lobby:ABCD", "lobby", client.hget("conundrum:lobby:WXYZ", "lobby"))
+    with pytest.raises(TamperedState):
+        redis_store.load("ABCD")
+
+    client.hset("conundrum:lobby:ABCD", "lobby", b"\0" * 32 + pickle.dumps("evil"))
+    with pytest.raises(TamperedState):
+        redis_store.load("ABCD")
+
+    # signed with another key: another deployment, or a guess
+    other = StateStore()
+    other.configure(backend=redis_store.backend, key="other-key")
+    other.save("WXYZ", {"lobby": b"three"})
+    with pytest.raises(TamperedState):
+        redis_store.load("WXYZ")
+
+
+def test_redis_store_needs_a_key():
+    with pytest.raises(ValueError):
+        StateStore().configure("redis://localhost:6379/0")
+
+
+def test_pull_never_unpickles_unsigned_state(shared, monkeypatch):
+    lobby_registry.create("ABCD", "host")
+    push_lobby("ABCD")
+    shared.backend.hashes["ABCD"]["lobby"] = b"\0" * 32 + pickle.dumps("evil")
+    unpickled = []
+    monkeypatch.setattr(pickle, "loads", lambda blob: unpickled.append(blob))
+    wipe_state()
+    with pytest.raises(TamperedState):
+        pull_lobby("ABCD")
+    assert not unpickled
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_lobby_lock_is_exclusive(redis_store, backend, monkeypatch):
+    monkeypatch.setattr(state_store_module, "LOCK_WAIT_SECONDS", 0.05)
+    if backend == "memory":
+        redis_store.configure("memory://")
+    with redis_store.lock("ABCD"):
+        # another worker handling an event for the same lobby has to wait its turn
+        with pytest.raises(LobbyBusy):
+            with redis_store.lock("ABCD"):
+                pass
+        with redis_store.lock("WXYZ"):
+            pass
+    with redis_store.lock("ABCD"):
+        pass
+
+
+def test_expired_lock_is_not_released_by_its_old_holder(redis_store):
+    client = redis_store.backend.client
+    with redis_store.lock("ABCD"):
+        # the lock ran out and another worker took it
+        client.set("conundrum:lobby:ABCD:lock", b"someone else")
+    assert client.get("conundrum:lobby:ABCD:lock") == b"someone else"
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_games_play_through_the_shared_store(clean_state, backend):
+    connect = loadtest.in_process()
+    # after create_app, which configures the store from the environment
+    if backend == "memory":
+        state_store.configure("memory://")
+    else:
+        state_store.configure(backend=RedisBackend(fakeredis.FakeRedis()), key="test-key")
+    try:
+        args = argparse.Namespace(players=6, rounds=2, think_min=0.0, think_max=0.05, timeout=10.0)
+        stats = loadtest.Stats()
+        assert loadtest.play_lobby(1, MODES["reverse_guessing"], connect, stats, args), dict(stats.failures)
+        assert not stats.errors
+        code = next(iter(lobby_registry.lobbies))
+        assert state_store.load(code)["lobby"]
+        # every lock taken along the way was released
+        with state_store.lock(code):
+            pass
+    finally:
+        state_store.configure(None)
+
+
+def test_worker_state_of_a_lobby_travels_with_it(shared):
+    lobby_registry.create("ABCD", "host").add("p1")
+    lobby_rng.for_lobby("ABCD").random()
+    prompt_bank.add_prompts("store_test", [f"prompt {n}" for n in range(10)])
+    prompt_bank.draw("ABCD", "store_test")
+    prompt_bank.prefetch("ABCD", "store_test")
+    presence.disconnected("ABCD", "p1")
+    room_batcher.sent["ABCD"] = {"scores": {"host": 0, "p1": 3}}
+    rate_limiter.check("sid", "ABCD", "send_message")
+    push_lobby("ABCD")
+    expected = {name: value for name, value in lobby_fields("ABCD").items() if name not in ("lobby", "round")}
+    assert set(expected) == {"rng", "prompts", "away", "sent", "bucket"}
+    next_random = lobby_rng.for_lobby("ABCD").random()
+
+    switch_worker()
+    pull_lobby("ABCD")
+    assert {name: value for name, value in lobby_fields("ABCD").items() if name in expected} == expected
+    # a seeded stream carries on where the other worker left it
+    assert lobby_rng.for_lobby("ABCD").random() == next_random
+    assert presence.is_away("ABCD", "p1")
+    prompt_bank.release("ABCD")
+
+
+def test_deadlines_and_lobby_buckets_follow_the_lobby(clean_state):
+    connect = loadtest.in_process()
+    state_store.configure("memory://")
+    try:
+        host = loadtest.Player("host", connect, loadtest.Stats(), timeout=5)
+        guest = loadtest.Player("guest", connect, loadtest.Stats(), timeout=5)
+        _, created = host.emit("create_lobby", {"username": "host", "maxPlayers": 4})
+        code = created["lobbyCode"]
+        guest.emit("join_lobby", {"username": "guest", "lobbyCode": code})
+        host.emit("start_game", {"lobbyCode": code, "mode": "obviously_lies"})
+        host.emit("obviously_lies_start_round",
+                  {"lobbyCode": code, "question": "Capital of France?", "correctAnswer": "Paris"},
+                  replies=(MODES["obviously_lies"].round_started_event,))
+        assert state_store.load(code)["bucket"]
+
+        # the round was started on "another worker" that also spent the lobby's budget:
+        # this one has no timer and no bucket for it
+        rate_limiter.lobbies.put(code, [1.5, time.time(), rate_limiter.lobbies.table[code][2]])
+        push_lobby(code)
+        lobby_sync._seen.pop(code)
+        timer_wheel.cancel(code)
+        rate_limiter.lobbies.forget(code)
+        guest.emit("send_message", {"lobbyCode": code, "message": "hi"}, replies=("lobby_batch",))
+        assert timer_wheel.timers[code].args == (code, 1, "submit")
+        assert rate_limiter.lobbies.table[code][0] < 1.5
+        host.close()
+        guest.close()
+    finally:
+        timer_wheel.cancel(code)
+        state_store.configure(None)
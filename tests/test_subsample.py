@@ -0,0 +1,86 @@
+from collections import Counter
+
+import pytest
+
+import loadtest
+from conundrum.games.registry import MODES
+from conundrum.utils.subsample import LARGE_PARTY_MIN_VOTERS, LARGE_PARTY_SAMPLE_SIZE, assign_subsets
+from conundrum.utils.timer_wheel import timer_wheel
+
+
+def deal(voter_count, sample_size=8, truth=True):
+    """Every voter owns one answer; the truth, if any, is ID 0."""
+    voters = [f"p{n}" for n in range(voter_count)]
+    offset = 1 if truth else 0
+    own_ids = {voter: {n + offset} for n, voter in enumerate(voters)}
+    subsets = assign_subsets(voter_count + offset, voters, own_ids, sample_size, 0 if truth else None)
+    return subsets, own_ids
+
+
+@pytest.mark.parametrize("voter_count", [12, 13, 30, 101])
+def test_answers_are_shown_about_equally_often(voter_count):
+    subsets, own_ids = deal(voter_count)
+    shown = Counter(i for ids in subsets.values() for i in ids if i != 0)
+    assert set(shown) == set(range(1, voter_count + 1))
+    # every voter sees sample_size - 1 lies, so each lie is shown that often on average
+    assert all(abs(count - 7) <= 1 for count in shown.values())
+    for voter, ids in subsets.items():
+        assert len(ids) == 8
+        assert 0 in ids
+        assert not own_ids[voter] & set(ids)
+        assert ids == sorted(set(ids))
+
+
+def test_without_a_truth_every_slot_is_an_answer():
+    subsets, own_ids = deal(20, truth=False)
+    for voter, ids in subsets.items():
+        assert len(ids) == 8
+        assert not own_ids[voter] & set(ids)
+
+
+def test_small_pools_show_everything_but_your_own():
+    subsets, own_ids = deal(5, sample_size=8)
+    for voter, ids in subsets.items():
+        assert set(ids) == set(range(6)) - own_ids[voter]
+
+
+def test_the_deal_is_the_same_every_time():
+    assert deal(40)[0] == deal(40)[0]
+
+
+def test_large_party_voters_get_their_own_subset(clean_state):
+    mode = MODES["obviously_lies"]
+    connect = loadtest.in_process()
+    host = loadtest.Player("host", connect, loadtest.Stats(), timeout=5)
+    guests = [loadtest.Player(f"p{n}", connect, loadtest.Stats(), timeout=5) for n in range(LARGE_PARTY_MIN_VOTERS)]
+    _, created = host.emit("create_lobby", {"username": "host", "maxPlayers": len(guests) + 1})
+    lobby_code = created["lobbyCode"]
+    try:
+        for guest in guests:
+            guest.emit("join_lobby", {"username": guest.name, "lobbyCode": lobby_code})
+        host.emit("start_game", {"lobbyCode": lobby_code, "mode": mode.name})
+        host.emit(mode.start_event, {"lobbyCode": lobby_code, "question": "Capital of France?", "correctAnswer": "Paris"},
+                  replies=(mode.round_started_event,))
+        cities = ("Berlin", "Rome", "Lyon", "Madrid", "Oslo", "Vienna", "Lisbon", "Dublin", "Prague", "Athens", "Warsaw", "Cairo", "Tokyo")
+        lies = {player.name: city for player, city in zip([host] + guests, cities)}
+        for player in [host] + guests:
+            player.emit(mode.submit_event, {"lobbyCode": lobby_code, mode.submit_field: lies[player.name]})
+
+        full = host.wait_for_final_reveal(mode)[mode.reveal_key]
+        assert len(full) == len(lies) + 1
+        for guest in guests:
+            reveal = guest.wait_for_final_reveal(mode)
+            shown = reveal[mode.reveal_key]
+            assert len(shown) == LARGE_PARTY_SAMPLE_SIZE
+            assert "Paris" in shown
+            assert lies[guest.name] not in shown
+            assert shown == [full[i] for i in reveal["answerIds"]]
+
+        hidden = next(i for i in range(len(full)) if i not in reveal["answerIds"])
+        with pytest.raises(loadtest.Failed, match="Invalid answer"):
+            guest.emit(mode.vote_event, {"lobbyCode": lobby_code, "answerId": hidden}, replies=("vote_confirmed",))
+        guest.emit(mode.vote_event, {"lobbyCode": lobby_code, "answerId": reveal["answerIds"][0]}, replies=("vote_confirmed",))
+    finally:
+        timer_wheel.cancel(lobby_code)
+        for player in [host] + guests:
+            player.close()
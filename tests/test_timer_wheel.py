@@ -0,0 +1,111 @@
+import pytest
+
+import conundrum.utils.timer_wheel as timer_wheel_module
+from conundrum.utils.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_wheel(clock):
+    # one-second ticks keep tick numbers exact; no socketio, so the test drives the wheel
+    wheel = TimerWheel(tick_ms=1000)
+    wheel.clock = clock
+    wheel.start = 0.0
+    return wheel
+
+
+def run_until(wheel, clock, tick):
+    clock.now = float(tick)
+    wheel.advance()
+
+
+def arm_recording(wheel, fired, key, delay):
+    wheel.arm(key, delay, lambda: fired.setdefault(key, wheel.current))
+
+
+# level 0 covers 256 ticks, level 1 256 * 64, level 2 256 * 64 * 64 (delays of d seconds are due at tick d + 1)
+BOUNDARIES = [
+    1, 254, 255, 256, 300,
+    (1 << 14) - 2, (1 << 14) - 1, 1 << 14, (1 << 14) + 257,
+    (1 << 20) - 2, (1 << 20) - 1, 1 << 20, (1 << 20) + (1 << 14) + 3,
+]
+
+
+@pytest.mark.parametrize("offset", [0, 77, 255])
+def test_timers_cascade_down_across_level_boundaries(clock, offset):
+    wheel = make_wheel(clock)
+    run_until(wheel, clock, offset)
+    fired = {}
+    for delay in BOUNDARIES:
+        arm_recording(wheel, fired, delay, delay)
+    levels = {delay: wheel.timers[delay].level for delay in BOUNDARIES}
+    assert levels[1] == 0
+    assert levels[(1 << 14) + 257] == 2
+    assert levels[(1 << 20) + (1 << 14) + 3] == 3
+
+    run_until(wheel, clock, offset + max(BOUNDARIES) + 1)
+    assert fired == {delay: offset + delay + 1 for delay in BOUNDARIES}
+    assert not wheel.timers
+
+
+def test_cancelled_timers_never_fire(clock):
+    wheel = make_wheel(clock)
+    fired = {}
+    for key, delay in (("kept", 400), ("cancelled", 400), ("moved", 300)):
+        arm_recording(wheel, fired, key, delay)
+    assert wheel.cancel("cancelled")
+    assert not wheel.cancel("cancelled")
+
+    # "moved" has cascaded from level 1 to level 0 by now
+    run_until(wheel, clock, 260)
+    assert wheel.timers["moved"].level == 0
+    assert wheel.cancel("moved")
+
+    run_until(wheel, clock, 1000)
+    assert fired == {"kept": 401}
+    assert all(not slot for level in wheel.levels for slot in level)
+
+
+def test_rearming_a_key_replaces_its_timer(clock):
+    wheel = make_wheel(clock)
+    fired = []
+    wheel.arm("lobby", 500, fired.append, "first")
+    wheel.arm("lobby", 10, fired.append, "second")
+    run_until(wheel, clock, 1000)
+    assert fired == ["second"]
+
+
+def test_timers_beyond_the_top_level_fire_on_time(clock, monkeypatch):
+    # a small wheel (4 levels of 2 bits = 256 ticks) so its range can be walked past
+    monkeypatch.setattr(timer_wheel_module, "_LEVEL_BITS", (2, 2, 2, 2))
+    wheel = make_wheel(clock)
+    run_until(wheel, clock, 5)
+    fired = {}
+    delays = [254, 255, 256, 257, 511, 512, 1000, 4097]
+    for delay in delays:
+        arm_recording(wheel, fired, delay, delay)
+    # out of range: parked in the top level until they come within reach
+    assert wheel.timers[1000].level == 3
+
+    run_until(wheel, clock, 5000)
+    assert fired == {delay: 5 + delay + 1 for delay in delays}
+
+
+def test_timers_beyond_the_real_top_level_are_parked(clock):
+    wheel = make_wheel(clock)
+    fired = {}
+    arm_recording(wheel, fired, "far", (1 << 26) + 1000)
+    timer = wheel.timers["far"]
+    assert timer.level == 3
+    assert timer.due == (1 << 26) + 1001
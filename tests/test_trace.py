@@ -0,0 +1,48 @@
+import pytest
+
+import conundrum.utils.trace as trace
+from conundrum import create_app
+from conundrum.utils.lobbies import lobby_registry
+from conundrum.utils.metrics import Metrics
+from conundrum.utils.trace import LobbyTraces, lobby_traces
+
+
+def test_live_rings_are_capped_least_recent_first(monkeypatch):
+    monkeypatch.setattr(trace, "LIVE_KEPT", 3)
+    traces = LobbyTraces(size=4)
+    for code in ("AAAA", "BBBB", "CCCC"):
+        traces.record(code, "join_lobby")
+    traces.record("AAAA", "chat")
+    traces.record("DDDD", "create_lobby")
+    assert list(traces.live) == ["CCCC", "AAAA", "DDDD"]
+    assert "BBBB" not in traces
+
+
+@pytest.fixture
+def lobby():
+    lobby = lobby_registry.create("TRCE", "host")
+    yield lobby
+    lobby_registry.remove("TRCE")
+    lobby_traces.live.pop("TRCE", None)
+    lobby_traces.live.pop("NOPE", None)
+
+
+def test_only_existing_lobbies_are_traced(lobby):
+    metrics = Metrics()
+    handler = metrics.instrumented("send_message")(lambda data: None)
+    handler({"lobbyCode": "NOPE", "username": "x"})
+    handler({"lobbyCode": ["not", "a", "code"]})
+    handler({"lobbyCode": "TRCE", "username": "host"})
+    assert "NOPE" not in lobby_traces
+    assert [e["event"] for e in lobby_traces.dump("TRCE")["events"]] == ["send_message"]
+
+
+def test_admin_token_is_only_read_from_the_header(lobby):
+    app = create_app()
+    app.config["ADMIN_TOKEN"] = "s3cret"
+    client = app.test_client()
+    lobby_traces.record("TRCE", "join_lobby")
+
+    assert client.get("/admin/trace/TRCE", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+    assert client.get("/admin/trace/TRCE?token=s3cret").status_code == 403
+    assert client.get("/admin/trace/TRCE", headers={"X-Admin-Token": "wrong"}).status_code == 403
@@ -0,0 +1,69 @@
+import pytest
+
+import loadtest
+from conundrum.games.registry import MODES
+from conundrum.utils.broadcast import BATCH_EVENT
+from conundrum.utils.timer_wheel import timer_wheel
+
+MODE = MODES["obviously_lies"]
+
+
+@pytest.fixture
+def voting(clean_state):
+    """Host and two players in the voting phase; yields (players, answer -> ID)."""
+    connect = loadtest.in_process()
+    players = {name: loadtest.Player(name, connect, loadtest.Stats(), timeout=5) for name in ("host", "p1", "p2")}
+    _, created = players["host"].emit("create_lobby", {"username": "host", "maxPlayers": 4})
+    lobby_code = created["lobbyCode"]
+    for name in ("p1", "p2"):
+        players[name].emit("join_lobby", {"username": name, "lobbyCode": lobby_code})
+    players["host"].emit("start_game", {"lobbyCode": lobby_code, "mode": MODE.name})
+    players["host"].emit(MODE.start_event,
+                         {"lobbyCode": lobby_code, "question": "Capital of France?", "correctAnswer": "Paris"},
+                         replies=(MODE.round_started_event,))
+    for name, lie in (("host", "Berlin"), ("p1", "Lyon"), ("p2", "Rome")):
+        players[name].emit(MODE.submit_event, {"lobbyCode": lobby_code, MODE.submit_field: lie})
+    options = players["p1"].wait_for_final_reveal(MODE)[MODE.reveal_key]
+    yield lobby_code, players, {text: i for i, text in enumerate(options)}
+    timer_wheel.cancel(lobby_code)
+    for player in players.values():
+        player.close()
+
+
+def vote(player, lobby_code, answer_id):
+    return player.emit(MODE.vote_event, {"lobbyCode": lobby_code, "answerId": answer_id}, replies=("vote_confirmed",))
+
+
+@pytest.mark.parametrize("answer_id", [-1, 4, "0", 0.0, True, None])
+def test_ids_not_on_offer_are_rejected(voting, answer_id):
+    lobby_code, players, _ = voting
+    with pytest.raises(loadtest.Failed, match="Invalid answer"):
+        vote(players["p1"], lobby_code, answer_id)
+
+
+def test_no_vote_for_your_own_answer(voting):
+    lobby_code, players, ids = voting
+    with pytest.raises(loadtest.Failed, match="already voted"):
+        vote(players["p1"], lobby_code, ids["Lyon"])
+    with pytest.raises(loadtest.Failed, match="Host cannot vote"):
+        vote(players["host"], lobby_code, ids["Paris"])
+
+
+def test_votes_are_tallied_by_id(voting):
+    lobby_code, players, ids = voting
+    _, ack = vote(players["p1"], lobby_code, ids["Rome"])
+    assert ack == {"answerId": ids["Rome"], "player": "p1"}
+    _, batch = players["host"].wait_for(BATCH_EVENT)
+    assert batch["votes"] == {"p1": ids["Rome"]}
+    expected = [0] * len(ids)
+    expected[ids["Rome"]] = 1
+    assert batch["tallies"] == expected
+
+    with pytest.raises(loadtest.Failed, match="already voted"):
+        vote(players["p1"], lobby_code, ids["Paris"])
+
+    vote(players["p2"], lobby_code, ids["Paris"])
+    _, batch = players["host"].wait_for(BATCH_EVENT)
+    expected[ids["Paris"]] = 1
+    assert batch["votes"] == {"p2": ids["Paris"]}
+    assert batch["tallies"] == expected
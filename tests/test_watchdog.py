@@ -0,0 +1,45 @@
+import eventlet
+from eventlet.patcher import original
+
+from conundrum.utils.metrics import metrics
+from conundrum.utils.watchdog import LagWatchdog
+
+# blocks the whole hub, as a handler doing synchronous I/O would
+_blocking_sleep = original("time").sleep
+
+
+class _Hub:
+    sleep = staticmethod(eventlet.sleep)
+
+
+def test_a_blocking_handler_is_caught_in_the_act(capsys):
+    watchdog = LagWatchdog()
+    watchdog.configure(_Hub(), threshold_ms=100, heartbeat_ms=10)
+    heartbeat = eventlet.spawn(watchdog.run)
+
+    @metrics.instrumented("watchdog_test_block")
+    def handler(data):
+        _blocking_sleep(0.4)
+
+    try:
+        eventlet.sleep(0.1)
+        assert watchdog.stalls == {}
+        handler({})
+        eventlet.sleep(0.1)
+    finally:
+        heartbeat.kill()
+        # the monitor thread outlives the test; with no more heartbeats it must not report
+        watchdog.threshold = float("inf")
+
+    # logged and counted once, against the event that held the hub
+    assert watchdog.stalls == {"watchdog_test_block": 1}
+    assert watchdog.stats()["lag_max_ms"] >= 250
+    out = capsys.readouterr().out
+    assert "handling watchdog_test_block" in out
+    assert "in handler" in out
+
+
+def test_a_threshold_of_zero_turns_it_off():
+    watchdog = LagWatchdog()
+    watchdog.configure(_Hub(), threshold_ms=0)
+    assert not watchdog.enabled